@@ -10,5 +10,11 @@ class Application(models.Model):
     test_score = models.FloatField(null=True, blank=True)
     test_time_taken = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # A job's (shortlisted) applications
+            models.Index(fields=['job_post', 'is_shortlisted'], name='application_job_shortlist_idx'),
+        ]
+
     def __str__(self):
         return f"{self.candidate.name} applied to {self.job_post.title}"
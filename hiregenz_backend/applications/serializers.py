@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from helpers.pagination import SparseFieldsMixin
 from .models import Application
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class ApplicationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Application
         fields = '__all__'
\ No newline at end of file
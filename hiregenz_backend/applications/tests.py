@@ -1,3 +1,23 @@
 from django.test import TestCase
+from django.urls import reverse
+from matching.tests import create_candidates, create_job, create_recruiter
+from .models import Application
 
-# Create your tests here.
+
+class ApplicationListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        job = create_job(create_recruiter("recruiter"))
+        cls.applications = Application.objects.bulk_create(
+            Application(candidate=candidate, job_post=job) for candidate in create_candidates(jane=1, john=2)
+        )
+
+    def test_original_response_without_pagination_params(self):
+        data = self.client.get(reverse("applications")).json()
+        self.assertEqual([application["id"] for application in data], [app.id for app in self.applications])
+
+    def test_pages_and_fields(self):
+        data = self.client.get(reverse("applications"), {"page_size": 1, "fields": "id,is_shortlisted"}).json()
+        self.assertEqual(data["results"], [{"id": self.applications[1].id, "is_shortlisted": False}])
+        self.assertIsNotNone(data["next"])
+        self.assertEqual(self.client.get(reverse("applications"), {"fields": "salary"}).status_code, 400)
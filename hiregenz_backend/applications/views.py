@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import Application
 from .serializers import ApplicationSerializer
+from helpers.pagination import KeysetPagination, only_columns, requested_fields, wants_pages
 
 class ApplicationView(APIView):
     def post(self, request):
@@ -13,6 +14,14 @@ class ApplicationView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request):
-        applications = Application.objects.all()
-        serializer = ApplicationSerializer(applications, many=True)
-        return Response(serializer.data)
+        # Original response (every application, as a plain array) unless pages are asked for
+        if not wants_pages(request):
+            serializer = ApplicationSerializer(Application.objects.all(), many=True)
+            return Response(serializer.data)
+
+        # Newest first, cursor-paginated; `?fields=` limits the serialized fields
+        fields = requested_fields(request, list(ApplicationSerializer().fields))
+        paginator = KeysetPagination()
+        applications = paginator.paginate_queryset(only_columns(Application.objects.all(), fields), request, view=self)
+        serializer = ApplicationSerializer(applications, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import ContactInfo
+from .models import ContactInfo, AnalysisCacheEntry
 
 admin.site.register(ContactInfo)
+admin.site.register(AnalysisCacheEntry)
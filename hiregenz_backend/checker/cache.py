@@ -0,0 +1,306 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from helpers.instrumentation import register_collector
+from django.db.models import F
+from django.utils.timezone import now
+from .utils.analyzer import ANALYZER_VERSION
+from .utils.genai import PROMPT_VERSION
+
+
+def analysis_cache_key(content=None, digest=None):
+    """
+    Cache key of an uploaded PDF: its SHA-256 (`digest`, or computed from
+    `content`) plus the versions of the code that produced the result.
+    """
+    digest = digest or hashlib.sha256(content).hexdigest()
+    version = hashlib.sha256(f"{ANALYZER_VERSION}|{PROMPT_VERSION}".encode()).hexdigest()[:12]
+    return f"{digest}:{version}"
+
+
+class CacheStats:
+    """
+    Hit/miss counters of a cache (per process).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.hits = self.misses = self.sets = self.evictions = 0
+
+    def incr(self, name, amount=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class BaseAnalysisCache:
+    """
+    Interface of the analysis cache backends: `get`, `set`, `delete`, `clear` and `__len__`.
+    Values are JSON-serializable dicts; `ttl` is in seconds (0 or None = never expire).
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = settings.ANALYSIS_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries or settings.ANALYSIS_CACHE_MAX_ENTRIES
+        self.stats = CacheStats()
+
+    def get(self, key):
+        value = self._get(key)
+        self.stats.incr("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value):
+        self._set(key, value)
+        self.stats.incr("sets")
+
+    def _expires(self):
+        return time.time() + self.ttl if self.ttl else None
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class NullAnalysisCache(BaseAnalysisCache):
+    """
+    Caching disabled: every lookup is a miss.
+    """
+
+    def _get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class MemoryAnalysisCache(BaseAnalysisCache):
+    """
+    Least-recently-used cache in process memory (each worker process has its own).
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        super().__init__(ttl, max_entries)
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expires, value), least recently used first
+
+    def _get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value):
+        with self.lock:
+            self.entries[key] = (self._expires(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats.incr("evictions")
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class FileAnalysisCache(BaseAnalysisCache):
+    """
+    One JSON file per entry under `path`, shared by every process on the machine.
+    Reads touch the file, so eviction by modification time is least-recently-used.
+    """
+
+    def __init__(self, path=None, ttl=None, max_entries=None):
+        super().__init__(ttl, max_entries)
+        self.path = Path(path or settings.ANALYSIS_CACHE_DIR)
+
+    def _file(self, key):
+        # Keys contain ':' which is not valid in Windows file names
+        return self.path / f"{key.replace(':', '_')}.json"
+
+    def _get(self, key):
+        file = self._file(key)
+        try:
+            with open(file) as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if entry["expires"] is not None and entry["expires"] < time.time():
+            file.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(file)
+        except OSError:
+            pass
+        return entry["value"]
+
+    def _set(self, key, value):
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self._file(key)
+        tmp = file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as handle:
+            json.dump({"expires": self._expires(), "value": value}, handle)
+        os.replace(tmp, file)
+        self._evict()
+
+    def _entries(self):
+        return list(self.path.glob("*.json")) if self.path.exists() else []
+
+    def _evict(self):
+        files = self._entries()
+        excess = len(files) - self.max_entries
+        if excess <= 0:
+            return
+        mtimes = {}
+        for file in files:
+            try:
+                mtimes[file] = file.stat().st_mtime
+            except OSError:
+                pass  # Removed by another process
+        for file in sorted(mtimes, key=mtimes.get)[:excess]:
+            file.unlink(missing_ok=True)
+            self.stats.incr("evictions")
+
+    def delete(self, key):
+        self._file(key).unlink(missing_ok=True)
+
+    def clear(self):
+        for file in self._entries():
+            file.unlink(missing_ok=True)
+
+    def __len__(self):
+        return len(self._entries())
+
+
+class DatabaseAnalysisCache(BaseAnalysisCache):
+    """
+    Entries stored in the AnalysisCacheEntry table, shared by every server.
+    """
+
+    def _model(self):
+        from .models import AnalysisCacheEntry
+        return AnalysisCacheEntry
+
+    def _get(self, key):
+        Entry = self._model()
+        entry = Entry.objects.filter(key=key).only("value", "expires_at").first()
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at < now():
+            entry.delete()
+            return None
+        Entry.objects.filter(pk=entry.pk).update(hits=F("hits") + 1, last_used_at=now())
+        return entry.value
+
+    def _set(self, key, value):
+        Entry = self._model()
+        expires_at = now() + timedelta(seconds=self.ttl) if self.ttl else None
+        Entry.objects.update_or_create(key=key, defaults={"value": value, "expires_at": expires_at})
+        self._evict()
+
+    def _evict(self):
+        Entry = self._model()
+        Entry.objects.filter(expires_at__lt=now()).delete()
+        stale = list(Entry.objects.order_by("-last_used_at").values_list("pk", flat=True)[self.max_entries:])
+        if stale:
+            deleted, _ = Entry.objects.filter(pk__in=stale).delete()
+            self.stats.incr("evictions", deleted)
+
+    def delete(self, key):
+        self._model().objects.filter(key=key).delete()
+
+    def clear(self):
+        self._model().objects.all().delete()
+
+    def __len__(self):
+        return self._model().objects.count()
+
+
+BACKENDS = {
+    "memory": MemoryAnalysisCache,
+    "file": FileAnalysisCache,
+    "db": DatabaseAnalysisCache,
+    "none": NullAnalysisCache,
+}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """
+    Process-wide analysis cache, using the ANALYSIS_CACHE_BACKEND backend.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = settings.ANALYSIS_CACHE_BACKEND
+                if backend not in BACKENDS:
+                    raise ValueError(f"Unknown ANALYSIS_CACHE_BACKEND '{backend}'.")
+                _cache = BACKENDS[backend]()
+    return _cache
+
+
+def cache_samples():
+    """Analysis cache counters, for the Prometheus endpoint (nothing until the cache is used)."""
+    if _cache is None:
+        return []
+    stats = _cache.stats.as_dict()
+    return [
+        ("hiregenz_analysis_cache_events_total", "counter", "Analysis cache lookups and writes, by event.",
+         [({"backend": settings.ANALYSIS_CACHE_BACKEND, "event": event}, stats[event])
+          for event in ("hits", "misses", "sets", "evictions")]),
+    ]
+
+
+register_collector(cache_samples)
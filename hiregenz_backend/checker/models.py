@@ -9,3 +9,24 @@ class ContactInfo(models.Model):
 
     def __str__(self):
         return self.email
+
+
+class AnalysisCacheEntry(models.Model):
+    """
+    A cached resume analysis, keyed by the SHA-256 of the PDF and the analyzer/prompt versions.
+    """
+    key = models.CharField(max_length=128, unique=True)
+    value = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+    hits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_used_at'], name='analysis_cache_used_idx'),
+            models.Index(fields=['expires_at'], name='analysis_cache_expiry_idx'),  # Purge of expired entries
+        ]
+
+    def __str__(self):
+        return self.key
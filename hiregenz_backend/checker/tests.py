@@ -1,3 +1,293 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import json
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from helpers.llm import FakeProvider, LLMError, LLMGateway, LLMTimeoutError, get_llm_gateway
+from helpers.structured import (
+    LLMOutputError, arepair_structured, complete_structured, parse_json, parse_structured,
+)
+from checker.cache import DatabaseAnalysisCache, FileAnalysisCache, MemoryAnalysisCache, analysis_cache_key
+from checker.utils.genai import FEEDBACK_SCHEMA
+from tests.utils import MCQ_SCHEMA
 
-# Create your tests here.
+# Raw LLM answers (*.txt) and the value each one should parse to (expected.json, null = unparseable)
+LLM_OUTPUTS = Path(__file__).resolve().parent / 'fixtures' / 'llm_outputs'
+
+
+def llm_output(name):
+    return (LLM_OUTPUTS / name).read_text()
+
+
+class ParseJsonTests(SimpleTestCase):
+    def test_corpus(self):
+        expected = json.loads((LLM_OUTPUTS / 'expected.json').read_text())
+        self.assertEqual(set(expected), {path.name for path in LLM_OUTPUTS.glob('*.txt')})
+        for name, value in expected.items():
+            with self.subTest(name):
+                if value is None:
+                    with self.assertRaises(ValueError):
+                        parse_json(llm_output(name))
+                else:
+                    self.assertEqual(parse_json(llm_output(name)), value)
+
+
+class ParseStructuredTests(SimpleTestCase):
+    def test_valid_feedback(self):
+        value, errors = parse_structured(llm_output('fenced.txt'), FEEDBACK_SCHEMA)
+        self.assertEqual(errors, [])
+        self.assertEqual(value['overall_quality'], 'average')
+
+    def test_truncated_feedback_reports_missing_fields(self):
+        value, errors = parse_structured(llm_output('truncated.txt'), FEEDBACK_SCHEMA)
+        self.assertEqual(value['action_points'], ['Add metrics'])
+        self.assertEqual(errors, ["$ is missing 'overall_quality'.", "$ is missing 'chance_get_selected'."])
+
+    def test_wrapped_array_is_unwrapped(self):
+        value, errors = parse_structured(llm_output('wrapped_array.txt'), MCQ_SCHEMA)
+        self.assertEqual(errors, [])
+        self.assertEqual(value[0]['answer'], 'A web framework')
+
+    def test_no_json(self):
+        value, errors = parse_structured(llm_output('no_json.txt'), FEEDBACK_SCHEMA)
+        self.assertIsNone(value)
+        self.assertEqual(errors, ['No valid JSON found in the response.'])
+
+    def test_schema_errors(self):
+        _, errors = parse_structured(llm_output('python_literals.txt'), FEEDBACK_SCHEMA)
+        self.assertEqual(errors, ['$.action_points should have at least 1 items.'])
+
+    def test_domain_check_runs_after_schema(self):
+        def check(value):
+            return [] if value['chance_get_selected'].isdigit() and int(value['chance_get_selected']) <= 100 else [
+                '$.chance_get_selected should be a number out of 100.'
+            ]
+        self.assertEqual(parse_structured(llm_output('python_repr.txt'), FEEDBACK_SCHEMA, check)[1], [])
+        answer = llm_output('escaped.txt').replace('"50"', '"500"')
+        self.assertEqual(
+            parse_structured(answer, FEEDBACK_SCHEMA, check)[1], ['$.chance_get_selected should be a number out of 100.']
+        )
+
+
+@override_settings(LLM_REPAIR_ATTEMPTS=1)
+class RepairTests(SimpleTestCase):
+    def register(self, *answers):
+        """A fake provider answering `answers` in turn, recording the prompts it got."""
+        self.prompts = []
+
+        def handler(prompt, model):
+            self.prompts.append(prompt)
+            return answers[min(len(self.prompts), len(answers)) - 1]
+
+        provider = FakeProvider(handler=handler)
+        get_llm_gateway().register('test', provider)
+        return provider
+
+    def test_repair_prompt_fixes_answer(self):
+        provider = self.register(llm_output('truncated.txt'), llm_output('commented.txt'))
+        value = complete_structured('Review this resume.', FEEDBACK_SCHEMA, 'test', 'model')
+        self.assertEqual(value['overall_quality'], 'excellent')
+        self.assertEqual(provider.calls, 2)
+        self.assertIn("$ is missing 'overall_quality'.", self.prompts[1])
+        self.assertIn('Tighten the wording', self.prompts[1])  # The previous answer is quoted back
+
+    def test_valid_answer_needs_no_repair(self):
+        provider = self.register(llm_output('trailing_comma.txt'))
+        complete_structured('Review this resume.', FEEDBACK_SCHEMA, 'test', 'model')
+        self.assertEqual(provider.calls, 1)
+
+    def test_unrepairable_answer_raises(self):
+        self.register(llm_output('no_json.txt'))
+        with self.assertRaises(LLMOutputError) as raised:
+            complete_structured('Review this resume.', FEEDBACK_SCHEMA, 'test', 'model')
+        self.assertEqual(raised.exception.raw_response, llm_output('no_json.txt'))
+
+    def test_async_repair_of_streamed_answer(self):
+        provider = self.register(llm_output('escaped.txt'))
+        value = asyncio.run(arepair_structured(llm_output('truncated.txt'), FEEDBACK_SCHEMA, 'test', 'model'))
+        self.assertEqual(value['chance_get_selected'], '50')
+        self.assertEqual(provider.calls, 1)
+
+
+class AuthError(Exception):
+    status_code = 401
+
+
+class GatewayRetryTests(SimpleTestCase):
+    def gateway(self, provider, **options):
+        gateway = LLMGateway(**{'max_concurrency': 1, 'timeout': 5, 'max_retries': 2, 'backoff': 0.01, **options})
+        gateway.register('test', provider)
+        return gateway
+
+    def test_transient_failures_are_retried(self):
+        gateway = self.gateway(FakeProvider(response='ok', failures=2))
+        self.assertEqual(gateway.complete('prompt', 'test', 'model'), 'ok')
+        self.assertEqual(gateway.stats['retries'], 2)
+
+    def test_client_errors_are_not_retried(self):
+        provider = FakeProvider()
+        provider.complete = mock.AsyncMock(side_effect=AuthError('bad key'))
+        gateway = self.gateway(provider)
+        with self.assertRaises(LLMError):
+            gateway.complete('prompt', 'test', 'model')
+        self.assertEqual(provider.complete.await_count, 1)
+        self.assertEqual(gateway.stats['retries'], 0)
+
+    def test_deadline_covers_retries(self):
+        # Three slow failing attempts would take 0.6s; the call gets 0.3s in total
+        gateway = self.gateway(FakeProvider(delay=0.2, failures=3), timeout=0.3)
+        started = time.monotonic()
+        with self.assertRaises(LLMTimeoutError):
+            gateway.complete('prompt', 'test', 'model')
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_backoff_releases_the_concurrency_slot(self):
+        # With one slot, a call backing off must not hold up another call
+        gateway = self.gateway(FakeProvider(failures=1, handler=lambda prompt, model: prompt), backoff=0.5)
+
+        async def calls():
+            first = asyncio.ensure_future(gateway.acomplete('first', 'test', 'model'))
+            await asyncio.sleep(0.1)  # The first call failed and is backing off
+            started = time.monotonic()
+            self.assertEqual(await gateway.acomplete('second', 'test', 'model'), 'second')
+            self.assertLess(time.monotonic() - started, 0.3)
+            return await first
+
+        self.assertEqual(asyncio.run(calls()), 'first')
+
+
+@override_settings(LLM_FEEDBACK_PROVIDER='test', LLM_REPAIR_ATTEMPTS=1)
+class ResumeAnalysisStreamTests(TestCase):
+    analysis = {"contact_info": {"emails": ["jane@example.com"], "phones": []}}
+
+    def setUp(self):
+        self.cache = MemoryAnalysisCache()
+        patches = [
+            mock.patch('checker.views.get_analysis_cache', return_value=self.cache),
+            mock.patch('checker.views.analyze_content', return_value=("resume text", self.analysis, None)),
+            mock.patch('checker.views.score_resume', return_value={"formatting": 5}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.provider = FakeProvider(response=llm_output('fenced.txt'), chunk_size=8)
+        get_llm_gateway().register('test', self.provider)
+
+    def stream(self, content=b'%PDF-1.4 resume'):
+        async def collect():
+            data = {'resume': SimpleUploadedFile('resume.pdf', content)} if content is not None else {'other': 'x'}
+            response = await self.async_client.post(reverse('resume-analysis-stream'), data)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            return b''.join([chunk async for chunk in response.streaming_content]).decode()
+        text = asyncio.run(collect())
+        return [
+            (event.split('\n')[0].removeprefix('event: '), json.loads(event.split('\n')[1].removeprefix('data: ')))
+            for event in text.strip().split('\n\n')
+        ]
+
+    def names(self, events):
+        return [name for name, _ in events]
+
+    def test_event_order(self):
+        events = self.stream()
+        names = self.names(events)
+        self.assertEqual(names[:2], ['analysis', 'scores'])
+        self.assertEqual(names[-2:], ['feedback', 'done'])
+        self.assertEqual(set(names[2:-2]), {'feedback_chunk'})
+        text = ''.join(data['text'] for name, data in events if name == 'feedback_chunk')
+        self.assertEqual(text, llm_output('fenced.txt'))
+        self.assertEqual(len(self.cache), 1)
+
+    def test_cached_result_is_replayed(self):
+        first = self.stream()
+        second = self.stream()
+        self.assertEqual(self.provider.calls, 1)
+        self.assertEqual(self.names(second), ['analysis', 'scores', 'feedback', 'done'])
+        self.assertEqual(second[2], first[-2])
+
+    def test_rejected_resume(self):
+        rejection = {"message": "Resume Quality is Poor.", "analysis": self.analysis, "scores": None, "feedback": None}
+        with mock.patch('checker.views.analyze_content', return_value=("resume text", self.analysis, rejection)):
+            events = self.stream()
+            self.assertEqual(events, [('analysis', self.analysis), ('error', {'error': 'Resume Quality is Poor.'})])
+            # Rejections are cached too, and replayed the same way
+            self.assertEqual(self.stream(), events)
+        self.assertEqual(self.provider.calls, 0)
+
+    def test_llm_failure_ends_with_an_error_event(self):
+        get_llm_gateway().register('test', FakeProvider(failures=100))
+        events = self.stream()
+        self.assertEqual(self.names(events), ['analysis', 'scores', 'error'])
+        self.assertEqual(len(self.cache), 0)
+
+    def test_missing_file(self):
+        self.assertEqual(self.stream(content=None), [('error', {'error': 'No file uploaded.'})])
+
+
+class AnalysisCacheTests(TestCase):
+    content = b'%PDF-1.4 resume'
+
+    def test_key(self):
+        key = analysis_cache_key(self.content)
+        self.assertEqual(analysis_cache_key(digest=hashlib.sha256(self.content).hexdigest()), key)
+        self.assertNotEqual(analysis_cache_key(b'%PDF-1.4 other resume'), key)
+        # A new analyzer or prompt version does not reuse results of the old one
+        with mock.patch('checker.cache.ANALYZER_VERSION', 'next'):
+            self.assertNotEqual(analysis_cache_key(self.content), key)
+        with mock.patch('checker.cache.PROMPT_VERSION', 'next'):
+            self.assertNotEqual(analysis_cache_key(self.content), key)
+
+    def check_backend(self, cache):
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', {"body": {"message": "ok"}, "status": 200})
+        self.assertEqual(cache.get('a'), {"body": {"message": "ok"}, "status": 200})
+        self.assertEqual(cache.stats.as_dict()["hits"], 1)
+        self.assertEqual(cache.stats.as_dict()["misses"], 1)
+        self.assertEqual(cache.stats.as_dict()["hit_rate"], 0.5)
+        cache.delete('a')
+        self.assertIsNone(cache.get('a'))
+
+    def test_backends(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for cache in (MemoryAnalysisCache(), FileAnalysisCache(path=directory.name), DatabaseAnalysisCache()):
+            with self.subTest(backend=type(cache).__name__):
+                self.check_backend(cache)
+
+    def test_memory_eviction_and_expiry(self):
+        cache = MemoryAnalysisCache(ttl=60, max_entries=2)
+        cache.set('a', {})
+        cache.set('b', {})
+        cache.get('a')
+        cache.set('c', {})  # Evicts 'b', the least recently used
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+        self.assertEqual(cache.stats.evictions, 1)
+        with mock.patch('checker.cache.time.time', return_value=time.time() + 61):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 1)
+
+    def test_view_hit_and_miss(self):
+        cache = MemoryAnalysisCache()
+        body = {"message": "Resume analyzed successfully.", "feedback": {"summary": "Good"}}
+        with mock.patch('checker.views.get_analysis_cache', return_value=cache), \
+                mock.patch('checker.views.ResumeAnalysisView.analyze', return_value=(body, 200)) as analyze:
+            responses = [
+                self.client.post(reverse('resume-analysis'), {'resume': SimpleUploadedFile('resume.pdf', content)})
+                for content in (self.content, self.content, b'%PDF-1.4 other resume')
+            ]
+        self.assertEqual([response['X-Analysis-Cache'] for response in responses], ['MISS', 'HIT', 'MISS'])
+        self.assertEqual(responses[1].json(), body)
+        self.assertEqual(analyze.call_count, 2)
+
+    def test_failed_feedback_is_not_cached(self):
+        cache = MemoryAnalysisCache()
+        body = {"message": "Resume analyzed successfully.", "feedback": {"error": "Invalid JSON"}}
+        with mock.patch('checker.views.get_analysis_cache', return_value=cache), \
+                mock.patch('checker.views.ResumeAnalysisView.analyze', return_value=(body, 200)):
+            self.client.post(reverse('resume-analysis'), {'resume': SimpleUploadedFile('resume.pdf', self.content)})
+        self.assertEqual(len(cache), 0)
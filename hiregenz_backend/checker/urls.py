@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import ResumeAnalysisView
+from .views import ResumeAnalysisView, ResumeAnalysisStreamView, AnalysisCacheStatsView
 
 urlpatterns = [
     path('', ResumeAnalysisView.as_view(), name='resume-analysis'),
+    path('stream/', ResumeAnalysisStreamView.as_view(), name='resume-analysis-stream'),
+    path('cache-stats/', AnalysisCacheStatsView.as_view(), name='resume-analysis-cache-stats'),
 ]
@@ -1,12 +1,14 @@
-import spacy
 import re
+from spacy.lang.en.stop_words import STOP_WORDS
 from textstat import flesch_reading_ease
+from helpers.instrumentation import span
+from helpers.model_registry import get_nlp
 
-# Load the spaCy model
-nlp = spacy.load("en_core_web_sm")
+# Bump when the analysis/scoring output changes, so cached results are recomputed
+ANALYZER_VERSION = "1"
 
-# List of stopwords from spaCy
-stop_words = nlp.Defaults.stop_words
+# List of stopwords from spaCy (available without loading a pipeline)
+stop_words = STOP_WORDS
 
 
 def analyze_resume(content):
@@ -114,15 +116,20 @@ def calculate_formatting(content):
     return min(total_score, 10)  # Cap the score at 10 for simplicity
 
 
+@span("score_resume")
 def score_resume(content):
     """
     Score the resume based on formatting, readability, and content quality.
     """
-    # Use spaCy to process the content
-    doc = nlp(content)
+    # Only tokens are needed, so use the tokenizer-only pipeline
+    doc = get_nlp()(content)
+    return score_tokens(content, [token.text for token in doc])
 
-    # Tokenize text (spaCy's tokenization)
-    tokens = [token.text for token in doc]
+
+def score_tokens(content, tokens):
+    """
+    Compute the resume scores from its text and spaCy tokens.
+    """
     num_words = len(tokens)
 
     # Calculate readability using textstat
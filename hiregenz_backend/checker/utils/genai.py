@@ -1,16 +1,30 @@
-import google.generativeai as genai
 from django.conf import settings
-import json
+from helpers.instrumentation import span
+from helpers.llm import get_llm_gateway
+from helpers.structured import LLMOutputError, complete_structured, arepair_structured
 
-# Configure the Google Generative AI API key
-genai.configure(api_key=settings.GOOGLE_API_KEY)
+# Bump when the prompt changes, so cached feedback is regenerated
+PROMPT_VERSION = f"{settings.LLM_FEEDBACK_PROVIDER}:{settings.LLM_FEEDBACK_MODEL}:1"
 
 
-def generate_feedback(content):
+# Shape of the feedback object; answers are validated (and repaired) against it
+FEEDBACK_SCHEMA = {
+    "type": "object",
+    "required": ["short_summary", "action_points", "overall_quality", "chance_get_selected"],
+    "properties": {
+        "short_summary": {"type": "string"},
+        "action_points": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "overall_quality": {"type": "string"},
+        "chance_get_selected": {"type": "string"},
+    },
+}
+
+
+def feedback_prompt(content):
     """
-    Use Google Generative AI to generate resume improvement suggestions in JSON format.
+    Prompt asking the LLM for resume improvement suggestions in JSON format.
     """
-    prompt = f"""
+    return f"""
     Analyze the resume content provided below and give feedback in the following JSON format:
 
     {{
@@ -28,28 +42,48 @@ def generate_feedback(content):
     {content}
     """
 
-    # Initialize the generative model
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    
-    # Generate the response
-    response = model.generate_content(prompt)
 
+@span("generate_feedback")
+def generate_feedback(content):
+    """
+    Use the configured LLM (Gemini by default) to generate resume improvement suggestions in JSON format.
+    """
+    try:
+        return complete_structured(
+            feedback_prompt(content), FEEDBACK_SCHEMA, settings.LLM_FEEDBACK_PROVIDER, settings.LLM_FEEDBACK_MODEL
+        )
+    except LLMOutputError as e:
+        return feedback_error(e)
+
+
+async def astream_feedback(content):
+    """
+    Yield the raw feedback text as the LLM generates it; parse the joined text with `aparse_feedback`.
+    """
+    async for chunk in get_llm_gateway().astream(
+        feedback_prompt(content), settings.LLM_FEEDBACK_PROVIDER, settings.LLM_FEEDBACK_MODEL
+    ):
+        yield chunk
+
+
+async def aparse_feedback(response_text):
+    """
+    Parse streamed feedback, asking the LLM to repair it if it does not match FEEDBACK_SCHEMA.
+    """
     try:
-        # Remove code block markers and clean up the response
-        cleaned_response = (
-            response.text.replace("```json", "")
-            .replace("```", "")
-            .strip()
+        return await arepair_structured(
+            response_text, FEEDBACK_SCHEMA, settings.LLM_FEEDBACK_PROVIDER, settings.LLM_FEEDBACK_MODEL
         )
-        
-        # Parse the cleaned response into JSON
-        feedback_json = json.loads(cleaned_response)
-    except json.JSONDecodeError as e:
-        # Handle invalid JSON format and return detailed error info
-        feedback_json = {
-            "error": "Invalid JSON format in the response",
-            "raw_response": response.text,
-            "exception": str(e)
-        }
-    
-    return feedback_json
+    except LLMOutputError as e:
+        return feedback_error(e)
+
+
+def feedback_error(error):
+    """
+    Error details returned in place of feedback that could not be parsed.
+    """
+    return {
+        "error": "Invalid JSON format in the response",
+        "raw_response": error.raw_response,
+        "exception": str(error)
+    }
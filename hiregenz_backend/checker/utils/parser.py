@@ -1,5 +1,4 @@
-from pdfminer.high_level import extract_text
-from io import BytesIO
+from helpers.pdf import PDFExtractionError, extract_pdf_text
 
 
 def parse_resume(file):
@@ -7,12 +6,7 @@ def parse_resume(file):
     Extract text content from a PDF resume file.
     """
     try:
-        # Convert the InMemoryUploadedFile to a file-like object (BytesIO)
-        file_content = BytesIO(file.read())
-        
-        # Extract text from the PDF content
-        content = extract_text(file_content)
-        
-        return content
-    except Exception as e:
+        # Streams from the upload's temporary file when there is one
+        return extract_pdf_text(file)
+    except PDFExtractionError as e:
         raise ValueError(f"Error extracting text from resume: {str(e)}")
@@ -1,11 +1,22 @@
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
+from helpers.llm import LLMError
+from helpers.permission import IsRecruiter
+from helpers.uploads import spool_uploads
+from .cache import analysis_cache_key, get_analysis_cache
 from .utils.parser import parse_resume
 from .utils.analyzer import analyze_resume, score_resume
-from .utils.genai import generate_feedback
+from .utils.genai import generate_feedback, astream_feedback, aparse_feedback
 from .models import ContactInfo
-import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,50 +26,199 @@ class ResumeAnalysisView(APIView):
     parser_classes = [MultiPartParser]
 
     def post(self, request, *args, **kwargs):
+        spool_uploads(request)  # Hashed while spooled to disk; never held in memory
         resume_file = request.FILES.get('resume')
         if not resume_file:
             return Response({"error": "No file uploaded."}, status=400)
 
+        # Identical uploads (same bytes, same analyzer/prompt) reuse the stored result
+        cache = get_analysis_cache()
+        cache_key = analysis_cache_key(digest=resume_file.sha256)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            response = Response(cached["body"], status=cached["status"])
+            response["X-Analysis-Cache"] = "HIT"
+            return response
+
         try:
-            # Parse resume
-            content = parse_resume(resume_file)
-
-            # Analyze and score
-            analysis = analyze_resume(content)
-            contact_info = analysis.get("contact_info", {})
-            emails = contact_info.get("emails", [])
-            phones = contact_info.get("phones", [])
-
-            if not emails:
-                # If no email is found, do not generate feedback
-                return Response({
-                    "message": "Resume Quality is Poor. Email information is required for analysis.",
-                    "analysis": analysis,
-                    "scores": None,
-                    "feedback": None,
-                }, status=400)
-
-            # Save contact information if both email and phone are present
-            if emails and phones:
-                try:
-                    ContactInfo.objects.create(
-                        email=emails[0],
-                        phone=phones[0],
-                        social_links=contact_info.get("social_links", [])
-                    )
-                except Exception as e:
-                    # Log the exception and continue
-                    logger.warning(f"Failed to save contact info: {e}")
-
-            # Generate feedback only if email exists
-            scores = score_resume(content)
-            feedback = generate_feedback(content)
-
-            return Response({
-                "message": "Resume analyzed successfully.",
-                "analysis": analysis,
-                "scores": scores,
-                "feedback": feedback,
-            })
+            body, status = self.analyze(resume_file)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
+
+        # Feedback the LLM failed to format is not cached, so the next upload retries it
+        feedback = body.get("feedback")
+        if not (isinstance(feedback, dict) and "error" in feedback):
+            cache.set(cache_key, {"body": body, "status": status})
+        response = Response(body, status=status)
+        response["X-Analysis-Cache"] = "MISS"
+        return response
+
+    def analyze(self, resume_file):
+        """
+        Parse, analyze, score and get feedback for a resume; returns (response body, status).
+        """
+        content, analysis, rejection = analyze_content(resume_file)
+        if rejection:
+            return rejection, 400
+
+        # Generate feedback only if email exists
+        scores = score_resume(content)
+        feedback = generate_feedback(content)
+
+        return {
+            "message": "Resume analyzed successfully.",
+            "analysis": analysis,
+            "scores": scores,
+            "feedback": feedback,
+        }, 200
+
+
+def analyze_content(resume_file):
+    """
+    Parse and analyze a resume; returns (text, analysis, rejection body or None).
+    Resumes without an email are rejected before scoring and feedback.
+    """
+    # Parse resume
+    content = parse_resume(resume_file)
+
+    # Analyze and score
+    analysis = analyze_resume(content)
+    contact_info = analysis.get("contact_info", {})
+    emails = contact_info.get("emails", [])
+    phones = contact_info.get("phones", [])
+
+    if not emails:
+        # If no email is found, do not generate feedback
+        return content, analysis, {
+            "message": "Resume Quality is Poor. Email information is required for analysis.",
+            "analysis": analysis,
+            "scores": None,
+            "feedback": None,
+        }
+
+    # Save contact information if both email and phone are present
+    if emails and phones:
+        try:
+            ContactInfo.objects.create(
+                email=emails[0],
+                phone=phones[0],
+                social_links=contact_info.get("social_links", [])
+            )
+        except Exception as e:
+            # Log the exception and continue
+            logger.warning(f"Failed to save contact info: {e}")
+
+    return content, analysis, None
+
+
+def sse_event(event, data):
+    """
+    Format one server-sent event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ResumeAnalysisStreamView(View):
+    """
+    Streaming variant of ResumeAnalysisView, as server-sent events.
+
+    Events: `analysis` and `scores` as soon as they are computed, then
+    `feedback_chunk` ({"text": ...}) while the LLM writes, the parsed
+    `feedback`, and finally `done` (or `error`). Serve the project through
+    asgi.py (e.g. uvicorn) so the stream does not hold a worker thread.
+
+    The multipart body is parsed inside the stream, on a worker thread, so the
+    response starts right away; a request without a `resume` file gets an
+    `error` event.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        if not request.content_type.startswith("multipart/"):
+            return JsonResponse({"error": "No file uploaded."}, status=400)
+        spool_uploads(request)
+
+        response = StreamingHttpResponse(self.events(request), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Keep nginx from buffering the stream
+        return response
+
+    async def events(self, request):
+        resume_file = await sync_to_async(request.FILES.get)('resume')
+        if not resume_file:
+            yield sse_event("error", {"error": "No file uploaded."})
+            return
+
+        cache = get_analysis_cache()
+        cache_key = analysis_cache_key(digest=resume_file.sha256)
+        cached = await sync_to_async(cache.get)(cache_key)
+        if cached is not None:
+            for event in self.cached_events(cached):
+                yield event
+            return
+
+        try:
+            content, analysis, rejection = await sync_to_async(analyze_content)(resume_file)
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+            return
+
+        yield sse_event("analysis", analysis)
+        if rejection:
+            await sync_to_async(cache.set)(cache_key, {"body": rejection, "status": 400})
+            yield sse_event("error", {"error": rejection["message"]})
+            return
+
+        scores = await sync_to_async(score_resume)(content)
+        yield sse_event("scores", scores)
+
+        chunks = []
+        try:
+            async for chunk in astream_feedback(content):
+                chunks.append(chunk)
+                yield sse_event("feedback_chunk", {"text": chunk})
+            # Repairing an invalid answer is another LLM call, which can time out or fail too
+            feedback = await aparse_feedback("".join(chunks))
+        except LLMError as e:
+            yield sse_event("error", {"error": str(e)})
+            return
+
+        yield sse_event("feedback", feedback)
+
+        body = {
+            "message": "Resume analyzed successfully.",
+            "analysis": analysis,
+            "scores": scores,
+            "feedback": feedback,
+        }
+        # Same entry as the non-streaming view, so either endpoint can reuse it
+        if "error" not in feedback:
+            await sync_to_async(cache.set)(cache_key, {"body": body, "status": 200})
+        yield sse_event("done", {"message": body["message"]})
+
+    def cached_events(self, cached):
+        body = cached["body"]
+        yield sse_event("analysis", body["analysis"])
+        if cached["status"] != 200:
+            yield sse_event("error", {"error": body["message"]})
+            return
+        yield sse_event("scores", body["scores"])
+        yield sse_event("feedback", body["feedback"])
+        yield sse_event("done", {"message": body["message"]})
+
+
+class AnalysisCacheStatsView(APIView):
+    """
+    Hit/miss counters of the resume analysis cache in this process.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not IsRecruiter().has_permission(request, self):
+            return Response({"detail": "You do not have permission to perform this action."}, status=403)
+
+        cache = get_analysis_cache()
+        return Response({
+            "backend": settings.ANALYSIS_CACHE_BACKEND,
+            "entries": len(cache),
+            **cache.stats.as_dict(),
+        })
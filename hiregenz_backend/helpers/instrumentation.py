@@ -0,0 +1,364 @@
+import cProfile
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Spans open in the current context (outermost first), and the timings of the current request
+_open_spans = ContextVar("open_spans", default=())
+_request_timings = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """
+    Latency histogram of one series (per-bucket counts; made cumulative on export).
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # The last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class Registry:
+    """
+    Span and request metrics of this process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.collectors = []
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.spans = defaultdict(Histogram)  # span name -> latencies
+            self.span_queries = defaultdict(int)
+            self.span_errors = defaultdict(int)
+            self.requests = defaultdict(Histogram)  # (route, method, status) -> latencies
+            self.request_queries = defaultdict(int)
+
+    def record_span(self, name, seconds, queries, failed):
+        with self.lock:
+            self.spans[name].observe(seconds)
+            self.span_queries[name] += queries
+            if failed:
+                self.span_errors[name] += 1
+
+    def record_request(self, labels, seconds, queries):
+        with self.lock:
+            self.requests[labels].observe(seconds)
+            self.request_queries[labels] += queries
+
+
+registry = Registry()
+
+
+def register_collector(collector):
+    """
+    Add metrics kept elsewhere (outbox, caches, ...) to the /metrics output.
+    `collector()` returns (name, type, help, [(labels dict, value), ...]) tuples.
+    """
+    registry.collectors.append(collector)
+
+
+class RequestTimings:
+    """
+    Time spent in each span and in SQL during one request, for the Server-Timing header.
+    """
+
+    def __init__(self):
+        self.spans = {}  # name -> [seconds, calls]
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def add(self, name, seconds):
+        entry = self.spans.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def header(self, total_seconds):
+        entries = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"']
+        for name, (seconds, calls) in self.spans.items():
+            entry = f"{re.sub(r'[^A-Za-z0-9_-]', '_', name)};dur={seconds * 1000:.1f}"
+            entries.append(entry + (f';desc="{calls} calls"' if calls > 1 else ""))
+        entries.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class Span:
+    """
+    Time a block of code (`with span("name"):`) or every call of a function
+    (`@span("name")`): its latency goes to the span histogram, with the number of
+    SQL queries it ran, and to the Server-Timing header of the current request.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        if not settings.INSTRUMENTATION_ENABLED:
+            return self
+        install_query_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.token = _open_spans.set(_open_spans.get() + (self,))
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.started is None:
+            return False
+        elapsed = time.perf_counter() - self.started
+        _open_spans.reset(self.token)
+        registry.record_span(self.name, elapsed, self.queries, exc_type is not None)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(self.name, elapsed)
+        return False
+
+    def __call__(self, func):
+        # A new Span per call, so decorated functions can run concurrently and recursively
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(self.name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def span(name):
+    """A Span, used as a context manager or a decorator."""
+    return Span(name)
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query and its time to the open spans and request.
+    """
+    open_spans = _open_spans.get()
+    if not open_spans:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for open_span in open_spans:
+            open_span.queries += 1
+            open_span.db_seconds += elapsed
+
+
+def add_query_counter(connection, **kwargs):
+    # First in the list, so `execute_wrapper()` blocks opened earlier still remove their own wrapper
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+def install_query_counter():
+    """Count queries on this thread's connections; new connections get the counter when they open."""
+    for connection in connections.all():
+        add_query_counter(connection)
+
+
+connection_created.connect(add_query_counter)
+
+
+_profile_lock = threading.Lock()
+
+
+def start_profiler():
+    """
+    A running cProfile profiler for a PROFILE_SAMPLE_RATE share of requests
+    (one at a time per process), or None.
+    """
+    if not settings.PROFILE_SAMPLE_RATE or random.random() >= settings.PROFILE_SAMPLE_RATE:
+        return None
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def save_profile(profiler, request, route, elapsed):
+    profiler.disable()
+    try:
+        directory = Path(settings.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        path = directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{slug}-{elapsed * 1000:.0f}ms.prof"
+        profiler.dump_stats(path)
+        logger.info(f"Profile of {request.method} {request.path} written to {path}")
+    except OSError as e:
+        logger.warning(f"Could not write the request profile: {e}")
+    finally:
+        _profile_lock.release()
+
+
+class InstrumentationMiddleware:
+    """
+    Time every request: latency and query count per route go to the request
+    histograms, and with SERVER_TIMING the response gets a Server-Timing header
+    listing the SQL time and each span. A sample of requests (PROFILE_SAMPLE_RATE)
+    is run under cProfile, dumped to PROFILE_DIR (synchronous requests only).
+
+    Streaming responses are timed until their headers are ready, not until the last chunk.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.INSTRUMENTATION_ENABLED:
+            return self.get_response(request)
+
+        timings, tokens = self.start()
+        profiler = start_profiler()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stop(tokens)
+            if profiler is not None:
+                save_profile(profiler, request, self.route(request), elapsed)
+        return self.finish(request, response, timings, elapsed)
+
+    async def __acall__(self, request):
+        if not settings.INSTRUMENTATION_ENABLED:
+            return await self.get_response(request)
+
+        timings, tokens = self.start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stop(tokens)
+        return self.finish(request, response, timings, elapsed)
+
+    def start(self):
+        install_query_counter()
+        timings = RequestTimings()
+        # The request counts queries like a span, without being reported as one
+        return timings, (_request_timings.set(timings), _open_spans.set((timings,)))
+
+    def stop(self, tokens):
+        _request_timings.reset(tokens[0])
+        _open_spans.reset(tokens[1])
+
+    def route(self, request):
+        match = getattr(request, "resolver_match", None)
+        return match.route if match is not None else "unmatched"
+
+    def finish(self, request, response, timings, elapsed):
+        labels = (self.route(request), request.method, str(response.status_code))
+        registry.record_request(labels, elapsed, timings.queries)
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = timings.header(elapsed)
+        return response
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + "}" if labels else ""
+
+
+def histogram_lines(name, series):
+    lines = []
+    for labels, histogram in series:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram.buckets):
+            cumulative += count
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+    return lines
+
+
+def render_metrics():
+    """
+    This process's metrics in the Prometheus text exposition format.
+    """
+    with registry.lock:
+        spans = [({"span": name}, histogram) for name, histogram in sorted(registry.spans.items())]
+        span_queries = [({"span": name}, count) for name, count in sorted(registry.span_queries.items())]
+        span_errors = [({"span": name}, count) for name, count in sorted(registry.span_errors.items())]
+        request_labels = sorted(registry.requests)
+        requests = [
+            (dict(zip(("route", "method", "status"), labels)), registry.requests[labels]) for labels in request_labels
+        ]
+        request_queries = [
+            (dict(zip(("route", "method", "status"), labels)), registry.request_queries[labels])
+            for labels in request_labels
+        ]
+
+    lines = [
+        "# HELP hiregenz_span_seconds Time spent in instrumented code paths.",
+        "# TYPE hiregenz_span_seconds histogram",
+        *histogram_lines("hiregenz_span_seconds", spans),
+        "# HELP hiregenz_http_request_seconds Request latency by route.",
+        "# TYPE hiregenz_http_request_seconds histogram",
+        *histogram_lines("hiregenz_http_request_seconds", requests),
+    ]
+    metrics = [
+        ("hiregenz_span_db_queries_total", "counter", "SQL queries run inside each span.", span_queries),
+        ("hiregenz_span_errors_total", "counter", "Spans that raised an exception.", span_errors),
+        ("hiregenz_http_db_queries_total", "counter", "SQL queries run by requests, by route.", request_queries),
+    ]
+    for collector in registry.collectors:
+        try:
+            metrics.extend(collector())
+        except Exception as e:
+            logger.warning(f"Metrics collector {collector.__name__} failed: {e}")
+
+    for name, kind, help_text, samples in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Requires `Authorization: Bearer <METRICS_TOKEN>`;
+    without a token configured it only answers when DEBUG is on.
+    """
+    if settings.METRICS_TOKEN:
+        if request.headers.get("Authorization") != f"Bearer {settings.METRICS_TOKEN}":
+            return HttpResponse("Invalid metrics token.\n", status=401, content_type="text/plain")
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,364 @@
+import asyncio
+import hashlib
+import logging
+import random
+import threading
+from django.conf import settings
+from .instrumentation import register_collector
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """
+    An LLM call failed after all retries.
+    """
+
+
+class LLMTimeoutError(LLMError):
+    """
+    An LLM call did not finish before its deadline.
+    """
+
+
+class GeminiProvider:
+    """
+    Google Generative AI adapter. Model objects are created once per model name and reused.
+    """
+    name = "gemini"
+
+    def __init__(self):
+        import google.generativeai as genai
+
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        self.genai = genai
+        self.models = {}
+
+    def _model(self, model):
+        if model not in self.models:
+            self.models[model] = self.genai.GenerativeModel(model)
+        return self.models[model]
+
+    async def complete(self, prompt, model, timeout, json_mode=False):
+        generation_config = {"response_mime_type": "application/json"} if json_mode else None
+        response = await self._model(model).generate_content_async(
+            prompt, generation_config=generation_config, request_options={"timeout": timeout}
+        )
+        return response.text
+
+    async def stream(self, prompt, model, timeout):
+        response = await self._model(model).generate_content_async(
+            prompt, stream=True, request_options={"timeout": timeout}
+        )
+        async for chunk in response:
+            yield chunk.text
+
+
+class OpenAIProvider:
+    """
+    OpenAI chat completions adapter, using one shared async client (connection pool).
+    Falls back to `ChatCompletion.acreate` with the pre-1.0 SDK.
+    """
+    name = "openai"
+
+    def __init__(self):
+        import openai
+
+        self.openai = openai
+        self.client = None
+        if hasattr(openai, "AsyncOpenAI"):
+            # Retries are handled by the gateway
+            self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        else:
+            openai.api_key = settings.OPENAI_API_KEY
+
+    async def complete(self, prompt, model, timeout, json_mode=False):
+        messages = [{"role": "system", "content": prompt}]
+        options = {"response_format": {"type": "json_object"}} if json_mode else {}
+        if self.client is not None:
+            response = await self.client.chat.completions.create(
+                model=model, messages=messages, timeout=timeout, **options
+            )
+            return response.choices[0].message.content
+        response = await self.openai.ChatCompletion.acreate(
+            model=model, messages=messages, request_timeout=timeout, **options
+        )
+        return response["choices"][0]["message"]["content"]
+
+    async def stream(self, prompt, model, timeout):
+        messages = [{"role": "system", "content": prompt}]
+        if self.client is not None:
+            response = await self.client.chat.completions.create(
+                model=model, messages=messages, timeout=timeout, stream=True
+            )
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            return
+        response = await self.openai.ChatCompletion.acreate(
+            model=model, messages=messages, request_timeout=timeout, stream=True
+        )
+        async for chunk in response:
+            content = chunk["choices"][0]["delta"].get("content")
+            if content:
+                yield content
+
+
+class FakeProvider:
+    """
+    Offline provider for development and tests.
+
+    Answers with `handler(prompt, model)` if given, otherwise with a fixed
+    `response`, after `delay` seconds. The first `failures` calls raise, to
+    exercise retries. `calls` counts the requests that reached the provider.
+    `stream` yields the same answer in `chunk_size` character pieces.
+    """
+    name = "fake"
+
+    def __init__(self, response="{}", handler=None, delay=0.0, failures=0, chunk_size=16):
+        self.response = response
+        self.handler = handler
+        self.delay = delay
+        self.failures = failures
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    async def complete(self, prompt, model, timeout, json_mode=False):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise ConnectionError("Fake provider failure.")
+        if self.handler is not None:
+            return self.handler(prompt, model)
+        return self.response
+
+    async def stream(self, prompt, model, timeout):
+        text = await self.complete(prompt, model, timeout)
+        for start in range(0, len(text), self.chunk_size):
+            yield text[start:start + self.chunk_size]
+            await asyncio.sleep(0)
+
+
+# Provider errors worth another attempt: network failures, timeouts, rate limits and 5xx
+RETRYABLE_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",  # openai
+    "ServiceUnavailable", "ResourceExhausted", "DeadlineExceeded", "TooManyRequests",  # google.api_core
+}
+
+
+def is_retryable(error):
+    """
+    Whether a failed provider call may succeed if tried again (auth and other
+    4xx errors will not).
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)  # openai / google.api_core
+    if isinstance(status, int):
+        return status in (408, 429) or status >= 500
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "openai": OpenAIProvider,
+    "fake": FakeProvider,
+}
+
+
+class LLMGateway:
+    """
+    Runs every LLM call of the process on one background event loop.
+
+    Owning the loop lets provider clients keep their connections between
+    calls, bounds the number of concurrent calls (LLM_MAX_CONCURRENCY) across
+    all request threads, and coalesces identical in-flight prompts: the second
+    caller waits for the first call instead of paying for it again. Each call
+    has one deadline (LLM_TIMEOUT), retries included. Attempts that failed on
+    a timeout, rate limit or server error are retried with exponential backoff
+    (LLM_MAX_RETRIES, LLM_RETRY_BACKOFF) while time is left; other errors
+    (auth, bad request) fail at once.
+
+    Sync code calls `complete`, async code awaits `acomplete`. `astream`
+    yields the completion as it is generated; streamed calls share the
+    concurrency limit but are neither coalesced nor retried, and the deadline
+    applies to the wait for each chunk.
+    """
+
+    def __init__(self, max_concurrency=None, timeout=None, max_retries=None, backoff=None):
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.timeout = timeout or settings.LLM_TIMEOUT
+        self.max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.LLM_RETRY_BACKOFF if backoff is None else backoff
+        self.providers = {}
+        self.in_flight = {}
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0}
+        self.loop = None
+        self.semaphore = None  # Created on the gateway loop
+        self.lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name="llm-gateway", daemon=True).start()
+        return self.loop
+
+    def register(self, name, provider):
+        """
+        Use `provider` for `name` (e.g. a FakeProvider in tests).
+        """
+        self.providers[name] = provider
+
+    def get_provider(self, name):
+        if name not in self.providers:
+            if name not in PROVIDERS:
+                raise LLMError(f"Unknown LLM provider '{name}'.")
+            self.providers[name] = PROVIDERS[name]()
+        return self.providers[name]
+
+    def _submit(self, prompt, provider, model, timeout, json_mode):
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._coalesced(prompt, provider, model, timeout, json_mode), loop)
+
+    def complete(self, prompt, provider, model, timeout=None, json_mode=False):
+        """
+        Return the completion of `prompt`, blocking the calling thread.
+        `json_mode` asks providers that support it to answer with JSON only.
+        """
+        return self._submit(prompt, provider, model, timeout, json_mode).result()
+
+    async def acomplete(self, prompt, provider, model, timeout=None, json_mode=False):
+        """
+        Return the completion of `prompt` without blocking the caller's event loop.
+        """
+        return await asyncio.wrap_future(self._submit(prompt, provider, model, timeout, json_mode))
+
+    async def _coalesced(self, prompt, provider, model, timeout, json_mode):
+        key = (provider, model, json_mode, hashlib.sha256(prompt.encode()).hexdigest())
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(prompt, provider, model, timeout, json_mode))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def astream(self, prompt, provider, model, timeout=None):
+        """
+        Yield the completion of `prompt` in chunks, as the provider produces them.
+        """
+        caller_loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        finished = object()
+
+        async def produce():
+            # Runs on the gateway loop and hands chunks over to the caller's loop
+            try:
+                async for chunk in self._stream(prompt, provider, model, timeout):
+                    caller_loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                caller_loop.call_soon_threadsafe(chunks.put_nowait, finished)
+            except Exception as e:
+                caller_loop.call_soon_threadsafe(chunks.put_nowait, e)
+
+        future = asyncio.run_coroutine_threadsafe(produce(), self._ensure_loop())
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is finished:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            # Stop generating if the caller went away (e.g. the client disconnected)
+            future.cancel()
+
+    def _semaphore(self):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.semaphore
+
+    async def _stream(self, prompt, provider_name, model, timeout):
+        provider = self.get_provider(provider_name)
+        timeout = timeout or self.timeout
+
+        async with self._semaphore():
+            self.stats["calls"] += 1
+            chunks = provider.stream(prompt, model, timeout).__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self.stats["failures"] += 1
+                    raise LLMTimeoutError(f"{provider_name} stream stalled for {timeout}s.")
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    raise LLMError(f"{provider_name} stream failed: {e}")
+                yield chunk
+
+    async def _call(self, prompt, provider_name, model, timeout, json_mode):
+        provider = self.get_provider(provider_name)
+        timeout = timeout or self.timeout
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            # One deadline for the whole call, retries and backoff included
+            async with asyncio.timeout_at(deadline):
+                for attempt in range(self.max_retries + 1):
+                    # The concurrency slot is held for the attempt only, not while backing off
+                    async with self._semaphore():
+                        self.stats["calls"] += 1
+                        try:
+                            return await provider.complete(prompt, model, deadline - loop.time(), json_mode)
+                        except Exception as e:
+                            error = e
+                    delay = self.backoff * 2 ** attempt * (1 + random.random())
+                    if attempt == self.max_retries or not is_retryable(error) or loop.time() + delay >= deadline:
+                        break
+                    self.stats["retries"] += 1
+                    logger.warning(f"{provider_name} call failed: {error} Retrying in {delay:.1f}s.")
+                    await asyncio.sleep(delay)
+        except TimeoutError:
+            self.stats["failures"] += 1
+            raise LLMTimeoutError(f"{provider_name} call did not finish within {timeout}s.")
+
+        self.stats["failures"] += 1
+        if isinstance(error, TimeoutError):
+            raise LLMTimeoutError(f"{provider_name} call timed out: {error}") from error
+        raise LLMError(f"{provider_name} call failed: {error}") from error
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway():
+    """
+    Process-wide LLM gateway.
+    """
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+
+def gateway_samples():
+    """LLM gateway counters, for the Prometheus endpoint (nothing until the gateway is used)."""
+    if _gateway is None:
+        return []
+    return [
+        ("hiregenz_llm_requests_total", "counter", "LLM gateway calls, coalesced requests, retries and failures.",
+         [({"event": event}, count) for event, count in _gateway.stats.items()]),
+    ]
+
+
+register_collector(gateway_samples)
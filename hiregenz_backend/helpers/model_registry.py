@@ -0,0 +1,68 @@
+import threading
+from django.conf import settings
+
+# Loaded models, keyed by name; each is created once per process on first use
+_models = {}
+_lock = threading.Lock()
+
+
+def load_once(key, loader):
+    """
+    Return the model registered under `key`, calling `loader()` the first time it is needed.
+    """
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = loader()
+                _models[key] = model
+    return model
+
+
+def get_embedding_model():
+    """
+    The SentenceTransformer used for candidate/job matching, configured through
+    EMBEDDING_MODEL_NAME, EMBEDDING_MODEL_DEVICE and EMBEDDING_MODEL_THREADS.
+    """
+    def loader():
+        # Imported lazily so processes that never embed text skip loading torch
+        from sentence_transformers import SentenceTransformer
+
+        if settings.EMBEDDING_MODEL_THREADS:
+            import torch
+            torch.set_num_threads(settings.EMBEDDING_MODEL_THREADS)
+        return SentenceTransformer(settings.EMBEDDING_MODEL_NAME, device=settings.EMBEDDING_MODEL_DEVICE)
+
+    return load_once(("embedding", settings.EMBEDDING_MODEL_NAME), loader)
+
+
+# Trained components of the stock spaCy English pipelines
+SPACY_COMPONENTS = ("tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer", "ner")
+
+
+def get_nlp(components=()):
+    """
+    The SPACY_MODEL_NAME pipeline with only `components` loaded.
+
+    The default is the tokenizer alone, which is all resume scoring needs;
+    skipping the tagger/parser/NER weights makes loading and every call much
+    cheaper. Each distinct set of components is loaded once per process.
+    """
+    components = tuple(sorted(components))
+
+    def loader():
+        import spacy
+
+        exclude = [name for name in SPACY_COMPONENTS if name not in components]
+        return spacy.load(settings.SPACY_MODEL_NAME, exclude=exclude)
+
+    return load_once(("spacy", settings.SPACY_MODEL_NAME, components), loader)
+
+
+def warm_up():
+    """
+    Load the configured models and run one encode so the first request is not slowed down.
+    """
+    get_embedding_model().encode(["warm up"])
+    get_nlp()("warm up")
@@ -0,0 +1,79 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from .instrumentation import span
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination for list endpoints.
+
+    Each page is fetched with `WHERE <ordering field> past the cursor LIMIT n`
+    instead of OFFSET, and no COUNT(*) is run, so every page costs the same no
+    matter how large the table or how deep the client has paged.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = '-id'  # Newest first
+
+    def paginate_queryset(self, queryset, request, view=None):
+        with span("paginate"):
+            return super().paginate_queryset(queryset, request, view)
+
+
+PAGINATION_PARAMS = ('cursor', 'page_size', 'fields')
+
+
+def wants_pages(request):
+    """
+    Whether a list request opted into the paginated response (`{next, previous,
+    results}`) by passing `?cursor=`, `?page_size=` or `?fields=`. Without them,
+    list endpoints that predate pagination keep their original response: a plain
+    array of every row.
+    """
+    return any(param in request.query_params for param in PAGINATION_PARAMS)
+
+
+def requested_fields(request, available, default=None):
+    """
+    The fields asked for with `?fields=a,b` (sparse fieldset), in `available` order.
+    Without the parameter, returns `default` (all `available` fields if None).
+    Raises ValidationError for unknown fields.
+    """
+    param = request.query_params.get('fields')
+    if not param:
+        return list(default if default is not None else available)
+
+    names = {name.strip() for name in param.split(',') if name.strip()}
+    unknown = names - set(available)
+    if unknown:
+        raise ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}."})
+    return [name for name in available if name in names]
+
+
+def only_columns(queryset, fields):
+    """
+    Restrict the SELECT of `queryset` to the columns behind the serializer `fields`
+    (plus the primary key), so unrequested large columns are not read.
+    """
+    model_fields = {field.name: field for field in queryset.model._meta.concrete_fields}
+    columns = {queryset.model._meta.pk.name}
+    for name in fields:
+        if name in model_fields:
+            columns.add(name)
+        elif name.endswith('_id') and name[:-3] in model_fields:
+            columns.add(name[:-3])  # e.g. recruiter_id -> recruiter
+    return queryset.only(*columns)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin: pass `fields=[...]` to serialize only those fields.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -0,0 +1,217 @@
+import logging
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+from io import BytesIO, StringIO
+from pathlib import Path
+from django.conf import settings
+from .instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Layout analysis settings for resumes. Text inside figures is skipped and
+# vertical text is not detected, which saves most of pdfminer's time on
+# image-heavy PDFs; `boxes_flow` (reading order of text boxes) is
+# PDF_BOXES_FLOW, None skips that analysis entirely.
+LAPARAMS = {
+    "line_margin": 0.5,
+    "char_margin": 2.0,
+    "word_margin": 0.1,
+    "detect_vertical": False,
+    "all_texts": False,
+}
+
+
+class PDFExtractionError(ValueError):
+    """
+    The PDF could not be read, or is over the size, page or time limits.
+    """
+
+
+def laparams():
+    """Layout parameters of the extractor, as plain keyword arguments (picklable)."""
+    return {**LAPARAMS, "boxes_flow": settings.PDF_BOXES_FLOW}
+
+
+def pdf_source(file):
+    """
+    A path for `file` when it is on disk (temporary uploads, spooled files, paths),
+    so the PDF is streamed from disk instead of copied into memory; otherwise
+    the file object itself, rewound.
+    """
+    if isinstance(file, (str, Path)):
+        return str(file)
+    if hasattr(file, "temporary_file_path"):
+        return file.temporary_file_path()
+    name = getattr(file, "name", None)
+    if isinstance(name, str) and hasattr(file, "fileno") and os.path.isfile(name):
+        return name
+    inner = getattr(file, "file", None)  # InMemoryUploadedFile wraps a BytesIO
+    source = inner if inner is not None and hasattr(inner, "seek") else file
+    source.seek(0)
+    return source
+
+
+def source_size(source):
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    position = source.tell()
+    size = source.seek(0, os.SEEK_END)
+    source.seek(position)
+    return size
+
+
+def open_source(source):
+    """
+    A binary file object for a path, bytes or file object source. Files are
+    memory-mapped: pdfminer's many small seeks and reads become memory
+    accesses, and pool workers share the same page cache.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                return BytesIO()
+            return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    if isinstance(source, bytes):
+        return BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def count_pages(source):
+    """Number of pages declared by the PDF's page tree."""
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    fp = open_source(source)
+    try:
+        document = PDFDocument(PDFParser(fp))
+        pages = resolve1(document.catalog.get("Pages"))
+        count = resolve1(pages.get("Count")) if isinstance(pages, dict) else None
+        if isinstance(count, int):
+            return count
+        return sum(1 for _ in PDFPage.create_pages(document))
+    finally:
+        if fp is not source:
+            fp.close()
+
+
+def extract_pages(source, page_numbers, max_pages, params, deadline):
+    """
+    Text of the selected pages (all if `page_numbers` is None, at most `max_pages`).
+    The deadline (a time.time() value) is checked before each page, not while
+    a page is processed. Runs in pool workers too, so it only uses pdfminer
+    and its arguments.
+    """
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    output = StringIO()
+    resources = PDFResourceManager(caching=True)
+    device = TextConverter(resources, output, laparams=LAParams(**params))
+    interpreter = PDFPageInterpreter(resources, device)
+    fp = open_source(source)
+    try:
+        for page in PDFPage.get_pages(fp, page_numbers, maxpages=max_pages or 0, caching=True):
+            if deadline and time.time() > deadline:
+                raise PDFExtractionError("PDF text extraction timed out.")
+            interpreter.process_page(page)
+    finally:
+        device.close()
+        if fp is not source:
+            fp.close()
+    return output.getvalue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Process pool for page-parallel extraction (PDF_WORKERS processes), created on first use.
+    Spawned rather than forked, since the web process runs other threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context("spawn")
+            _pool = context.Pool(settings.PDF_WORKERS, maxtasksperchild=100)
+        return _pool
+
+
+def reset_pool():
+    """Kill the pool (e.g. a worker is stuck on a hostile PDF); the next call starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool = None
+
+
+def extract_parallel(source, pages, params, deadline, timeout):
+    """
+    Extract `pages` pages on the pool, split into contiguous ranges (one per
+    worker) for documents of PDF_PARALLEL_MIN_PAGES pages or more. Workers
+    still running at the deadline are killed, so the timeout holds even within a page.
+    """
+    if not isinstance(source, str):
+        source = open_source(source).read()  # In-memory uploads are small; workers get the bytes
+    workers = min(settings.PDF_WORKERS, pages) if pages >= settings.PDF_PARALLEL_MIN_PAGES else 1
+    bounds = [round(pages * index / workers) for index in range(workers + 1)]
+    chunks = [list(range(start, end)) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+    result = get_pool().starmap_async(
+        extract_pages, [(source, chunk, None, params, deadline) for chunk in chunks]
+    )
+    try:
+        return "".join(result.get(timeout))
+    except multiprocessing.TimeoutError:
+        reset_pool()
+        raise PDFExtractionError(f"PDF text extraction timed out after {timeout}s.")
+
+
+@span("extract_text")
+def extract_pdf_text(file, max_pages=None, max_bytes=None, timeout=None, parallel=None):
+    """
+    Extract the text of a PDF (upload, file object or path).
+
+    Files over `max_bytes` (PDF_MAX_BYTES) are rejected and only the first
+    `max_pages` (PDF_MAX_PAGES) pages are read. Raises PDFExtractionError.
+
+    With the PDF_WORKERS process pool (unless `parallel` is False, e.g. when
+    already running in a worker process) every document is extracted on the
+    pool, long ones (PDF_PARALLEL_MIN_PAGES) split across workers, and a
+    document still running after `timeout` (PDF_TIMEOUT) seconds is stopped.
+    Without the pool the timeout is only checked between pages: a single
+    pathological page can run past it.
+    """
+    max_pages = max_pages or settings.PDF_MAX_PAGES
+    max_bytes = max_bytes or settings.PDF_MAX_BYTES
+    timeout = timeout or settings.PDF_TIMEOUT
+    if parallel is None:
+        parallel = settings.PDF_WORKERS > 0
+
+    try:
+        source = pdf_source(file)
+        size = source_size(source)
+        if size > max_bytes:
+            raise PDFExtractionError(f"PDF is too large ({size} bytes, limit {max_bytes}).")
+
+        deadline = time.time() + timeout
+        params = laparams()
+        if parallel:
+            pages = min(count_pages(source), max_pages)
+            # Short documents go to the pool too: only a worker process can be stopped mid-page
+            return extract_parallel(source, pages, params, deadline, timeout) if pages else ""
+        return extract_pages(source, None, max_pages, params, deadline)
+    except PDFExtractionError:
+        raise
+    except Exception as e:
+        raise PDFExtractionError(f"Could not read the PDF: {e}")
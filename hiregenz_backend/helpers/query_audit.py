@@ -0,0 +1,88 @@
+import re
+from django.db import connection
+from django.utils.timezone import now
+
+# Lines of an EXPLAIN output that read a whole table, per database vendor
+SEQUENTIAL_SCAN = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    "sqlite": re.compile(r"\bSCAN (\w+)$", re.MULTILINE),  # "SCAN t USING INDEX i" is an index lookup
+    "mysql": re.compile(r"Table scan on (\w+)"),
+}
+
+
+def audited_queries():
+    """
+    The hot-path querysets whose plans are checked, as (name, queryset) pairs.
+    Lookup values are placeholders; plans do not depend on them.
+    """
+    from applications.models import Application
+    from checker.models import AnalysisCacheEntry
+    from jobs.models import JobPost
+    from matching.models import Match
+    from notifications.models import EmailDelivery
+    from tests.models import BankQuestion, QuestionSet, Test
+    from users.models import Candidate, Recruiter, ResumeIngestionJob
+
+    return [
+        ("candidate by email", Candidate.objects.filter(email="audit@example.com")),
+        ("recruiter by email", Recruiter.objects.filter(email="audit@example.com")),
+        ("tests of a recruiter", Test.objects.filter(recruiter_id=1, is_completed=True)),
+        ("test ranking of a job", Test.objects.filter(job_post_id=1, is_completed=True).order_by("-score")[:50]),
+        ("test by token", Test.objects.filter(test_token="00000000-0000-0000-0000-000000000000")),
+        ("active job posts", JobPost.objects.filter(is_active=True).order_by("-created_at")[:20]),
+        ("job posts page", JobPost.objects.filter(id__lt=1000).order_by("-id")[:20]),
+        ("shortlisted applications", Application.objects.filter(job_post_id=1, is_shortlisted=True)),
+        ("applications page", Application.objects.filter(id__lt=1000).order_by("-id")[:20]),
+        ("match ranking of a job", Match.objects.filter(job_post_id=1).order_by("-match_score")[:20]),
+        ("due outbox emails", EmailDelivery.objects.filter(status="pending", next_attempt_at__lte=now())),
+        ("stale ingestion jobs", ResumeIngestionJob.objects.filter(status="running", updated_at__lt=now())),
+        ("analysis cache lookup", AnalysisCacheEntry.objects.filter(key="audit")),
+        ("expired analysis cache", AnalysisCacheEntry.objects.filter(expires_at__lt=now())),
+        ("banked questions of a skill", BankQuestion.objects.filter(skill="Python", model_name="audit")
+         .order_by("times_used", "id")[:5]),
+        ("question set by description", QuestionSet.objects.filter(
+            model_name="audit", skills_key="audit", description_hash="audit")),
+        ("question sets of a skill set", QuestionSet.objects.filter(model_name="audit", skills_key="audit")),
+    ]
+
+
+def explain(queryset):
+    """The database's query plan of `queryset`, as text."""
+    if connection.vendor == "mysql":
+        return queryset.explain(format="tree")
+    return queryset.explain()
+
+
+def table_rows(table):
+    """
+    Row count of `table`; the planner's estimate on PostgreSQL, where COUNT(*) is itself a scan.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            row = cursor.fetchone()
+            return max(row[0], 0) if row else 0
+        cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+        return cursor.fetchone()[0]
+
+
+def sequential_scans(plan):
+    """Tables read in full according to `plan`."""
+    pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+    return sorted(set(pattern.findall(plan))) if pattern else []
+
+
+def audit_query_plans(min_rows):
+    """
+    EXPLAIN every audited query. Returns (name, plan, problems) triples, where
+    `problems` lists the tables with at least `min_rows` rows that are scanned sequentially.
+    """
+    results = []
+    for name, queryset in audited_queries():
+        plan = explain(queryset)
+        problems = [
+            (table, rows) for table in sequential_scans(plan)
+            if (rows := table_rows(table)) >= min_rows
+        ]
+        results.append((name, plan, problems))
+    return results
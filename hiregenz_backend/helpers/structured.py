@@ -0,0 +1,280 @@
+import ast
+import json
+import re
+from django.conf import settings
+from .llm import LLMError, get_llm_gateway
+
+# Python-style literals some models emit instead of JSON
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+CODE_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+class LLMOutputError(LLMError):
+    """
+    The LLM answer could not be parsed into a value matching the schema, even after repair.
+    """
+
+    def __init__(self, message, raw_response=None, errors=None):
+        super().__init__(message)
+        self.raw_response = raw_response
+        self.errors = errors or []
+
+
+def extract_json_text(text):
+    """
+    The first JSON object/array in `text`, without code fences or surrounding prose.
+    A value cut off before its end (e.g. output token limit) is returned as is.
+    """
+    fenced = CODE_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+
+    start = min((position for position in (text.find("{"), text.find("[")) if position >= 0), default=-1)
+    if start < 0:
+        return text.strip()
+
+    depth, in_string, escaped, quote = 0, False, False, None
+    for position in range(start, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                in_string = False
+        elif char in "\"'":
+            in_string, quote = True, char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:position + 1]
+    return text[start:]
+
+
+def clean_json_text(text):
+    """
+    Remove what JSON does not allow but models often write: // and /* */ comments,
+    trailing commas and Python literals (outside strings).
+    """
+    out, position, in_string, escaped = [], 0, False, False
+    while position < len(text):
+        char = text[position]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            position += 1
+        elif char == '"':
+            in_string = True
+            out.append(char)
+            position += 1
+        elif text.startswith("//", position):
+            end = text.find("\n", position)
+            position = len(text) if end < 0 else end
+        elif text.startswith("/*", position):
+            end = text.find("*/", position + 2)
+            position = len(text) if end < 0 else end + 2
+        else:
+            word = re.match(r"[A-Za-z_]+", text[position:])
+            if word:
+                out.append(PYTHON_LITERALS.get(word.group(0), word.group(0)))
+                position += len(word.group(0))
+            else:
+                out.append(char)
+                position += 1
+    return re.sub(r",(\s*[}\]])", r"\1", "".join(out))
+
+
+def close_truncated_json(text):
+    """
+    Close the strings, arrays and objects left open by a truncated answer, so the
+    complete part of it can still be parsed.
+    """
+    stack, in_string, escaped = [], False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    # Drop a dangling key (`"a":` or a bare `"a"` after `{`/`,`) and separator before closing
+    text = re.sub(r'(?<=[{,])\s*"[^"]*"\s*:?\s*$', "", text.rstrip())
+    text = re.sub(r',\s*$', "", text)
+    return text + "".join(reversed(stack))
+
+
+def parse_json(text):
+    """
+    Parse the JSON value in an LLM answer, tolerating fences, prose, comments,
+    trailing commas, Python literals/quotes and truncation. Raises ValueError.
+    """
+    candidate = extract_json_text(text)
+    for attempt in (
+        lambda: json.loads(candidate),
+        lambda: json.loads(clean_json_text(candidate)),
+        lambda: ast.literal_eval(candidate),  # Python repr (single quotes); safe, unlike eval
+        lambda: json.loads(close_truncated_json(clean_json_text(candidate))),
+    ):
+        try:
+            return attempt()
+        except (ValueError, SyntaxError, RecursionError):
+            continue
+    raise ValueError("No valid JSON found in the response.")
+
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def validate(value, schema, path="$"):
+    """
+    Check `value` against a JSON-schema subset (type, properties, required,
+    items, minItems, maxItems, enum); returns a list of error messages.
+    """
+    expected = schema.get("type")
+    if expected and not isinstance(value, JSON_TYPES[expected]) or (
+        expected in ("integer", "number") and isinstance(value, bool)
+    ):
+        return [f"{path} should be of type {expected}, got {type(value).__name__}."]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path} should be one of {schema['enum']}.")
+    if expected == "object":
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path} is missing '{key}'.")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate(value[key], subschema, f"{path}.{key}"))
+    if expected == "array":
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path} should have at least {schema['minItems']} items.")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path} should have at most {schema['maxItems']} items.")
+        if "items" in schema:
+            for position, item in enumerate(value):
+                errors.extend(validate(item, schema["items"], f"{path}[{position}]"))
+    return errors
+
+
+def coerce(value, schema):
+    """
+    Fix common shape slips without another call: an array wrapped in a
+    one-key object ({"questions": [...]}), numbers sent as strings and the reverse.
+    """
+    expected = schema.get("type")
+    if expected == "array" and isinstance(value, dict) and len(value) == 1:
+        inner = next(iter(value.values()))
+        if isinstance(inner, list):
+            value = inner
+    if expected == "array" and isinstance(value, list) and "items" in schema:
+        return [coerce(item, schema["items"]) for item in value]
+    if expected == "object" and isinstance(value, dict):
+        properties = schema.get("properties", {})
+        return {key: coerce(item, properties[key]) if key in properties else item for key, item in value.items()}
+    if expected in ("integer", "number") and isinstance(value, str):
+        match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*%?\s*", value)
+        if match:
+            number = float(match.group(1))
+            return int(number) if expected == "integer" and number.is_integer() else number
+    if expected == "string" and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def parse_structured(text, schema, check=None):
+    """
+    Parse and validate an LLM answer; returns (value, errors). `check(value)`
+    may return extra, domain-specific error messages.
+    """
+    try:
+        value = coerce(parse_json(text), schema)
+    except ValueError as e:
+        return None, [str(e)]
+    errors = validate(value, schema)
+    if not errors and check:
+        errors = check(value)
+    return value, errors
+
+
+def repair_prompt(response_text, errors, schema):
+    """
+    Follow-up prompt asking the model to fix only what was wrong with its answer.
+    """
+    problems = "\n".join(f"- {error}" for error in errors[:10])
+    return (
+        "Your previous answer could not be used because:\n"
+        f"{problems}\n\n"
+        "Previous answer:\n"
+        f"{response_text[:8000]}\n\n"
+        "Return the corrected answer as JSON only, with no code fences or comments, "
+        f"matching this JSON schema:\n{json.dumps(schema)}"
+    )
+
+
+def complete_structured(prompt, schema, provider, model, check=None, repair_attempts=None):
+    """
+    Ask the LLM for JSON matching `schema` (in the provider's JSON mode when it
+    has one), repairing the answer with targeted follow-up prompts if needed.
+    Returns the parsed value; raises LLMOutputError if it never validates.
+    """
+    gateway = get_llm_gateway()
+    attempts = settings.LLM_REPAIR_ATTEMPTS if repair_attempts is None else repair_attempts
+    json_mode = schema.get("type") == "object"
+
+    response_text = gateway.complete(prompt, provider, model, json_mode=json_mode)
+    value, errors = parse_structured(response_text, schema, check)
+    for _ in range(attempts):
+        if not errors:
+            break
+        response_text = gateway.complete(repair_prompt(response_text, errors, schema), provider, model, json_mode=json_mode)
+        value, errors = parse_structured(response_text, schema, check)
+    if errors:
+        raise LLMOutputError("Invalid structured output: " + " ".join(errors), response_text, errors)
+    return value
+
+
+async def arepair_structured(response_text, schema, provider, model, check=None, repair_attempts=None):
+    """
+    Async: parse an answer that was already received (e.g. streamed), repairing it if needed.
+    """
+    gateway = get_llm_gateway()
+    attempts = settings.LLM_REPAIR_ATTEMPTS if repair_attempts is None else repair_attempts
+    json_mode = schema.get("type") == "object"
+
+    value, errors = parse_structured(response_text, schema, check)
+    for _ in range(attempts):
+        if not errors:
+            break
+        response_text = await gateway.acomplete(
+            repair_prompt(response_text, errors, schema), provider, model, json_mode=json_mode
+        )
+        value, errors = parse_structured(response_text, schema, check)
+    if errors:
+        raise LLMOutputError("Invalid structured output: " + " ".join(errors), response_text, errors)
+    return value
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class SpooledUpload(UploadedFile):
+    """
+    An upload written to disk in a single pass, with the SHA-256 of its content.
+    The file is deleted when closed (at the end of the request) unless `detach`ed.
+    """
+
+    def __init__(self, file, name, content_type, size, charset, content_type_extra, sha256):
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = sha256
+        self.detached = False
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def detach(self):
+        """Keep the spooled file after the request; returns its path."""
+        self.detached = True
+        self.file.close()
+        return self.file.name
+
+    def close(self):
+        try:
+            self.file.close()
+        finally:
+            if not self.detached:
+                try:
+                    os.remove(self.file.name)
+                except FileNotFoundError:
+                    pass
+
+
+class HashingFileUploadHandler(FileUploadHandler):
+    """
+    Stream each uploaded file straight to a file in `directory`, hashing it on
+    the way, so no upload is buffered in memory (only one chunk at a time) or
+    read a second time to compute its hash.
+    """
+
+    def __init__(self, request=None, directory=None):
+        super().__init__(request)
+        self.directory = directory
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        directory = self.directory or settings.FILE_UPLOAD_TEMP_DIR or tempfile.gettempdir()
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=directory, suffix=".upload", delete=False)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write(raw_data)
+        self.hasher.update(raw_data)
+        return None  # Consumed; no other handler needs the chunk
+
+    def file_complete(self, file_size):
+        self.file.flush()
+        self.file.seek(0)
+        return SpooledUpload(
+            self.file, self.file_name, self.content_type, file_size, self.charset,
+            self.content_type_extra, self.hasher.hexdigest(),
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
+            os.remove(self.file.name)
+
+
+def spool_uploads(request, directory=None):
+    """
+    Make `request` (Django or DRF) spool its uploads with HashingFileUploadHandler.
+    Must be called before the request body is parsed.
+    """
+    request = getattr(request, "_request", request)
+    request.upload_handlers = [HashingFileUploadHandler(request, directory)]
+
+
+def spool_file(uploaded_file, directory):
+    """
+    Copy any uploaded file to a new file in `directory` chunk by chunk, hashing
+    it on the way. Returns (path, sha256). Spooled uploads are adopted as is.
+    """
+    if isinstance(uploaded_file, SpooledUpload):
+        return uploaded_file.detach(), uploaded_file.sha256
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    hasher = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".upload", delete=False) as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+            hasher.update(chunk)
+    return destination.name, hasher.hexdigest()
@@ -0,0 +1,36 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections
+
+# Thread pools shared by the whole process, keyed by name
+_executors = {}
+_lock = threading.Lock()
+
+
+def get_executor(name, max_workers):
+    """
+    Return the process-wide thread pool registered under `name`, creating it on first use.
+    """
+    executor = _executors.get(name)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                _executors[name] = executor
+    return executor
+
+
+def run_in_background(name, max_workers, func, *args, **kwargs):
+    """
+    Run `func` on the named pool. Database connections opened by the worker
+    thread are closed afterwards, as Django does at the end of a request.
+    """
+    def task():
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return get_executor(name, max_workers).submit(task)
@@ -13,4 +13,6 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hiregenz_backend.settings')
 
+# Serve through this module (e.g. `uvicorn hiregenz_backend.asgi:application`) so
+# streaming endpoints such as /api/analyze/stream/ do not tie up a worker thread
 application = get_asgi_application()
@@ -54,9 +54,11 @@ INSTALLED_APPS = [
     'tests',
     'matching',
     'checker',
+    'notifications',
 ]
 
 MIDDLEWARE = [
+    'helpers.instrumentation.InstrumentationMiddleware',  # First, so it times the whole request
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,9 +78,22 @@ AWS_SECRET_ACCESS_KEY = config("AWS_SECRET_ACCESS_KEY")
 AWS_STORAGE_BUCKET_NAME = config("AWS_STORAGE_BUCKET_NAME")
 AWS_S3_REGION_NAME = config("AWS_S3_REGION_NAME")
 AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com'
+AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL', default=None)  # S3-compatible server (e.g. MinIO)
 
-# Storage settings
-DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+# Storage settings (DEFAULT_FILE_STORAGE is no longer read since Django 5.1)
+STORAGES = {
+    'default': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Where uploaded resumes are stored (users/storage.py): 's3', 'default' (Django's
+# default storage) or 'local' to write them to RESUME_LOCAL_STORAGE_DIR (tests/offline)
+RESUME_STORAGE_BACKEND = config('RESUME_STORAGE_BACKEND', default='s3')
+RESUME_LOCAL_STORAGE_DIR = BASE_DIR / 'data' / 'storage'
+RESUME_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Multipart part size (S3 minimum is 5 MB)
+RESUME_UPLOAD_CONCURRENCY = 4  # Parts of one multipart upload sent in parallel
+RESUME_STORAGE_MAX_CONNECTIONS = 20  # Pooled connections of the shared S3 client
+RESUME_STORAGE_WORKERS = config('RESUME_STORAGE_WORKERS', default=8, cast=int)  # Threads of upload_resume_async
 
 # Optional: S3 Bucket URL for static files
 AWS_LOCATION = 'media'
@@ -115,6 +130,93 @@ DATABASES = {
 }
 
 
+# Candidate matching
+# Sentence embedding model, loaded once per process on first use (see helpers/model_registry.py)
+EMBEDDING_MODEL_NAME = config('EMBEDDING_MODEL_NAME', default='bert-base-nli-mean-tokens')  # e.g. all-MiniLM-L6-v2
+EMBEDDING_MODEL_DEVICE = config('EMBEDDING_MODEL_DEVICE', default='cpu')
+EMBEDDING_MODEL_THREADS = config('EMBEDDING_MODEL_THREADS', default=0, cast=int)  # 0 = torch default
+# Load the model when the app starts (useful with `gunicorn --preload` so forked workers share it)
+EMBEDDING_MODEL_WARMUP = config('EMBEDDING_MODEL_WARMUP', default=False, cast=bool)
+
+# Approximate nearest-neighbour index over pooled candidate skill embeddings
+MATCHING_INDEX_DIR = BASE_DIR / 'data' / 'matching_index'
+MATCHING_ANN_TOP_K = 500  # Candidates pulled from the index before full re-ranking
+MATCHING_ANN_NPROBE = 8  # Inverted lists searched per query
+MATCHING_ANN_LISTS = None  # Inverted lists built by `build_candidate_index` (None = sqrt(candidates))
+MATCH_PREFILTER = True  # Skip candidates whose salary, location or experience can never fit the job
+MATCH_EXPERIENCE_TOLERANCE = 1.0  # Years below the required experience a candidate may still have
+# Background rescoring (matching.scores.submit_job_refresh / submit_candidate_refresh) and index updates
+MATCH_REFRESH_WORKERS = config('MATCH_REFRESH_WORKERS', default=2, cast=int)
+MATCH_REFRESH_SYNC = config('MATCH_REFRESH_SYNC', default=False, cast=bool)  # Run them inside the request (tests)
+
+
+# spaCy pipeline used for resume scoring, loaded once per process with only the
+# components a caller asks for (see helpers/model_registry.get_nlp)
+SPACY_MODEL_NAME = config('SPACY_MODEL_NAME', default='en_core_web_sm')
+
+
+# LLM calls go through helpers/llm.py (one background event loop per process)
+# Providers: 'gemini', 'openai' or 'fake' (offline, canned responses)
+LLM_FEEDBACK_PROVIDER = config('LLM_FEEDBACK_PROVIDER', default='gemini')
+LLM_FEEDBACK_MODEL = config('LLM_FEEDBACK_MODEL', default='gemini-1.5-pro')
+LLM_MCQ_PROVIDER = config('LLM_MCQ_PROVIDER', default='openai')
+LLM_MCQ_MODEL = config('LLM_MCQ_MODEL', default='gpt-4o')
+LLM_TIMEOUT = config('LLM_TIMEOUT', default=60, cast=int)  # Seconds per call, retries and backoff included
+LLM_MAX_RETRIES = config('LLM_MAX_RETRIES', default=2, cast=int)
+LLM_RETRY_BACKOFF = 1.0  # Seconds before the first retry, doubled after each attempt
+LLM_MAX_CONCURRENCY = config('LLM_MAX_CONCURRENCY', default=8, cast=int)  # In-flight calls per process
+LLM_REPAIR_ATTEMPTS = 1  # Follow-up prompts sent when an answer is not valid JSON for its schema (helpers/structured.py)
+
+
+# Test question bank (tests/question_bank.py)
+MCQ_QUESTIONS_PER_TEST = 5
+MCQ_REUSE_SIMILARITY = 0.92  # Job descriptions at least this similar share their question set
+MCQ_DUPLICATE_SIMILARITY = 0.95  # New questions this close to a banked one (same skill) are not stored
+
+# Test ranking (tests.views.RankStudentsByJobView)
+TEST_RANKING_PAGE_SIZE = 50
+TEST_RANKING_MAX_PAGE_SIZE = 500
+
+
+# Resume analysis cache (checker app): results keyed by the SHA-256 of the PDF
+# and the analyzer/prompt versions, so re-uploads skip parsing and the LLM call
+ANALYSIS_CACHE_BACKEND = config('ANALYSIS_CACHE_BACKEND', default='memory')  # memory, file, db or none
+ANALYSIS_CACHE_TTL = config('ANALYSIS_CACHE_TTL', default=7 * 24 * 3600, cast=int)  # Seconds; 0 = never expire
+ANALYSIS_CACHE_MAX_ENTRIES = config('ANALYSIS_CACHE_MAX_ENTRIES', default=1000, cast=int)
+ANALYSIS_CACHE_DIR = BASE_DIR / 'data' / 'analysis_cache'  # Used by the 'file' backend
+
+
+# Resume ingestion
+# Uploads are spooled to disk and processed by a local worker pool; see users/ingestion.py
+RESUME_SPOOL_DIR = BASE_DIR / 'data' / 'resume_spool'
+
+# PDF text extraction (helpers/pdf.py)
+PDF_MAX_BYTES = config('PDF_MAX_BYTES', default=10 * 1024 * 1024, cast=int)  # Larger files are rejected
+PDF_MAX_PAGES = config('PDF_MAX_PAGES', default=20, cast=int)  # Only the first pages are read
+PDF_TIMEOUT = config('PDF_TIMEOUT', default=30, cast=float)  # Seconds per document (between pages without PDF_WORKERS)
+PDF_WORKERS = config('PDF_WORKERS', default=0, cast=int)  # Page-parallel process pool, 0 = extract in the caller
+PDF_PARALLEL_MIN_PAGES = 4  # Shorter documents are not split across the pool
+PDF_BOXES_FLOW = 0.5  # pdfminer reading-order analysis; None skips it (faster, plain top-to-bottom order)
+RESUME_INGESTION_WORKERS = config('RESUME_INGESTION_WORKERS', default=2, cast=int)
+RESUME_INGESTION_SYNC = config('RESUME_INGESTION_SYNC', default=False, cast=bool)  # Process inside the request (tests)
+
+# Resume deduplication (users/dedup.py)
+# Re-uploads of a candidate's stored PDF (same SHA-256) skip parsing, storage and embedding.
+# Near-duplicates under other emails are found with MinHash + LSH and listed as ResumeDuplicate.
+RESUME_MINHASH_PERMUTATIONS = 128  # Signature length; changing it requires re-running fingerprint_resumes
+RESUME_MINHASH_BANDS = 16  # LSH bands of PERMUTATIONS / BANDS rows; more bands catch less similar pairs
+RESUME_DUPLICATE_SIMILARITY = config('RESUME_DUPLICATE_SIMILARITY', default=0.8, cast=float)  # Estimated Jaccard
+
+
+# Instrumentation (helpers/instrumentation.py)
+# Span and request latency histograms and query counts, scraped in Prometheus format from /metrics/
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=True, cast=bool)
+SERVER_TIMING = config('SERVER_TIMING', default=DEBUG, cast=bool)  # Per-span timings in the Server-Timing header
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # Bearer token of /metrics/; empty = only served with DEBUG
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.0, cast=float)  # Share of requests run under cProfile
+PROFILE_DIR = BASE_DIR / 'data' / 'profiles'  # One .prof file per profiled request (open with pstats/snakeviz)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -139,6 +241,13 @@ REST_FRAMEWORK = {
     ),
 }
 
+# List endpoints (helpers/pagination.py)
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# audit_query_plans: sequential scans of tables with at least this many rows fail the audit
+QUERY_AUDIT_MIN_ROWS = config('QUERY_AUDIT_MIN_ROWS', default=1000, cast=int)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -186,7 +295,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 # Email Backend
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Use "django.core.mail.backends.filebased.EmailBackend" to write mails to EMAIL_FILE_PATH instead (tests/offline)
+EMAIL_BACKEND = config('EMAIL_BACKEND', default="django.core.mail.backends.smtp.EmailBackend")
+EMAIL_FILE_PATH = BASE_DIR / 'data' / 'emails'
+
+# Emails are recorded in the outbox (notifications.EmailDelivery) and sent by a background pool
+EMAIL_OUTBOX_WORKERS = config('EMAIL_OUTBOX_WORKERS', default=2, cast=int)
+EMAIL_OUTBOX_SYNC = config('EMAIL_OUTBOX_SYNC', default=False, cast=bool)  # Send inside the request (tests)
+EMAIL_OUTBOX_BATCH_SIZE = 100  # Emails sent per SMTP connection
+EMAIL_OUTBOX_RATE_LIMIT = config('EMAIL_OUTBOX_RATE_LIMIT', default=10.0, cast=float)  # Emails/second per process, 0 = no limit
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BACKOFF = 30  # Seconds before the first retry, doubled after each failure
 
 
 # Email Server Configuration
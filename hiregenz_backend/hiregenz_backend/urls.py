@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
+from helpers.instrumentation import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -9,4 +10,6 @@ urlpatterns = [
     path('api/tests/', include('tests.urls')),  # Include tests app URLs
     path('api/matching/', include('matching.urls')),  # Include matching app URLs
     path('api/analyze/', include('checker.urls')),
+    path('api/notifications/', include('notifications.urls')),
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus scrape endpoint
 ]
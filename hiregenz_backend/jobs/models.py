@@ -20,6 +20,13 @@ class JobPost(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     mcqs = models.JSONField(null=True, blank=True)  # Field to store generated MCQs
-    
+    matches_computed_at = models.DateTimeField(null=True, blank=True)  # Last full match refresh, even with no matches
+
+    class Meta:
+        indexes = [
+            # Newest active job posts; partial, closed jobs are not indexed
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True), name='jobpost_active_recent_idx'),
+        ]
+
     def __str__(self):
         return self.title
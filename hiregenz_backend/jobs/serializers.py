@@ -1,13 +1,14 @@
 from rest_framework import serializers
+from helpers.pagination import SparseFieldsMixin
 from .models import JobPost
 
 
-class JobPostSerializer(serializers.ModelSerializer):
-    recruiter_id = serializers.IntegerField(source='recruiter.id', read_only=True)  # Add recruiter_id as read-only
+class JobPostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    recruiter_id = serializers.IntegerField(read_only=True)  # Add recruiter_id as read-only (no recruiter query)
 
     class Meta:
         model = JobPost
-        exclude = ['recruiter']  # Exclude recruiter from input
+        exclude = ['recruiter', 'matches_computed_at']  # Exclude recruiter from input; the refresh marker is internal
 
     def create(self, validated_data):
         # Get the recruiter from the request context
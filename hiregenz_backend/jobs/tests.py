@@ -1,3 +1,113 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from helpers.instrumentation import registry, span
+from helpers.pagination import requested_fields
+from .models import JobPost
+from matching.tests import create_job, create_recruiter
 
-# Create your tests here.
+
+class RequestedFieldsTests(SimpleTestCase):
+    available = ["id", "title", "description", "mcqs"]
+
+    def fields(self, query, default=None):
+        return requested_fields(Request(APIRequestFactory().get("/", query)), self.available, default)
+
+    def test_default(self):
+        self.assertEqual(self.fields({}), self.available)
+        self.assertEqual(self.fields({}, default=["id", "title"]), ["id", "title"])
+
+    def test_requested_fields_keep_the_available_order(self):
+        self.assertEqual(self.fields({"fields": "title, id,,title"}), ["id", "title"])
+
+    def test_unknown_fields(self):
+        with self.assertRaises(ValidationError) as raised:
+            self.fields({"fields": "id,salary,password"})
+        self.assertEqual(str(raised.exception.detail["fields"]), "Unknown field(s): password, salary.")
+
+
+class JobPostListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = create_recruiter("recruiter")
+        cls.jobs = [create_job(cls.recruiter, title=f"Job {number}", mcqs=[{"question": "?"}]) for number in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.recruiter.user)
+
+    def get(self, **params):
+        response = self.client.get(reverse("job_post_list_create"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_original_response_without_pagination_params(self):
+        data = self.get()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 3)
+        self.assertIn("mcqs", data[0])
+
+    def test_pages(self):
+        first = self.get(page_size=2)
+        self.assertEqual([job["title"] for job in first["results"]], ["Job 2", "Job 1"])
+        self.assertNotIn("mcqs", first["results"][0])
+        self.assertIsNone(first["previous"])
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([job["title"] for job in second["results"]], ["Job 0"])
+        self.assertIsNone(second["next"])
+
+    def test_fields(self):
+        data = self.get(fields="id,title,mcqs")
+        self.assertEqual(data["results"][0], {"id": self.jobs[2].id, "title": "Job 2", "mcqs": [{"question": "?"}]})
+        response = self.client.get(reverse("job_post_list_create"), {"fields": "title,password"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(INSTRUMENTATION_ENABLED=True, METRICS_TOKEN="secret", SERVER_TIMING=True)
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = create_recruiter("recruiter")
+        create_job(cls.recruiter)
+
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def metrics(self, **headers):
+        return self.client.get(reverse("metrics"), headers=headers)
+
+    def test_metrics_require_the_token(self):
+        self.assertEqual(self.metrics().status_code, 401)
+        self.assertEqual(self.metrics(authorization="Bearer wrong").status_code, 401)
+        self.assertEqual(self.metrics(authorization="Bearer secret").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="", DEBUG=False)
+    def test_metrics_hidden_without_a_token(self):
+        self.assertEqual(self.metrics().status_code, 404)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.metrics().status_code, 200)
+
+    def test_request_and_span_metrics(self):
+        client = APIClient()
+        client.force_authenticate(self.recruiter.user)
+        response = client.get(reverse("job_post_list_create"), {"page_size": 1})
+        self.assertIn("paginate;dur=", response["Server-Timing"])
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[0-9.]+;desc="[1-9][0-9]* queries"')
+
+        text = self.metrics(authorization="Bearer secret").content.decode()
+        self.assertIn('hiregenz_http_request_seconds_count{route="api/jobs/job-posts/",method="GET",status="200"} 1',
+                      text)
+        self.assertIn('hiregenz_span_seconds_count{span="paginate"} 1', text)
+        self.assertIn('hiregenz_outbox_emails{status="pending"} 0', text)  # Collector of notifications.outbox
+
+    def test_span_queries_and_errors(self):
+        with span("count_jobs"):
+            JobPost.objects.count()
+        with self.assertRaises(ZeroDivisionError), span("broken"):
+            1 / 0
+        self.assertEqual(registry.span_queries["count_jobs"], 1)
+        self.assertEqual(registry.spans["count_jobs"].count, 1)
+        self.assertEqual(registry.span_errors, {"broken": 1})
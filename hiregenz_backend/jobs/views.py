@@ -4,22 +4,42 @@ from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CON
 from .models import JobPost
 from .serializers import JobPostSerializer
 from helpers.permission import IsRecruiter
+from helpers.pagination import KeysetPagination, only_columns, requested_fields, wants_pages
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
+from matching.scores import submit_job_refresh
 
 
 class JobPostListCreateView(APIView):
+    """
+    List job posts or create one.
+
+    `?page_size=`, `?cursor=` or `?fields=` switch the listing to pages of
+    `{next, previous, results}` (newest first, cursor-paginated); there
+    `?fields=id,title` returns only those fields and the generated `mcqs` are
+    only listed when asked for. Without them the response is the original
+    plain array of every job post, so existing clients keep working.
+    """
     permission_classes = [IsAuthenticated, IsRecruiter]
 
     def get(self, request, *args, **kwargs):
-        job_posts = JobPost.objects.all()
-        serializer = JobPostSerializer(job_posts, many=True)
-        return Response(serializer.data, status=HTTP_200_OK)
+        if not wants_pages(request):
+            serializer = JobPostSerializer(JobPost.objects.all(), many=True)
+            return Response(serializer.data, status=HTTP_200_OK)
+
+        available = list(JobPostSerializer().fields)
+        fields = requested_fields(request, available, default=[name for name in available if name != 'mcqs'])
+
+        paginator = KeysetPagination()
+        job_posts = paginator.paginate_queryset(only_columns(JobPost.objects.all(), fields), request, view=self)
+        serializer = JobPostSerializer(job_posts, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, *args, **kwargs):
         serializer = JobPostSerializer(data=request.data, context={'request': request})  # Pass context
         if serializer.is_valid():
-            serializer.save()
+            job_post = serializer.save()
+            submit_job_refresh(job_post)  # Materialize match scores for the new job, off the request
             return Response(serializer.data, status=HTTP_201_CREATED)
         return Response(serializer.errors, status=400)
 
@@ -47,7 +67,8 @@ class JobPostDetailView(APIView):
         job_post = get_object_or_404(JobPost, pk=pk, recruiter=request.user.recruiter_profile)
         serializer = JobPostSerializer(job_post, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            job_post = serializer.save()
+            submit_job_refresh(job_post)  # Job requirements may have changed
             return Response(serializer.data, status=HTTP_200_OK)
         return Response(serializer.errors, status=400)
 
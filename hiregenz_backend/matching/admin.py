@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Match
+from .models import Match, CandidateEmbedding
 
 admin.site.register(Match)
+admin.site.register(CandidateEmbedding)
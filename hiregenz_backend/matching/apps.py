@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class MatchingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'matching'
+
+    def ready(self):
+        # The embedding model is loaded lazily; optionally load it at startup instead
+        if settings.EMBEDDING_MODEL_WARMUP:
+            from helpers.model_registry import warm_up
+            warm_up()
@@ -0,0 +1,135 @@
+import hashlib
+from functools import lru_cache
+import numpy as np
+from django.conf import settings
+from helpers.instrumentation import span
+from helpers.model_registry import get_embedding_model
+from .models import CandidateEmbedding
+from .utils import candidate_phrases, job_phrases
+
+EMBEDDED_FIELDS = ("skills", "certifications", "education")
+
+
+def hash_phrases(phrases):
+    """
+    Fingerprint a phrase list so stale embeddings can be detected.
+    """
+    return hashlib.sha256("\n".join(phrases).encode("utf-8")).hexdigest()
+
+
+@span("encode_phrases")
+def encode_phrases(phrases):
+    """
+    Encode a list of phrases into a float32 array with one row per phrase.
+    """
+    model = get_embedding_model()
+    if not phrases:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.asarray(model.encode(phrases, convert_to_numpy=True), dtype=np.float32)
+
+
+@lru_cache(maxsize=1024)
+def _encode_cached(model_name, phrases):
+    array = encode_phrases(list(phrases))
+    array.flags.writeable = False  # Shared between callers
+    return array
+
+
+def encode_job_phrases(job):
+    """
+    Encode the job's phrase lists once so they can be reused for every candidate.
+    Results are cached per process, keyed by the phrases themselves.
+    """
+    return {
+        field: _encode_cached(settings.EMBEDDING_MODEL_NAME, tuple(phrases))
+        for field, phrases in job_phrases(job).items()
+    }
+
+
+def load_candidate_embeddings(candidates, fields=EMBEDDED_FIELDS):
+    """
+    Return {candidate_id: {field: array}} for the given candidates and fields.
+
+    Stored vectors are read in a single query. Missing or stale entries (the
+    candidate's text changed since it was encoded) are re-encoded together in
+    one model call and written back in bulk.
+    """
+    candidates = list(candidates)
+    stored = {}
+    for entry in CandidateEmbedding.objects.filter(
+        candidate__in=candidates, model_name=settings.EMBEDDING_MODEL_NAME, field__in=fields
+    ):
+        stored[(entry.candidate_id, entry.field)] = entry
+
+    results = {}
+    pending = []  # (candidate, field, phrases, text_hash) that need encoding
+    for candidate in candidates:
+        phrases = candidate_phrases(candidate)
+        results[candidate.id] = {}
+        for field in fields:
+            text_hash = hash_phrases(phrases[field])
+            entry = stored.get((candidate.id, field))
+            if entry is not None and entry.text_hash == text_hash:
+                results[candidate.id][field] = entry.as_array()
+            else:
+                pending.append((candidate, field, phrases[field], text_hash))
+
+    if pending:
+        for (candidate, field, _, _), array in zip(pending, encode_many([item[2] for item in pending])):
+            results[candidate.id][field] = array
+        save_candidate_embeddings(
+            (candidate, field, results[candidate.id][field], text_hash)
+            for candidate, field, _, text_hash in pending
+        )
+    return results
+
+
+def skills_changed(candidate):
+    """
+    Whether the candidate's skills differ from the text of their stored skills
+    embedding (or nothing is stored yet), i.e. their index entry may be stale.
+    """
+    stored_hash = CandidateEmbedding.objects.filter(
+        candidate=candidate, model_name=settings.EMBEDDING_MODEL_NAME, field="skills"
+    ).values_list("text_hash", flat=True).first()
+    return stored_hash != hash_phrases(candidate_phrases(candidate)["skills"])
+
+
+def encode_many(phrase_lists):
+    """
+    Encode several phrase lists with a single model call; returns one array per list.
+    """
+    flat = [phrase for phrases in phrase_lists for phrase in phrases]
+    encoded = encode_phrases(flat)
+    offsets = np.cumsum([0] + [len(phrases) for phrases in phrase_lists])
+    return [encoded[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def save_candidate_embeddings(entries):
+    """
+    Upsert (candidate, field, array, text_hash) entries into the embedding store.
+    """
+    CandidateEmbedding.objects.bulk_create(
+        [
+            CandidateEmbedding(
+                candidate=candidate,
+                field=field,
+                model_name=settings.EMBEDDING_MODEL_NAME,
+                text_hash=text_hash,
+                dimensions=array.shape[1],
+                vectors=array.tobytes(),
+            )
+            for candidate, field, array, text_hash in entries
+        ],
+        update_conflicts=True,
+        unique_fields=["candidate", "field", "model_name"],
+        update_fields=["text_hash", "dimensions", "vectors", "updated_at"],
+    )
+
+
+def refresh_candidate_embeddings(candidate):
+    """
+    Bring the stored embeddings of a candidate in line with its current text.
+    Fields whose text has not changed are not re-encoded.
+    """
+    return load_candidate_embeddings([candidate])[candidate.id]
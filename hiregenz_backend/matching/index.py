@@ -0,0 +1,381 @@
+import json
+import logging
+import os
+import numpy as np
+from pathlib import Path
+from filelock import FileLock
+from django.conf import settings
+from django.db import transaction
+from helpers.workers import run_in_background
+
+logger = logging.getLogger(__name__)
+
+# Rows added to the memory-mapped files each time they run out of space
+GROWTH_ROWS = 1024
+
+
+class CandidateIndex:
+    """
+    Approximate nearest-neighbour (IVF) index over pooled candidate skill embeddings.
+
+    Vectors, candidate ids and list assignments live in memory-mapped files under
+    `path`, so every worker process shares the same pages. Search probes the
+    `nprobe` inverted lists whose centroids are closest to the query and scores
+    only the rows in those lists. Until `build` trains centroids the index
+    behaves as a single flat list (exact search).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = FileLock(str(self.path / "index.lock"))
+        self.meta = None
+        self._token = None
+
+    def _file(self, name):
+        return self.path / name
+
+    def _meta_token(self):
+        try:
+            return os.stat(self._file("meta.json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _open(self, name, dtype, shape):
+        return np.memmap(self._file(name), dtype=dtype, mode="r+", shape=shape)
+
+    def load(self):
+        """
+        (Re)open the memory-mapped files if another process changed the index.
+        """
+        token = self._meta_token()
+        if token is None:
+            self.meta = None
+            self._token = None
+            return self
+        if token == self._token:
+            return self
+
+        with open(self._file("meta.json")) as handle:
+            self.meta = json.load(handle)
+        capacity, dimensions = self.meta["capacity"], self.meta["dimensions"]
+        self.vectors = self._open("vectors.f32", np.float32, (capacity, dimensions))
+        self.ids = self._open("ids.i64", np.int64, (capacity,))
+        self.lists = self._open("lists.i32", np.int32, (capacity,))
+        centroids = self._file("centroids.npy")
+        self.centroids = np.load(centroids) if centroids.exists() else None
+
+        size = self.meta["size"]
+        live = np.flatnonzero(self.ids[:size] >= 0)
+        self.rows_by_id = dict(zip(self.ids[live].tolist(), live.tolist()))
+        self._inverted = None
+        self._token = token
+        return self
+
+    def _write_meta(self):
+        self.meta["version"] = self.meta.get("version", 0) + 1
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as handle:
+            json.dump(self.meta, handle)
+        os.replace(tmp, self._file("meta.json"))
+        self._token = self._meta_token()
+        self._inverted = None
+
+    def _allocate(self, capacity, dimensions):
+        """
+        Create (or grow) the memory-mapped files, keeping existing rows.
+        """
+        old_size = self.meta["size"] if self.meta else 0
+        old = None
+        if old_size:
+            old = (np.array(self.vectors[:old_size]), np.array(self.ids[:old_size]), np.array(self.lists[:old_size]))
+
+        # Write new files and swap them in, so processes still mapping the old
+        # files keep reading valid pages until they reload
+        for name, dtype, shape in (
+            ("vectors.f32", np.float32, (capacity, dimensions)),
+            ("ids.i64", np.int64, (capacity,)),
+            ("lists.i32", np.int32, (capacity,)),
+        ):
+            tmp = self._file(name + ".tmp")
+            array = np.memmap(tmp, dtype=dtype, mode="w+", shape=shape)
+            if name == "ids.i64":
+                array[:] = -1
+            array.flush()
+            del array
+            os.replace(tmp, self._file(name))
+
+        self.vectors = self._open("vectors.f32", np.float32, (capacity, dimensions))
+        self.ids = self._open("ids.i64", np.int64, (capacity,))
+        self.lists = self._open("lists.i32", np.int32, (capacity,))
+        if old is not None:
+            self.vectors[:old_size], self.ids[:old_size], self.lists[:old_size] = old
+        self.meta = {**(self.meta or {}), "capacity": capacity, "dimensions": dimensions, "size": old_size}
+
+    def _flush(self):
+        self.vectors.flush()
+        self.ids.flush()
+        self.lists.flush()
+
+    def __len__(self):
+        self.load()
+        return len(self.rows_by_id) if self.meta else 0
+
+    def _assign(self, vectors):
+        if self.centroids is None:
+            return np.zeros(len(vectors), dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _inverted_lists(self):
+        """
+        Row numbers grouped by inverted list, rebuilt lazily after writes.
+        """
+        if self._inverted is None:
+            size = self.meta["size"]
+            live = np.flatnonzero(self.ids[:size] >= 0)
+            order = live[np.argsort(self.lists[live], kind="stable")]
+            boundaries = np.searchsorted(self.lists[order], np.arange(self.meta.get("n_lists", 1) + 1))
+            self._inverted = (order, boundaries)
+        return self._inverted
+
+    def search(self, query, top_k, nprobe=None):
+        """
+        Return up to `top_k` (candidate_id, score) pairs with the highest inner product.
+        """
+        self.load()
+        if not self.meta or not self.rows_by_id:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = nprobe or settings.MATCHING_ANN_NPROBE
+
+        order, boundaries = self._inverted_lists()
+        if self.centroids is None:
+            rows = order
+        else:
+            probes = np.argsort(-(self.centroids @ query))[:nprobe]
+            rows = np.concatenate([order[boundaries[probe]:boundaries[probe + 1]] for probe in probes])
+        if len(rows) == 0:
+            return []
+
+        scores = self.vectors[rows] @ query
+        if len(rows) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-scores[best])]
+        return list(zip(self.ids[rows[best]].tolist(), scores[best].tolist()))
+
+    def build(self, candidate_ids, vectors, n_lists=None, iterations=10, sample_size=50000):
+        """
+        Rebuild the index from scratch, training IVF centroids with spherical k-means.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        if not len(vectors):
+            raise ValueError("Cannot build a candidate index without vectors.")
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        with self.lock:
+            count, dimensions = vectors.shape
+            n_lists = n_lists or settings.MATCHING_ANN_LISTS or max(1, int(np.sqrt(count)))
+            n_lists = max(1, min(n_lists, count))
+            centroids = train_centroids(vectors, n_lists, iterations, sample_size)
+
+            self.meta = None
+            self._allocate(max(count, GROWTH_ROWS), dimensions)
+            self.centroids = centroids
+            np.save(self._file("centroids.npy"), centroids)
+
+            self.vectors[:count] = vectors
+            self.ids[:count] = candidate_ids
+            self.lists[:count] = self._assign(vectors)
+            self._flush()
+            self.meta.update({"size": count, "n_lists": n_lists, "model_name": settings.EMBEDDING_MODEL_NAME})
+            self.rows_by_id = dict(zip(candidate_ids.tolist(), range(count)))
+            self._write_meta()
+
+    def add(self, candidate_id, vector):
+        """
+        Insert or replace the vector of one candidate.
+        """
+        self.add_many([candidate_id], [vector])
+
+    def add_many(self, candidate_ids, vectors):
+        """
+        Insert or replace the vectors of several candidates with a single version bump.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(vectors):
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        with self.lock:
+            self.load()
+            if self.meta is None or self.meta.get("model_name") != settings.EMBEDDING_MODEL_NAME:
+                # Start over when the embedding model changed; vectors are not comparable
+                self.meta = None
+                self._allocate(GROWTH_ROWS, vectors.shape[1])
+                self.meta.update({"n_lists": 1, "model_name": settings.EMBEDDING_MODEL_NAME})
+                self._file("centroids.npy").unlink(missing_ok=True)
+                self.centroids = None
+                self.rows_by_id = {}
+
+            changed = False
+            assignments = self._assign(vectors)
+            for candidate_id, vector, assignment in zip(candidate_ids, vectors, assignments):
+                row = self.rows_by_id.get(candidate_id)
+                if row is not None and np.allclose(self.vectors[row], vector):
+                    continue  # Nothing changed; avoid bumping the version for every save
+                if row is None:
+                    row = self.meta["size"]
+                    if row >= self.meta["capacity"]:
+                        self._allocate(self.meta["capacity"] + max(GROWTH_ROWS, self.meta["capacity"]), vectors.shape[1])
+                    self.meta["size"] = row + 1
+
+                self.vectors[row] = vector
+                self.ids[row] = candidate_id
+                self.lists[row] = assignment
+                self.rows_by_id[candidate_id] = row
+                changed = True
+
+            if changed:
+                self._flush()
+                self._write_meta()
+
+    def remove(self, candidate_id):
+        """
+        Delete one candidate (its row is tombstoned until the next `build`).
+        """
+        if not self._file("meta.json").exists():
+            return
+        with self.lock:
+            self.load()
+            row = self.rows_by_id.pop(candidate_id, None)
+            if row is None:
+                return
+            self.ids[row] = -1
+            self._flush()
+            self._write_meta()
+
+
+def train_centroids(vectors, n_lists, iterations=10, sample_size=50000, seed=0):
+    """
+    Spherical k-means over (a sample of) the vectors; returns unit-length centroids.
+    """
+    rng = np.random.default_rng(seed)
+    normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+    if len(normalized) > sample_size:
+        normalized = normalized[rng.choice(len(normalized), sample_size, replace=False)]
+
+    centroids = normalized[rng.choice(len(normalized), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(normalized @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, normalized)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Re-seed empty lists with random points so every list stays in use
+        sums[empty] = normalized[rng.choice(len(normalized), int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-8)
+    return centroids.astype(np.float32)
+
+
+_index = None
+
+
+def get_candidate_index():
+    """
+    Process-wide candidate index stored in `settings.MATCHING_INDEX_DIR`.
+    """
+    global _index
+    if _index is None:
+        _index = CandidateIndex(settings.MATCHING_INDEX_DIR)
+    return _index.load()
+
+
+def index_candidate(candidate):
+    """
+    Insert or refresh the pooled skill embedding of a candidate in the index.
+    Candidates without skills are removed, since they cannot be retrieved by skills.
+    """
+    index_candidates([candidate])
+
+
+def index_candidates(candidates):
+    """
+    Batch version of `index_candidate`.
+    """
+    from .embeddings import load_candidate_embeddings
+    from .utils import pooled_embedding
+
+    candidates = list(candidates)
+    embeddings = load_candidate_embeddings(candidates, fields=("skills",))
+    candidate_ids, vectors = [], []
+    for candidate in candidates:
+        vector = pooled_embedding(embeddings[candidate.id]["skills"])
+        if vector is None:
+            remove_candidate(candidate.id)
+        else:
+            candidate_ids.append(candidate.id)
+            vectors.append(vector)
+    get_candidate_index().add_many(candidate_ids, vectors)
+
+
+def remove_candidate(candidate_id):
+    """
+    Remove a candidate from the index.
+    """
+    get_candidate_index().remove(candidate_id)
+
+
+def index_candidate_safely(candidate_id):
+    """
+    Index a candidate by id, logging failures instead of raising; the index can
+    always be rebuilt from the stored embeddings with `build_candidate_index`.
+    """
+    from users.models import Candidate
+
+    candidate = Candidate.objects.filter(pk=candidate_id).first()
+    if candidate is None:
+        return
+    try:
+        index_candidate(candidate)
+    except Exception as e:
+        logger.warning(f"Failed to index candidate {candidate_id}: {e}")
+
+
+def remove_candidate_safely(candidate_id):
+    """
+    Same as `index_candidate_safely`, removing the candidate.
+    """
+    try:
+        remove_candidate(candidate_id)
+    except Exception as e:
+        logger.warning(f"Failed to remove candidate {candidate_id} from the index: {e}")
+
+
+def submit_index_update(update, candidate_id):
+    """
+    Run `update(candidate_id)` inline (MATCH_REFRESH_SYNC) or, once the current
+    transaction commits, on a single background thread (index writes take a file lock anyway).
+    """
+    if settings.MATCH_REFRESH_SYNC:
+        update(candidate_id)
+    else:
+        transaction.on_commit(lambda: run_in_background('candidate-index', 1, update, candidate_id))
+
+
+def shortlist_candidate_ids(job_skill_embeddings, top_k=None):
+    """
+    Ids of the `top_k` candidates whose pooled skills are closest to the job's skills.
+
+    Returns None when the index cannot be used (empty index, index built with
+    another embedding model or job without skills), in which case callers fall
+    back to scanning every candidate.
+    """
+    from .utils import pooled_embedding
+
+    query = pooled_embedding(job_skill_embeddings)
+    index = get_candidate_index()
+    if query is None or not len(index) or index.meta.get("model_name") != settings.EMBEDDING_MODEL_NAME:
+        return None
+    return [candidate_id for candidate_id, _ in index.search(query, top_k or settings.MATCHING_ANN_TOP_K)]
@@ -0,0 +1,64 @@
+import tempfile
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from matching.index import CandidateIndex
+
+
+class Command(BaseCommand):
+    help = "Measure recall and latency of the candidate ANN index against exact search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--candidates", type=int, default=100000, help="Number of synthetic candidate vectors.")
+        parser.add_argument("--dimensions", type=int, default=768, help="Embedding dimensions.")
+        parser.add_argument("--clusters", type=int, default=200, help="Skill clusters in the synthetic data.")
+        parser.add_argument("--queries", type=int, default=100, help="Number of job queries.")
+        parser.add_argument("--top-k", type=int, default=500, help="Candidates retrieved per query.")
+        parser.add_argument("--lists", type=int, default=None, help="Number of inverted lists.")
+        parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        vectors, queries = self.synthetic_data(rng, options)
+        top_k = options["top_k"]
+
+        with tempfile.TemporaryDirectory() as path:
+            index = CandidateIndex(path)
+            started = time.perf_counter()
+            index.build(np.arange(len(vectors)), vectors, n_lists=options["lists"])
+            self.stdout.write(f"Built index over {len(vectors)} vectors in {time.perf_counter() - started:.2f}s "
+                              f"({index.meta['n_lists']} lists)")
+
+            # Exact top-k by brute force, the reference for recall
+            started = time.perf_counter()
+            exact = [set(np.argpartition(-(vectors @ query), top_k - 1)[:top_k].tolist()) for query in queries]
+            exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+            self.stdout.write(f"{'exact':>8}  recall@{top_k}=1.000  latency={exact_ms:.2f}ms")
+
+            for nprobe in options["nprobe"]:
+                recalls, latencies = [], []
+                for query, expected in zip(queries, exact):
+                    started = time.perf_counter()
+                    hits = index.search(query, top_k, nprobe=nprobe)
+                    latencies.append(time.perf_counter() - started)
+                    recalls.append(len(expected & {candidate_id for candidate_id, _ in hits}) / top_k)
+                self.stdout.write(
+                    f"nprobe={nprobe:<3} recall@{top_k}={np.mean(recalls):.3f}  "
+                    f"latency={np.mean(latencies) * 1000:.2f}ms  p95={np.percentile(latencies, 95) * 1000:.2f}ms"
+                )
+
+    def synthetic_data(self, rng, options):
+        """
+        Clustered vectors that resemble pooled skill embeddings (similar skill sets group together).
+        """
+        dimensions = options["dimensions"]
+        centers = rng.normal(size=(options["clusters"], dimensions)).astype(np.float32)
+        labels = rng.integers(0, options["clusters"], options["candidates"])
+        vectors = centers[labels] + 0.5 * rng.normal(size=(options["candidates"], dimensions)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        query_labels = rng.integers(0, options["clusters"], options["queries"])
+        queries = centers[query_labels] + 0.5 * rng.normal(size=(options["queries"], dimensions)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        return vectors, queries
@@ -0,0 +1,44 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from users.models import Candidate
+from matching.embeddings import load_candidate_embeddings
+from matching.index import get_candidate_index
+from matching.utils import pooled_embedding
+
+
+class Command(BaseCommand):
+    help = "Rebuild the approximate nearest-neighbour index of candidate skill embeddings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lists", type=int, default=None, help="Number of inverted lists (default: sqrt(candidates)).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Candidates loaded per query.")
+
+    def handle(self, *args, **options):
+        candidate_ids, vectors = [], []
+        batch = []
+        candidates = Candidate.objects.only("id", "skills").iterator(chunk_size=options["batch_size"])
+        for candidate in candidates:
+            batch.append(candidate)
+            if len(batch) == options["batch_size"]:
+                self.collect(batch, candidate_ids, vectors)
+                batch = []
+        if batch:
+            self.collect(batch, candidate_ids, vectors)
+
+        if not vectors:
+            self.stdout.write(self.style.WARNING("No candidates with skills to index."))
+            return
+
+        get_candidate_index().build(candidate_ids, np.stack(vectors), n_lists=options["lists"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(candidate_ids)} candidates."))
+
+    def collect(self, candidates, candidate_ids, vectors):
+        """
+        Append the pooled skill vectors of a batch (missing embeddings are computed).
+        """
+        embeddings = load_candidate_embeddings(candidates, fields=("skills",))
+        for candidate in candidates:
+            vector = pooled_embedding(embeddings[candidate.id]["skills"])
+            if vector is not None:
+                candidate_ids.append(candidate.id)
+                vectors.append(vector)
@@ -1,28 +1,31 @@
-from .utils import preprocess_text, calculate_similarity, match_salary, match_locations
+import numpy as np
+from helpers.instrumentation import span
+from .utils import (
+    calculate_similarity, calculate_embedding_similarity, candidate_phrases, job_phrases,
+    match_salary, match_locations, stack_pooled_embeddings, batch_similarity, batch_match_salary,
+)
 
-from sentence_transformers import SentenceTransformer
+# Weights of the individual scores in the final match score
+SCORE_WEIGHTS = {
+    "skills": 0.4,
+    "certifications": 0.2,
+    "education": 0.2,
+    "salary": 0.1,
+    "location": 0.1,
+}
 
-# model = SentenceTransformer('all-MiniLM-L6-v2')  # Use a pre-trained model
-model = SentenceTransformer('bert-base-nli-mean-tokens')
 
-def match_candidate_to_job(candidate, job):
+@span("match_candidate_to_job")
+def match_candidate_to_job(candidate, job, candidate_embeddings=None, job_embeddings=None):
+    """
+    Score a candidate against a job.
+
+    When `candidate_embeddings` / `job_embeddings` ({field: array}) are given, the
+    stored vectors are compared directly instead of running the model.
+    """
     # Preprocess and parse data, converting everything to lowercase
-    candidate_skills = [
-        skill.lower().strip() for skill in preprocess_text(candidate.skills).split(", ")
-    ] if candidate.skills else []
-    job_skills = [skill.lower().strip() for skill in job.key_skills] if job.key_skills else []
-
-    candidate_certifications = [
-        cert.lower().strip() for cert in preprocess_text(candidate.certifications).split(", ")
-    ] if candidate.certifications else []
-    job_certifications = []  # Adjust if needed (populate if JobPost has a certifications field)
-
-    candidate_education = [
-        edu.lower().strip() for edu in preprocess_text(candidate.education).split(", ")
-    ] if candidate.education else []
-    job_education = [
-        edu.lower().strip() for edu in preprocess_text(job.education).split(", ")
-    ] if job.education else []
+    candidate_lists = candidate_phrases(candidate)
+    job_lists = job_phrases(job)
 
     candidate_work_experience = candidate.work_experience  # Optional: Parse into years
     job_work_experience = job.experience  # Use the `experience` field from JobPost
@@ -42,17 +45,64 @@ def match_candidate_to_job(candidate, job):
         location_score = match_locations(preference.preferred_locations, job.locations)
 
     # Calculate scores
-    skills_score = calculate_similarity(candidate_skills, job_skills, model=model)
-    certification_score = calculate_similarity(candidate_certifications, job_certifications, model=model)
-    education_score = calculate_similarity(candidate_education, job_education, model=model)
+    scores = {}
+    for field in ("skills", "certifications", "education"):
+        if candidate_embeddings is not None and job_embeddings is not None:
+            scores[field] = calculate_embedding_similarity(candidate_embeddings[field], job_embeddings[field])
+        else:
+            scores[field] = calculate_similarity(candidate_lists[field], job_lists[field])
+    skills_score = scores["skills"]
+    certification_score = scores["certifications"]
+    education_score = scores["education"]
 
     # Weighted aggregation of scores
     final_score = (
-        0.4 * skills_score +
-        0.2 * certification_score +
-        0.2 * education_score +
-        0.1 * salary_score +
-        0.1 * location_score
+        SCORE_WEIGHTS["skills"] * skills_score +
+        SCORE_WEIGHTS["certifications"] * certification_score +
+        SCORE_WEIGHTS["education"] * education_score +
+        SCORE_WEIGHTS["salary"] * salary_score +
+        SCORE_WEIGHTS["location"] * location_score
     )
 
     return final_score
+
+
+@span("match_candidates_to_job")
+def match_candidates_to_job(candidates, job, candidate_embeddings, job_embeddings):
+    """
+    Batch version of `match_candidate_to_job`.
+
+    Takes N candidates with their precomputed embeddings ({candidate_id: {field: array}})
+    and returns an array of N final scores, computed with a handful of matrix operations.
+    """
+    candidates = list(candidates)
+    if not candidates:
+        return np.zeros(0, dtype=np.float32)
+
+    final_scores = np.zeros(len(candidates), dtype=np.float32)
+    for field in ("skills", "certifications", "education"):
+        dimensions = job_embeddings[field].shape[1]
+        pooled, present = stack_pooled_embeddings(
+            [candidate_embeddings[candidate.id][field] for candidate in candidates], dimensions
+        )
+        final_scores += SCORE_WEIGHTS[field] * batch_similarity(pooled, present, job_embeddings[field])
+
+    # Structured scores, read from each candidate's preference (if any)
+    expected_min = np.full(len(candidates), np.nan)
+    expected_max = np.full(len(candidates), np.nan)
+    location_scores = np.zeros(len(candidates), dtype=np.float32)
+    for index, candidate in enumerate(candidates):
+        preference = getattr(candidate, "preference", None)
+        if not preference:
+            continue
+        if preference.expected_salary_min is not None:
+            expected_min[index] = float(preference.expected_salary_min)
+        if preference.expected_salary_max is not None:
+            expected_max[index] = float(preference.expected_salary_max)
+        location_scores[index] = match_locations(preference.preferred_locations, job.locations)
+
+    final_scores += SCORE_WEIGHTS["salary"] * batch_match_salary(
+        expected_min, expected_max, job.min_ctc, job.max_ctc
+    )
+    final_scores += SCORE_WEIGHTS["location"] * location_scores
+    return final_scores
@@ -1,11 +1,61 @@
+import numpy as np
 from django.db import models
 from users.models import Candidate
 from jobs.models import JobPost
 
 class Match(models.Model):
+    """
+    Materialized match score of a candidate for a job, refreshed by `matching.scores`.
+    """
     candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE)
     job_post = models.ForeignKey(JobPost, on_delete=models.CASCADE)
-    match_score = models.FloatField()  # Score between 0-100
+    match_score = models.FloatField()  # Weighted score from `match_candidates_to_job`
+    is_stale = models.BooleanField(default=False)  # Inputs changed since the score was computed
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'job_post'], name='unique_candidate_job_match'),
+        ]
+        indexes = [
+            models.Index(fields=['job_post', '-match_score'], name='match_job_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate.name} - {self.job_post.title}: {self.match_score}%"
+
+
+class CandidateEmbedding(models.Model):
+    """
+    Phrase embeddings of one candidate field, stored as a float32 blob (one row per phrase).
+    """
+    FIELD_CHOICES = (
+        ('skills', 'Skills'),
+        ('certifications', 'Certifications'),
+        ('education', 'Education'),
+    )
+
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='embeddings')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    model_name = models.CharField(max_length=100)
+    text_hash = models.CharField(max_length=64)  # SHA-256 of the embedded phrases, used for invalidation
+    dimensions = models.PositiveIntegerField()
+    vectors = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['candidate', 'field', 'model_name'],
+                name='unique_candidate_field_embedding',
+            ),
+        ]
+
+    def as_array(self):
+        """
+        Decode the stored blob into a (phrases, dimensions) float32 array.
+        """
+        return np.frombuffer(bytes(self.vectors), dtype=np.float32).reshape(-1, self.dimensions)
 
     def __str__(self):
-        return f"{self.candidate.name} - {self.job_post.title}: {self.match_score}%"
\ No newline at end of file
+        return f"{self.candidate_id} - {self.field} ({self.model_name})"
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from users.models import Candidate
+
+# Job types where the candidate's preferred locations do not matter
+REMOTE_JOB_TYPES = {"wfh", "remote"}
+
+
+def location_bound(job):
+    """Whether the job's locations constrain candidates."""
+    return bool(job.locations) and (job.job_type or "").strip().lower() not in REMOTE_JOB_TYPES
+
+
+def constraints_q(job):
+    """
+    SQL conditions a candidate must meet to be worth scoring against `job`.
+
+    Only stated preferences that can never fit exclude a candidate: expected
+    salary entirely outside the offered range, or (known) experience more than
+    MATCH_EXPERIENCE_TOLERANCE years below the requirement. Candidates with
+    missing values are kept; an experience of 0 is treated as missing, since
+    the resume parser stores 0.0 when it finds no dated work experience.
+    """
+    q = Q()
+    if job.max_ctc:
+        q &= Q(preference__expected_salary_min__isnull=True) | Q(preference__expected_salary_min__lte=job.max_ctc)
+    if job.min_ctc:
+        q &= Q(preference__expected_salary_max__isnull=True) | Q(preference__expected_salary_max__gte=job.min_ctc)
+    if job.experience:
+        minimum = job.experience - settings.MATCH_EXPERIENCE_TOLERANCE
+        q &= (
+            Q(total_work_experience__isnull=True) | Q(total_work_experience=0)
+            | Q(total_work_experience__gte=minimum)
+        )
+    return q
+
+
+def locations_q(job):
+    """
+    SQL condition on preferred locations (no preference, or one of the job's
+    locations), or None when the database cannot query JSON containment (SQLite).
+    """
+    if not connection.features.supports_json_field_contains:
+        return None
+    q = Q(preference__isnull=True) | Q(preference__preferred_locations__isnull=True) | Q(preference__preferred_locations=[])
+    for location in job.locations:
+        q |= Q(preference__preferred_locations__contains=[location])  # jsonb @>, served by the GIN index
+    return q
+
+
+def fits_job(candidate, job):
+    """
+    Python version of the retrieval constraints, for one candidate with its preference loaded.
+    """
+    preference = getattr(candidate, "preference", None)
+    if preference is not None:
+        if job.max_ctc and preference.expected_salary_min is not None and preference.expected_salary_min > job.max_ctc:
+            return False
+        if job.min_ctc and preference.expected_salary_max is not None and preference.expected_salary_max < job.min_ctc:
+            return False
+        if location_bound(job) and preference.preferred_locations and not (
+            set(preference.preferred_locations) & set(job.locations)
+        ):
+            return False
+    if job.experience and candidate.total_work_experience:  # None or 0.0: unknown
+        return candidate.total_work_experience >= job.experience - settings.MATCH_EXPERIENCE_TOLERANCE
+    return True
+
+
+def retrieve_candidates(job, candidates=None):
+    """
+    Narrow `candidates` (all by default) to those whose salary, location and
+    experience can fit `job`, before any semantic scoring. Returns a queryset,
+    or a generator when the location check has to run in Python.
+    """
+    candidates = Candidate.objects.all() if candidates is None else candidates
+    if not settings.MATCH_PREFILTER:
+        return candidates
+
+    candidates = candidates.filter(constraints_q(job))
+    if not location_bound(job):
+        return candidates
+    q = locations_q(job)
+    if q is not None:
+        return candidates.filter(q)
+    return (candidate for candidate in candidates.iterator(chunk_size=2000) if fits_job(candidate, job))
@@ -0,0 +1,171 @@
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from helpers.workers import run_in_background
+from users.models import Candidate
+from jobs.models import JobPost
+from .models import Match
+from .matching import match_candidates_to_job
+from .embeddings import encode_job_phrases, load_candidate_embeddings
+from .index import index_candidate, shortlist_candidate_ids
+from .retrieval import fits_job, retrieve_candidates
+
+logger = logging.getLogger(__name__)
+
+# Number of candidates whose stored embeddings are loaded per query
+EMBEDDING_BATCH_SIZE = 500
+
+MATCH_FIELDS = ("id", "skills", "certifications", "education", "total_work_experience")
+
+
+def score_candidates(candidates, job, job_embeddings):
+    """
+    Yield (candidate, score) for every candidate (a queryset or any iterable),
+    scoring them in vectorized batches.
+    """
+    if hasattr(candidates, "iterator"):
+        candidates = candidates.iterator(chunk_size=EMBEDDING_BATCH_SIZE)
+    batch = []
+    for candidate in candidates:
+        batch.append(candidate)
+        if len(batch) == EMBEDDING_BATCH_SIZE:
+            yield from zip(batch, match_candidates_to_job(batch, job, load_candidate_embeddings(batch), job_embeddings))
+            batch = []
+    if batch:
+        yield from zip(batch, match_candidates_to_job(batch, job, load_candidate_embeddings(batch), job_embeddings))
+
+
+def job_shortlist(job_embeddings):
+    """
+    Ids of the candidates the ANN index shortlists for a job, or None when the
+    index cannot be used (every candidate is then in scope).
+    """
+    candidate_ids = shortlist_candidate_ids(job_embeddings["skills"])
+    return None if candidate_ids is None else set(candidate_ids)
+
+
+def in_job_scope(candidate, job, shortlist):
+    """
+    Whether a job refresh scores `candidate`: it is in the job's shortlist
+    and passes the retrieval pre-filter. Both refresh paths use this scope,
+    so a job's Match rows do not depend on which path ran last.
+    """
+    if shortlist is not None and candidate.id not in shortlist:
+        return False
+    return not settings.MATCH_PREFILTER or fits_job(candidate, job)
+
+
+def refresh_job_matches(job):
+    """
+    Recompute the stored match scores of a job.
+
+    Candidates whose salary, location or experience cannot fit the job are
+    dropped first (see `retrieval.py`). When the ANN index is available only
+    the nearest candidates by skills are scored; otherwise every remaining
+    candidate is.
+    """
+    job_embeddings = encode_job_phrases(job)
+    candidates = Candidate.objects.select_related("preference").only(
+        *MATCH_FIELDS, "preference__expected_salary_min", "preference__expected_salary_max",
+        "preference__preferred_locations",
+    )
+    candidate_ids = job_shortlist(job_embeddings)
+    if candidate_ids is not None:
+        candidates = candidates.filter(id__in=candidate_ids)
+    candidates = retrieve_candidates(job, candidates)
+
+    matches = [
+        Match(candidate=candidate, job_post=job, match_score=float(score))
+        for candidate, score in score_candidates(candidates, job, job_embeddings)
+    ]
+    with transaction.atomic():
+        Match.objects.filter(job_post=job).delete()
+        Match.objects.bulk_create(matches, batch_size=EMBEDDING_BATCH_SIZE)
+        # Marks the job as computed even when no candidate matched, so views do not recompute it
+        job.matches_computed_at = now()
+        JobPost.objects.filter(id=job.id).update(matches_computed_at=job.matches_computed_at)
+    return len(matches)
+
+
+def refresh_candidate_matches(candidate):
+    """
+    Recompute the stored match scores of a candidate against every active job
+    whose refresh would score it (see `in_job_scope`).
+    """
+    candidate = Candidate.objects.select_related("preference").get(pk=candidate.pk)
+    embeddings = load_candidate_embeddings([candidate])
+    # The shortlists must see the candidate's current skills; indexing after the save may not have run yet
+    index_candidate(candidate)
+    matches, out_of_scope = [], []
+    for job in JobPost.objects.filter(is_active=True).iterator():
+        job_embeddings = encode_job_phrases(job)
+        if not in_job_scope(candidate, job, job_shortlist(job_embeddings)):
+            out_of_scope.append(job.id)
+            continue
+        score = match_candidates_to_job([candidate], job, embeddings, job_embeddings)[0]
+        matches.append(Match(candidate=candidate, job_post=job, match_score=float(score)))
+
+    # Jobs the candidate no longer fits (e.g. changed salary expectations, or other skills) lose their score
+    Match.objects.filter(candidate=candidate, job_post_id__in=out_of_scope).delete()
+    Match.objects.bulk_create(
+        matches,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["candidate", "job_post"],
+        update_fields=["match_score", "is_stale", "updated_at"],
+    )
+    return len(matches)
+
+
+def refresh_job_matches_safely(job):
+    """
+    Mark the job's scores stale and recompute them; on failure the rows stay
+    marked stale so the matching view can report it.
+    """
+    Match.objects.filter(job_post=job).update(is_stale=True)
+    try:
+        refresh_job_matches(job)
+    except Exception as e:
+        logger.warning(f"Failed to refresh matches for job {job.id}: {e}")
+
+
+def refresh_candidate_matches_safely(candidate):
+    """
+    Same as `refresh_job_matches_safely`, for all scores of one candidate.
+    """
+    Match.objects.filter(candidate=candidate).update(is_stale=True)
+    try:
+        refresh_candidate_matches(candidate)
+    except Exception as e:
+        logger.warning(f"Failed to refresh matches for candidate {candidate.id}: {e}")
+
+
+def submit_refresh(refresh, instance):
+    """
+    Run `refresh(instance)` inline (MATCH_REFRESH_SYNC) or, once the current
+    transaction commits, on the background matching pool.
+    """
+    if settings.MATCH_REFRESH_SYNC:
+        refresh(instance)
+    else:
+        transaction.on_commit(
+            lambda: run_in_background('match-refresh', settings.MATCH_REFRESH_WORKERS, refresh, instance)
+        )
+
+
+def submit_job_refresh(job):
+    """
+    Mark the job's scores stale now and recompute them off the request path.
+    Until the worker is done the matching view reports the old scores as stale.
+    """
+    Match.objects.filter(job_post=job).update(is_stale=True)
+    submit_refresh(refresh_job_matches_safely, job)
+
+
+def submit_candidate_refresh(candidate):
+    """
+    Same as `submit_job_refresh`, for all scores of one candidate.
+    """
+    Match.objects.filter(candidate=candidate).update(is_stale=True)
+    submit_refresh(refresh_candidate_matches_safely, candidate)
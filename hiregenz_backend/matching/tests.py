@@ -1,3 +1,170 @@
-from django.test import TestCase
+import hashlib
+from unittest import mock
+import numpy as np
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from jobs.models import JobPost
+from users.models import Candidate, CandidatePreference, Recruiter, User
+from .models import Match
+from .retrieval import fits_job, retrieve_candidates
+from .scores import refresh_candidate_matches, refresh_job_matches
 
-# Create your tests here.
+
+def fake_encode_phrases(phrases):
+    # Deterministic stand-in for the embedding model: one random vector per distinct phrase
+    rows = [np.random.default_rng(int(hashlib.md5(phrase.encode()).hexdigest()[:8], 16)).normal(size=8)
+            for phrase in phrases]
+    return np.array(rows, dtype=np.float32).reshape(len(phrases), 8)
+
+
+def create_recruiter(username):
+    user = User.objects.create(username=username, role="recruiter")
+    return Recruiter.objects.create(
+        user=user, name=username, email=f"{username}@acme.com", company_name="Acme", website_url="https://acme.com"
+    )
+
+
+def create_job(recruiter, **fields):
+    return JobPost.objects.create(**{
+        "recruiter": recruiter, "title": "Backend developer", "description": "Python", "experience": 3,
+        "min_ctc": 0, "max_ctc": 0, "education": "B.Tech", "key_skills": ["python"], "job_type": "WFH",
+        "employment_type": "Full-time", "industry_type": "IT", "role": "Developer", "candidates_needed": 1,
+        **fields,
+    })
+
+
+def create_candidates(**experience):
+    # bulk_create: no post_save indexing, these tests only need the rows
+    users = User.objects.bulk_create([User(username=name, role="candidate") for name in experience])
+    return Candidate.objects.bulk_create([
+        Candidate(user=user, name=name, email=f"{name}@example.com", skills="python", total_work_experience=years)
+        for user, (name, years) in zip(users, experience.items())
+    ])
+
+
+class RetrievalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = create_job(create_recruiter("recruiter"))
+        create_candidates(unknown=None, unparsed=0.0, junior=1.0, senior=5.0)
+
+    def test_experience_filter_keeps_unknown_experience(self):
+        # The parser stores 0.0 when it finds no dated work experience; that must not exclude anyone
+        names = set(retrieve_candidates(self.job).values_list("name", flat=True))
+        self.assertEqual(names, {"unknown", "unparsed", "senior"})
+
+    def test_fits_job_matches_sql_filter(self):
+        fits = {candidate.name for candidate in Candidate.objects.all() if fits_job(candidate, self.job)}
+        self.assertEqual(fits, {"unknown", "unparsed", "senior"})
+
+
+@mock.patch("matching.scores.index_candidate")
+@mock.patch("matching.embeddings.encode_phrases", fake_encode_phrases)
+class RefreshScopeTests(TestCase):
+    """
+    The Match rows of a job are the candidates in its ANN shortlist that pass
+    the pre-filter, whichever refresh path wrote them.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = create_job(create_recruiter("recruiter"), max_ctc=100)
+        cls.listed, cls.expensive, cls.unlisted = create_candidates(listed=5.0, expensive=5.0, unlisted=5.0)
+        CandidatePreference.objects.create(candidate=cls.expensive, expected_salary_min=500)
+
+    def shortlist(self):
+        # The index shortlists two of the three candidates
+        return mock.patch(
+            "matching.scores.shortlist_candidate_ids", return_value=[self.listed.id, self.expensive.id]
+        )
+
+    def matched(self):
+        return set(Match.objects.filter(job_post=self.job).values_list("candidate__name", flat=True))
+
+    def test_job_refresh(self, index_candidate):
+        with self.shortlist():
+            self.assertEqual(refresh_job_matches(self.job), 1)
+        self.assertEqual(self.matched(), {"listed"})
+        self.job.refresh_from_db()
+        self.assertIsNotNone(self.job.matches_computed_at)
+
+    def test_candidate_refresh_uses_the_job_scope(self, index_candidate):
+        # A row left from before the candidate dropped out of the shortlist is removed
+        Match.objects.create(candidate=self.unlisted, job_post=self.job, match_score=0.9)
+        with self.shortlist():
+            for candidate in (self.listed, self.expensive, self.unlisted):
+                refresh_candidate_matches(candidate)
+        self.assertEqual(self.matched(), {"listed"})
+
+    def test_both_paths_agree_without_index(self, index_candidate):
+        with mock.patch("matching.scores.shortlist_candidate_ids", return_value=None):
+            refresh_job_matches(self.job)
+            by_job = self.matched()
+            Match.objects.all().delete()
+            for candidate in (self.listed, self.expensive, self.unlisted):
+                refresh_candidate_matches(candidate)
+        self.assertEqual(by_job, {"listed", "unlisted"})
+        self.assertEqual(self.matched(), by_job)
+
+
+@override_settings(MATCH_REFRESH_SYNC=False)
+class MatchCandidatesViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = create_recruiter("owner")
+        cls.job = create_job(cls.recruiter)
+        cls.candidates = create_candidates(first=5.0, second=5.0, third=5.0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.recruiter.user)
+        self.url = reverse("match_candidates", args=[self.job.id])
+
+    def store_matches(self, *scores, stale=False):
+        Match.objects.bulk_create([
+            Match(candidate=candidate, job_post=self.job, match_score=score, is_stale=stale)
+            for candidate, score in zip(self.candidates, scores)
+        ])
+        JobPost.objects.filter(id=self.job.id).update(matches_computed_at="2026-01-01T00:00:00Z")
+
+    def test_computed_once_even_without_matches(self):
+        def refresh(job):
+            # Nothing matched, but the job is marked computed
+            JobPost.objects.filter(id=job.id).update(matches_computed_at="2026-01-01T00:00:00Z")
+
+        with mock.patch("matching.views.refresh_job_matches", side_effect=refresh) as refresh_job_matches:
+            for _ in range(2):
+                response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["results"]["matches"], [])
+        refresh_job_matches.assert_called_once()
+
+    def test_pages_best_score_first(self):
+        self.store_matches(0.2, 0.9, 0.5)
+        response = self.client.get(self.url, {"page_size": 2, "fields": "name,score"})
+        self.assertEqual(response.data["results"]["matches"], [
+            {"name": "second", "score": 0.9}, {"name": "third", "score": 0.5},
+        ])
+        self.assertEqual(response.data["results"]["total_matched"], 3)
+        self.assertFalse(response.data["results"]["is_stale"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"]["matches"], [{"name": "first", "score": 0.2}])
+        self.assertIsNone(response.data["next"])
+
+    def test_stale_scores_are_reported(self):
+        self.store_matches(0.2, 0.9, stale=True)
+        response = self.client.get(self.url)
+        self.assertTrue(response.data["results"]["is_stale"])
+
+    def test_refresh_is_queued_for_the_owner_only(self):
+        self.store_matches(0.2)
+        with mock.patch("matching.views.submit_job_refresh") as submit_job_refresh:
+            self.client.force_authenticate(create_recruiter("other").user)
+            self.assertEqual(self.client.get(self.url, {"refresh": "true"}).status_code, 403)
+            submit_job_refresh.assert_not_called()
+
+            self.client.force_authenticate(self.recruiter.user)
+            self.assertEqual(self.client.get(self.url, {"refresh": "true"}).status_code, 200)
+            submit_job_refresh.assert_called_once_with(self.job)
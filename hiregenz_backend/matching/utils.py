@@ -1,30 +1,116 @@
-from sentence_transformers import SentenceTransformer, util
 import numpy as np
-
-# Load embedding model (reuse across requests)
-model = SentenceTransformer('bert-base-nli-mean-tokens')
+from helpers.instrumentation import span
+from helpers.model_registry import get_embedding_model
 
 # Preprocess text
 def preprocess_text(text):
     return text.lower().strip()
 
-def calculate_similarity(list1, list2, model):
+def split_phrases(text):
+    """
+    Split a comma-separated text field into normalized, lowercase phrases.
+    """
+    if not text:
+        return []
+    return [phrase.lower().strip() for phrase in preprocess_text(text).split(", ")]
+
+def candidate_phrases(candidate):
+    """
+    Return the phrase lists of a candidate that take part in semantic matching.
+    """
+    return {
+        "skills": split_phrases(candidate.skills),
+        "certifications": split_phrases(candidate.certifications),
+        "education": split_phrases(candidate.education),
+    }
+
+def job_phrases(job):
+    """
+    Return the phrase lists of a job post that take part in semantic matching.
+    """
+    return {
+        "skills": [skill.lower().strip() for skill in job.key_skills] if job.key_skills else [],
+        "certifications": [],  # Adjust if needed (populate if JobPost has a certifications field)
+        "education": split_phrases(job.education),
+    }
+
+@span("calculate_similarity")
+def calculate_similarity(list1, list2, model=None):
     if not list1 or not list2:
         return 0  # No similarity if either list is empty
 
+    model = model or get_embedding_model()
+
     # Generate embeddings for both lists
-    embeddings1 = model.encode(list1, convert_to_tensor=True)
-    embeddings2 = model.encode(list2, convert_to_tensor=True)
+    embeddings1 = model.encode(list1, convert_to_numpy=True)
+    embeddings2 = model.encode(list2, convert_to_numpy=True)
 
-    # Compute cosine similarities
-    similarities = util.cos_sim(embeddings1, embeddings2)
+    return calculate_embedding_similarity(embeddings1, embeddings2)
 
-    # Handle edge cases for empty similarity
-    if similarities.numel() == 0:  # Check if tensor is empty
-        return 0
+def calculate_embedding_similarity(embeddings1, embeddings2):
+    """
+    Same as `calculate_similarity`, but works on precomputed phrase embeddings.
+    """
+    if len(embeddings1) == 0 or len(embeddings2) == 0:
+        return 0  # No similarity if either list is empty
+
+    # Compute cosine similarities
+    similarities = normalize_rows(np.asarray(embeddings1)) @ normalize_rows(np.asarray(embeddings2)).T
 
     # Calculate the average similarity score
-    return np.mean(similarities.cpu().numpy())
+    return np.mean(similarities)
+
+
+def normalize_rows(embeddings):
+    """
+    L2-normalize each row of a 2-D array (zero rows are left as zeros).
+    """
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-8)
+
+def pooled_embedding(embeddings):
+    """
+    Mean of the L2-normalized phrase embeddings.
+
+    The mean of a cosine-similarity matrix equals the dot product of the two
+    pooled vectors, so `pooled_embedding(a) @ pooled_embedding(b)` gives the
+    same value as `calculate_embedding_similarity(a, b)`.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if len(embeddings) == 0:
+        return None
+    return normalize_rows(embeddings).mean(axis=0)
+
+def stack_pooled_embeddings(embedding_lists, dimensions):
+    """
+    Pool a ragged list of (phrases, dimensions) arrays into an (N, dimensions) matrix.
+
+    Returns the matrix and a boolean mask of the rows that had at least one phrase.
+    """
+    counts = np.array([len(embeddings) for embeddings in embedding_lists], dtype=np.int64)
+    pooled = np.zeros((len(embedding_lists), dimensions), dtype=np.float32)
+    present = counts > 0
+    if not present.any():
+        return pooled, present
+
+    # One concatenation and one segmented sum instead of a loop over candidates
+    flat = normalize_rows(np.concatenate(
+        [embeddings for embeddings in embedding_lists if len(embeddings)]
+    ).astype(np.float32, copy=False))
+    offsets = np.concatenate(([0], np.cumsum(counts[present])[:-1]))
+    pooled[present] = np.add.reduceat(flat, offsets, axis=0) / counts[present, None]
+    return pooled, present
+
+def batch_similarity(pooled_candidates, present, job_embeddings):
+    """
+    Average cosine similarity of every candidate row against one job phrase list.
+    """
+    job_vector = pooled_embedding(job_embeddings)
+    if job_vector is None:
+        return np.zeros(len(pooled_candidates), dtype=np.float32)
+    scores = pooled_candidates @ job_vector
+    scores[~present] = 0  # No similarity if the candidate list is empty
+    return scores
 
 
 # Match salary ranges
@@ -39,3 +125,14 @@ def match_locations(candidate_locations, job_locations):
     if not candidate_locations or not job_locations:
         return 0
     return len(set(candidate_locations) & set(job_locations)) > 0
+
+def batch_match_salary(expected_min, expected_max, offered_min, offered_max):
+    """
+    Vectorized `match_salary` over arrays of candidate expectations (NaN or 0 = missing).
+    """
+    if not (offered_min and offered_max):
+        return np.zeros(len(expected_min), dtype=np.float32)
+    complete = (np.nan_to_num(expected_min) != 0) & (np.nan_to_num(expected_max) != 0)
+    with np.errstate(invalid="ignore"):
+        overlap = (expected_max >= offered_min) & (offered_max >= expected_min)
+    return (complete & overlap).astype(np.float32)
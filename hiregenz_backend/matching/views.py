@@ -1,22 +1,26 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.db.models import Count, Min, Q
 from users.models import Candidate
 from jobs.models import JobPost
-from .matching import match_candidate_to_job
+from .models import Match
+from .scores import refresh_job_matches, submit_job_refresh
 from helpers.permission import IsRecruiter  # Import the IsRecruiter permission
+from helpers.pagination import KeysetPagination, requested_fields
 
+MATCH_FIELDS = ["candidate_id", "name", "email", "resume_file", "score"]
 
-class MatchCandidatesPagination(PageNumberPagination):
+
+class MatchCandidatesPagination(KeysetPagination):
     """
-    Custom pagination class for matching candidates.
+    Custom pagination class for matching candidates: best score first, keyset on the score.
     """
     page_size = 20  # Number of candidates per page
-    page_size_query_param = 'page_size'  # Allow the client to control page size
     max_page_size = 100  # Maximum allowed page size
+    ordering = ('-match_score', 'candidate_id')
 
 
 class MatchCandidatesView(APIView):
@@ -32,48 +36,56 @@ class MatchCandidatesView(APIView):
                 status=HTTP_403_FORBIDDEN
             )
 
+        fields = requested_fields(request, MATCH_FIELDS)  # Sparse fieldset, e.g. ?fields=candidate_id,score
+
         try:
             # Fetch the job
             job = get_object_or_404(JobPost, id=job_id)
 
-            # Fetch only required fields from candidates using optimized query
-            candidates = Candidate.objects.only(
-                "id", "name", "email", "resume_file", "skills"
-            ).all()
-
-            if not candidates.exists():
+            if not Candidate.objects.exists():
                 return Response(
                     {"detail": "No candidates found."},
                     status=HTTP_404_NOT_FOUND
                 )
 
-            # Optimize matching by using lazy evaluation and batching
-            ranked_candidates = []
-            for candidate in candidates.iterator():  # Use iterator for batch processing
-                score = match_candidate_to_job(candidate, job)
-                ranked_candidates.append({
-                    "candidate_id": candidate.id,
-                    "name": candidate.name,
-                    "email": candidate.email,
-                    "resume_file": self.get_resume_url(candidate.resume_file),
-                    "score": score,
-                })
-
-            # Sort candidates by score in descending order
-            ranked_candidates.sort(key=lambda x: x["score"], reverse=True)
-
-            # Calculate total candidates matched
-            total_matched = len(ranked_candidates)
-
-            # Apply pagination
+            # Scores are materialized in the Match table and computed once per job (on
+            # first access if no refresh ran yet). The job's recruiter can queue a
+            # recompute with ?refresh=true; scores show as stale until it is done.
+            matches = Match.objects.filter(job_post=job)
+            if request.query_params.get("refresh", "").lower() in ("1", "true"):
+                recruiter = getattr(request.user, "recruiter_profile", None)
+                if recruiter is None or job.recruiter_id != recruiter.id:
+                    return Response(
+                        {"detail": "Only the job's recruiter can refresh its matches."},
+                        status=HTTP_403_FORBIDDEN
+                    )
+                submit_job_refresh(job)
+            elif job.matches_computed_at is None:
+                refresh_job_matches(job)
+
+            ranked_matches = matches.select_related("candidate").only(
+                "match_score", "is_stale", "updated_at",
+                "candidate", "candidate__name", "candidate__email", "candidate__resume_file",
+            )
+
+            # Apply keyset pagination on the indexed score ordering
             paginator = MatchCandidatesPagination()
-            paginated_data = paginator.paginate_queryset(ranked_candidates, request)
+            page = paginator.paginate_queryset(ranked_matches, request, view=self)
+            paginated_data = [
+                {field: value for field, value in self.match_data(match).items() if field in fields}
+                for match in page
+            ]
+            freshness = matches.aggregate(
+                total=Count("id"), computed_at=Min("updated_at"), stale=Count("id", filter=Q(is_stale=True))
+            )
 
             # Return paginated response
             return paginator.get_paginated_response({
                 "job_id": job.id,
                 "job_title": job.title,
-                "total_matched": total_matched,  # Include the total count of matched candidates
+                "total_matched": freshness["total"],  # Include the total count of matched candidates
+                "is_stale": freshness["stale"] > 0,  # Some scores are outdated; a refresh is queued or needed
+                "computed_at": freshness["computed_at"] or job.matches_computed_at,
                 "matches": paginated_data,
             })
 
@@ -88,6 +100,15 @@ class MatchCandidatesView(APIView):
                 status=HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def match_data(self, match):
+        return {
+            "candidate_id": match.candidate.id,
+            "name": match.candidate.name,
+            "email": match.candidate.email,
+            "resume_file": self.get_resume_url(match.candidate.resume_file),
+            "score": match.match_score,
+        }
+
     def get_resume_url(self, resume_file):
         """
         Generate the full URL for the candidate's resume file.
@@ -0,0 +1,28 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from notifications.outbox import drain_outbox, requeue_stale
+
+
+class Command(BaseCommand):
+    help = "Send due outbox emails (retries, and emails left behind by a restarted web worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for due emails.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop.")
+        parser.add_argument("--stale-minutes", type=int, default=10,
+                            help="Requeue emails stuck in 'sending' for longer than this.")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale(timedelta(minutes=options["stale_minutes"]))
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale email(s).")
+
+            processed = drain_outbox()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} email(s)."))
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,40 @@
+import uuid
+from django.db import models
+from django.utils.timezone import now
+
+
+class EmailDelivery(models.Model):
+    """
+    One outgoing email and its delivery status (the outbox), written in the same
+    transaction as the change that triggers it and sent by a background worker.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    batch_id = models.UUIDField(default=uuid.uuid4, db_index=True)  # Emails queued together
+    category = models.CharField(max_length=50)  # e.g. 'test_link', 'otp'
+    reference = models.CharField(max_length=100, null=True, blank=True)  # e.g. the test token
+    to_email = models.EmailField()
+    from_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=now)  # Retries are scheduled with backoff
+    claimed_at = models.DateTimeField(null=True, blank=True)  # When a worker took it ('sending')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_delivery_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
@@ -0,0 +1,287 @@
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import Count, Min
+from django.utils.timezone import now
+from helpers.instrumentation import register_collector, span
+from helpers.workers import run_in_background
+from .models import EmailDelivery
+
+logger = logging.getLogger(__name__)
+
+
+def queue_emails(messages, category):
+    """
+    Record emails to send and hand them to the outbox worker once the current
+    transaction commits. `messages` are dicts with to_email, subject, body and
+    optionally html_body, from_email and reference. Returns the batch id.
+    """
+    batch_id = uuid.uuid4()
+    EmailDelivery.objects.bulk_create([
+        EmailDelivery(
+            batch_id=batch_id,
+            category=category,
+            reference=message.get("reference"),
+            to_email=message["to_email"],
+            from_email=message.get("from_email") or settings.DEFAULT_FROM_EMAIL,
+            subject=message["subject"],
+            body=message["body"],
+            html_body=message.get("html_body"),
+        )
+        for message in messages
+    ], batch_size=500)
+    transaction.on_commit(submit_drain)
+    return batch_id
+
+
+def queue_email(to_email, subject, body="", html_body=None, category="transactional", reference=None):
+    """
+    Record one email in the outbox; it is sent after the current transaction commits.
+    """
+    return queue_emails([{
+        "to_email": to_email,
+        "subject": subject,
+        "body": body,
+        "html_body": html_body,
+        "reference": reference,
+    }], category)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the outbox threads of a process (`rate` messages per second, 0 = unlimited).
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                current = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (current - self.updated) * self.rate)
+                self.updated = current
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class OutboxMetrics:
+    """
+    Counters and recent send latencies of this process's outbox worker.
+    """
+
+    def __init__(self, samples=1000):
+        self.lock = threading.Lock()
+        self.sent = self.failed = self.retried = 0
+        self.send_seconds = deque(maxlen=samples)  # SMTP time per message
+        self.delivery_seconds = deque(maxlen=samples)  # From queued to sent
+
+    def record_sent(self, delivery, send_seconds):
+        with self.lock:
+            self.sent += 1
+            self.send_seconds.append(send_seconds)
+            self.delivery_seconds.append((delivery.sent_at - delivery.created_at).total_seconds())
+
+    def record_failure(self, will_retry):
+        with self.lock:
+            if will_retry:
+                self.retried += 1
+            else:
+                self.failed += 1
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "sent": self.sent,
+                "failed": self.failed,
+                "retried": self.retried,
+                "send_seconds": summarize(self.send_seconds),
+                "delivery_seconds": summarize(self.delivery_seconds),
+            }
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0, "avg": None, "p50": None, "p95": None, "max": None}
+    return {
+        "count": len(ordered),
+        "avg": sum(ordered) / len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+rate_limiter = RateLimiter(settings.EMAIL_OUTBOX_RATE_LIMIT)
+metrics = OutboxMetrics()
+
+
+def submit_drain():
+    """
+    Drain the outbox now (EMAIL_OUTBOX_SYNC) or on the background outbox pool.
+    """
+    if settings.EMAIL_OUTBOX_SYNC:
+        drain_outbox()
+    else:
+        run_in_background('email-outbox', settings.EMAIL_OUTBOX_WORKERS, drain_outbox)
+
+
+def claim_due(limit):
+    """
+    Atomically move up to `limit` due emails from pending to sending; returns them.
+    Concurrent workers claim disjoint rows.
+    """
+    with transaction.atomic():
+        due = EmailDelivery.objects.filter(status='pending', next_attempt_at__lte=now()).order_by('next_attempt_at')
+        if db_connection.features.has_select_for_update_skip_locked:
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+        else:
+            ids = list(due.values_list('id', flat=True)[:limit])
+        claimed_at = now()
+        # The status filter makes the claim safe on databases without row locks
+        EmailDelivery.objects.filter(id__in=ids, status='pending').update(status='sending', claimed_at=claimed_at)
+    return list(EmailDelivery.objects.filter(id__in=ids, status='sending', claimed_at=claimed_at).order_by('id'))
+
+
+def build_message(delivery, connection):
+    message = EmailMultiAlternatives(
+        delivery.subject, delivery.body, delivery.from_email, [delivery.to_email], connection=connection
+    )
+    if delivery.html_body:
+        message.attach_alternative(delivery.html_body, "text/html")
+    return message
+
+
+def drain_outbox(batch_size=None):
+    """
+    Send due emails in batches, each batch over one SMTP connection, until none are left.
+    Returns the number of emails processed.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    processed = 0
+    while True:
+        batch = claim_due(batch_size)
+        if not batch:
+            break
+        send_batch(batch)
+        processed += len(batch)
+    return processed
+
+
+def send_batch(batch):
+    """
+    Send claimed emails over a single connection, rate limited, and record each outcome.
+    Failures are retried with exponential backoff up to EMAIL_OUTBOX_MAX_ATTEMPTS.
+    """
+    connection = get_connection(fail_silently=False)
+    try:
+        with span("smtp_connect"):
+            connection.open()
+    except Exception as e:
+        logger.warning(f"Could not connect to the email server: {e}")
+        for delivery in batch:
+            fail(delivery, e)
+        EmailDelivery.objects.bulk_update(batch, ['status', 'error', 'attempts', 'next_attempt_at'])
+        schedule_retry(batch)
+        return
+
+    try:
+        for delivery in batch:
+            rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                # One message per call so a bad address only fails its own row
+                with span("smtp_send"):
+                    connection.send_messages([build_message(delivery, connection)])
+            except Exception as e:
+                fail(delivery, e)
+                continue
+            delivery.status, delivery.sent_at, delivery.error = 'sent', now(), None
+            delivery.attempts += 1
+            metrics.record_sent(delivery, time.perf_counter() - started)
+    finally:
+        connection.close()
+
+    EmailDelivery.objects.bulk_update(batch, ['status', 'sent_at', 'error', 'attempts', 'next_attempt_at'])
+    schedule_retry(batch)
+
+
+def fail(delivery, error):
+    delivery.attempts += 1
+    delivery.error = str(error)
+    will_retry = delivery.attempts < settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    if will_retry:
+        delay = settings.EMAIL_OUTBOX_RETRY_BACKOFF * 2 ** (delivery.attempts - 1)
+        delivery.status, delivery.next_attempt_at = 'pending', now() + timedelta(seconds=delay)
+    else:
+        delivery.status = 'failed'
+        logger.warning(f"Giving up on email {delivery.id} to {delivery.to_email}: {error}")
+    metrics.record_failure(will_retry)
+
+
+def schedule_retry(batch):
+    """
+    Wake the outbox up when the earliest retry of the batch is due.
+    """
+    retries = [delivery.next_attempt_at for delivery in batch if delivery.status == 'pending']
+    if retries and not settings.EMAIL_OUTBOX_SYNC:
+        delay = max(0.0, (min(retries) - now()).total_seconds())
+        timer = threading.Timer(delay, submit_drain)
+        timer.daemon = True
+        timer.start()
+
+
+def requeue_stale(older_than):
+    """
+    Put back emails left in 'sending' by a worker that died; returns how many.
+    """
+    return EmailDelivery.objects.filter(status='sending', claimed_at__lt=now() - older_than).update(
+        status='pending', next_attempt_at=now()
+    )
+
+
+def outbox_metrics():
+    """
+    Queue depth by status, age of the oldest due email and this process's send counters/latencies.
+    """
+    depth = dict(EmailDelivery.objects.values_list('status').annotate(count=Count('id')).order_by())
+    oldest = EmailDelivery.objects.filter(status='pending', next_attempt_at__lte=now()).aggregate(
+        oldest=Min('created_at')
+    )['oldest']
+    return {
+        "queue": {status: depth.get(status, 0) for status, _ in EmailDelivery.STATUS_CHOICES},
+        "oldest_pending_seconds": (now() - oldest).total_seconds() if oldest else 0.0,
+        "worker": metrics.as_dict(),
+    }
+
+
+def outbox_samples():
+    """Outbox queue depth and send counters, for the Prometheus endpoint."""
+    data = outbox_metrics()
+    return [
+        ("hiregenz_outbox_emails", "gauge", "Emails in the outbox, by status.",
+         [({"status": status}, count) for status, count in data["queue"].items()]),
+        ("hiregenz_outbox_oldest_pending_seconds", "gauge", "Age of the oldest due email.",
+         [({}, data["oldest_pending_seconds"])]),
+        ("hiregenz_outbox_sends_total", "counter", "Send attempts of this process's outbox worker, by outcome.",
+         [({"outcome": outcome}, data["worker"][outcome]) for outcome in ("sent", "failed", "retried")]),
+    ]
+
+
+register_collector(outbox_samples)
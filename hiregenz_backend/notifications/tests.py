@@ -0,0 +1,87 @@
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from .models import EmailDelivery
+from .outbox import RateLimiter, claim_due, drain_outbox, queue_email, queue_emails
+
+
+def messages(*addresses):
+    return [{"to_email": address, "subject": "Hello", "body": "Hi"} for address in addresses]
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend", EMAIL_OUTBOX_SYNC=True,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_RETRY_BACKOFF=30,
+)
+@mock.patch("notifications.outbox.rate_limiter", RateLimiter(0))
+class OutboxTests(TestCase):
+    def test_sent_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_email("jane@example.com", "Welcome", "Hi Jane", category="welcome")
+            self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(mail.outbox[0].to, ["jane@example.com"])
+        delivery = EmailDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts, delivery.category), ("sent", 1, "welcome"))
+        self.assertIsNotNone(delivery.sent_at)
+
+    def test_claim_due(self):
+        with self.captureOnCommitCallbacks():
+            queue_emails(messages("a@example.com", "b@example.com", "later@example.com"), "test_link")
+        EmailDelivery.objects.filter(to_email="later@example.com").update(
+            next_attempt_at=now() + timedelta(minutes=5)
+        )
+        claimed = claim_due(10)
+        self.assertEqual([delivery.to_email for delivery in claimed], ["a@example.com", "b@example.com"])
+        self.assertTrue(all(delivery.status == "sending" and delivery.claimed_at for delivery in claimed))
+        # Claimed rows are not handed out again
+        self.assertEqual(claim_due(10), [])
+        self.assertEqual(EmailDelivery.objects.filter(status="pending").count(), 1)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        def send_messages(email_messages):
+            if email_messages[0].to == ["bad@example.com"]:
+                raise SMTPException("mailbox unavailable")
+            return 1
+
+        connection = mock.MagicMock(send_messages=mock.MagicMock(side_effect=send_messages))
+        with self.captureOnCommitCallbacks(), \
+                mock.patch("notifications.outbox.get_connection", return_value=connection):
+            queue_emails(messages("good@example.com", "bad@example.com"), "test_link")
+            started = now()
+            self.assertEqual(drain_outbox(), 2)
+
+            # A bad address only fails its own row
+            self.assertEqual(EmailDelivery.objects.get(to_email="good@example.com").status, "sent")
+            bad = EmailDelivery.objects.get(to_email="bad@example.com")
+            self.assertEqual((bad.status, bad.attempts, bad.error), ("pending", 1, "mailbox unavailable"))
+            self.assertGreaterEqual(bad.next_attempt_at, started + timedelta(seconds=30))
+            # Not due yet
+            self.assertEqual(drain_outbox(), 0)
+
+            EmailDelivery.objects.filter(id=bad.id).update(next_attempt_at=now())
+            started = now()
+            drain_outbox()
+            bad.refresh_from_db()
+            self.assertEqual((bad.status, bad.attempts), ("pending", 2))
+            self.assertGreaterEqual(bad.next_attempt_at, started + timedelta(seconds=60))
+
+            # Gives up after EMAIL_OUTBOX_MAX_ATTEMPTS
+            EmailDelivery.objects.filter(id=bad.id).update(next_attempt_at=now())
+            drain_outbox()
+            bad.refresh_from_db()
+            self.assertEqual((bad.status, bad.attempts), ("failed", 3))
+
+    def test_connection_failure_retries_the_batch(self):
+        connection = mock.MagicMock(open=mock.MagicMock(side_effect=OSError("connection refused")))
+        with self.captureOnCommitCallbacks(), \
+                mock.patch("notifications.outbox.get_connection", return_value=connection):
+            queue_emails(messages("a@example.com", "b@example.com"), "otp")
+            drain_outbox()
+        self.assertEqual(
+            list(EmailDelivery.objects.values_list("status", "attempts", "error").distinct()),
+            [("pending", 1, "connection refused")],
+        )
+        connection.send_messages.assert_not_called()
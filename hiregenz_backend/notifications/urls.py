@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import OutboxMetricsView
+
+urlpatterns = [
+    path('outbox/metrics/', OutboxMetricsView.as_view(), name='outbox-metrics'),
+]
@@ -0,0 +1,14 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from .outbox import outbox_metrics
+
+
+class OutboxMetricsView(APIView):
+    """
+    Outbox queue depth and this process's send counters and latencies (staff only).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(outbox_metrics())
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Test
+from .models import Test, BankQuestion, QuestionSet
 
 admin.site.register(Test)
+admin.site.register(BankQuestion)
+admin.site.register(QuestionSet)
 
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from jobs.models import JobPost
+from tests.models import Test
+
+
+class Command(BaseCommand):
+    help = "Link tests created before Test.job_post existed to their job (same recruiter and description)."
+
+    def handle(self, *args, **options):
+        linked = 0
+        for job in JobPost.objects.filter(recruiter__tests__job_post__isnull=True).distinct().iterator():
+            linked += Test.objects.filter(
+                job_post__isnull=True, recruiter_id=job.recruiter_id, job_description=job.description
+            ).update(job_post=job)
+        self.stdout.write(self.style.SUCCESS(f"Linked {linked} test(s) to their job."))
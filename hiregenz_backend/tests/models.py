@@ -1,4 +1,5 @@
 import uuid
+import numpy as np
 from django.db import models
 from users.models import Candidate, Recruiter
 from django.utils.timezone import now
@@ -6,6 +7,7 @@ from django.utils.timezone import now
 class Test(models.Model):
     candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='tests')
     recruiter = models.ForeignKey(Recruiter, on_delete=models.CASCADE, related_name='tests')
+    job_post = models.ForeignKey('jobs.JobPost', on_delete=models.CASCADE, related_name='tests', null=True, blank=True)
     job_description = models.TextField()
     questions = models.JSONField()  # Store generated questions
     candidate_answers = models.JSONField(null=True, blank=True)  # Store candidate's submitted answers
@@ -16,6 +18,14 @@ class Test(models.Model):
     started_at = models.DateTimeField(null=True, blank=True)  # Test started timestamp
     submitted_at = models.DateTimeField(null=True, blank=True)  # Test submitted timestamp
 
+    class Meta:
+        indexes = [
+            # Ranking of a job's completed tests (RankStudentsByJobView)
+            models.Index(fields=['job_post', 'is_completed', '-score'], name='test_job_ranking_idx'),
+            # A recruiter's completed / pending tests
+            models.Index(fields=['recruiter', 'is_completed'], name='test_recruiter_done_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         # Automatically set submitted_at when is_completed changes to True
         if self.is_completed and not self.submitted_at:
@@ -24,3 +34,53 @@ class Test(models.Model):
 
     def __str__(self):
         return f"Test for {self.candidate.name} by {self.recruiter.company_name}"
+
+
+class BankQuestion(models.Model):
+    """
+    A generated MCQ kept for reuse, tagged with the (canonical) skill it tests.
+    """
+    skill = models.CharField(max_length=100, db_index=True)  # Canonical skill name, see users/skills.py
+    question = models.TextField()
+    options = models.JSONField()
+    answer = models.TextField()
+    question_hash = models.CharField(max_length=64, unique=True)  # SHA-256 of the normalized question text
+    model_name = models.CharField(max_length=100)  # Embedding model of `embedding`
+    embedding = models.BinaryField()  # float32 embedding of the question, used to skip near-duplicates
+    times_used = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def as_mcq(self):
+        return {"question": self.question, "options": self.options, "answer": self.answer}
+
+    def as_array(self):
+        return np.frombuffer(bytes(self.embedding), dtype=np.float32)
+
+    def __str__(self):
+        return f"[{self.skill}] {self.question[:60]}"
+
+
+class QuestionSet(models.Model):
+    """
+    The questions assembled for a job description, reused for near-identical descriptions.
+    """
+    description_hash = models.CharField(max_length=64)
+    model_name = models.CharField(max_length=100)
+    embedding = models.BinaryField()  # float32 embedding of the job description
+    skills = models.JSONField(default=list)
+    skills_key = models.CharField(max_length=64, default="")  # SHA-256 of the sorted skills, for reuse lookups
+    questions = models.JSONField()
+    times_reused = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model_name', 'description_hash'], name='question_set_lookup_idx'),
+            models.Index(fields=['model_name', 'skills_key'], name='question_set_skills_idx'),
+        ]
+
+    def as_array(self):
+        return np.frombuffer(bytes(self.embedding), dtype=np.float32)
+
+    def __str__(self):
+        return f"Question set {self.id} ({len(self.questions)} questions)"
@@ -0,0 +1,224 @@
+import hashlib
+import logging
+import numpy as np
+from django.conf import settings
+from django.db.models import F
+from helpers.llm import LLMError
+from matching.embeddings import encode_phrases
+from users.skills import SKILL_MATCHER
+from .models import BankQuestion, QuestionSet
+from .utils import generate_mcqs, generate_skill_mcqs
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text):
+    """
+    SHA-256 of a text, ignoring case and whitespace differences.
+    """
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def unit_vectors(texts):
+    """
+    Embed texts with the shared model; returns L2-normalized float32 rows.
+    """
+    vectors = encode_phrases(list(texts))
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+
+
+def canonical_skill(name):
+    """
+    Canonical name of a skill ("ReactJS" -> "React"), so questions are shared across spellings.
+    """
+    found = SKILL_MATCHER.extract(name)
+    return max(found, key=len) if found else name.strip()
+
+
+def job_skills(job):
+    """
+    The job's key skills, canonicalized and de-duplicated, in their original order.
+    """
+    skills = []
+    for name in job.key_skills or []:
+        skill = canonical_skill(str(name))
+        if skill and skill.lower() not in {known.lower() for known in skills}:
+            skills.append(skill)
+    return skills
+
+
+def skills_key(skills):
+    """
+    Fingerprint of a skill set, independent of order and case.
+    """
+    return hashlib.sha256("\n".join(sorted(skill.lower() for skill in skills)).encode("utf-8")).hexdigest()
+
+
+def split_quota(skills, count):
+    """
+    Spread `count` questions over the skills as evenly as possible, earlier skills first.
+    """
+    quotas = {skill: 0 for skill in skills}
+    for position in range(count):
+        quotas[skills[position % len(skills)]] += 1
+    return {skill: quota for skill, quota in quotas.items() if quota}
+
+
+def find_question_set(description_hash, vector, skills):
+    """
+    A stored question set for the same or a near-identical job description
+    with the same key skills, or None.
+    """
+    # Only sets built for the same skills can be reused; the index narrows the vector comparison to those
+    sets = QuestionSet.objects.filter(model_name=settings.EMBEDDING_MODEL_NAME, skills_key=skills_key(skills))
+    exact = sets.filter(description_hash=description_hash).first()
+    if exact is not None:
+        return exact
+
+    candidates = list(sets.values_list("id", "embedding"))
+    if not candidates:
+        return None
+    matrix = np.stack([np.frombuffer(bytes(embedding), dtype=np.float32) for _, embedding in candidates])
+    if matrix.shape[1] != vector.shape[0]:
+        return None
+    similarities = matrix @ vector
+    best = int(np.argmax(similarities))
+    if similarities[best] < settings.MCQ_REUSE_SIMILARITY:
+        return None
+    return QuestionSet.objects.get(id=candidates[best][0])
+
+
+def store_questions(mcqs):
+    """
+    Add generated questions to the bank. Returns one BankQuestion per input;
+    questions already banked (same text, or a near-duplicate for the same skill)
+    resolve to the existing entry instead of being stored twice.
+    """
+    if not mcqs:
+        return []
+    skills = [canonical_skill(mcq.get("skill", "")) for mcq in mcqs]
+    hashes = [text_hash(mcq["question"]) for mcq in mcqs]
+    vectors = unit_vectors([mcq["question"] for mcq in mcqs])
+
+    existing = {question.question_hash: question for question in BankQuestion.objects.filter(question_hash__in=hashes)}
+    banked = {}  # skill -> [(vector, question)], for near-duplicate checks
+    for question in BankQuestion.objects.filter(skill__in=set(skills), model_name=settings.EMBEDDING_MODEL_NAME):
+        banked.setdefault(question.skill, []).append((question.as_array(), question))
+
+    results, new = [], []
+    for mcq, skill, question_hash, vector in zip(mcqs, skills, hashes, vectors):
+        match = existing.get(question_hash)
+        if match is None:
+            for other_vector, other in banked.get(skill, []):
+                if len(other_vector) == len(vector) and float(other_vector @ vector) >= settings.MCQ_DUPLICATE_SIMILARITY:
+                    match = other
+                    break
+        if match is None:
+            match = BankQuestion(
+                skill=skill,
+                question=mcq["question"],
+                options=mcq["options"],
+                answer=mcq["answer"],
+                question_hash=question_hash,
+                model_name=settings.EMBEDDING_MODEL_NAME,
+                embedding=vector.astype(np.float32).tobytes(),
+            )
+            new.append(match)
+            existing[question_hash] = match
+            banked.setdefault(skill, []).append((vector, match))
+        results.append(match)
+
+    BankQuestion.objects.bulk_create(new, ignore_conflicts=True)
+    # ignore_conflicts does not set primary keys; look them up (also covers rows another process inserted)
+    ids = dict(BankQuestion.objects.filter(question_hash__in=[question.question_hash for question in new])
+               .values_list("question_hash", "id"))
+    for question in new:
+        question.id = ids.get(question.question_hash)
+    return results
+
+
+def build_test_questions(job, count=None):
+    """
+    Assemble the MCQs of a job's test, calling the LLM as little as possible:
+
+    1. a job with the same or a near-identical description (MCQ_REUSE_SIMILARITY)
+       and the same key skills reuses its question set as is;
+    2. otherwise questions are taken from the bank for each key skill, least
+       used first;
+    3. only skills without enough banked questions are sent to the LLM, in a
+       single call, and the new questions are banked for the next jobs.
+    """
+    count = count or settings.MCQ_QUESTIONS_PER_TEST
+    description_hash = text_hash(job.description)
+    vector = unit_vectors([job.description])[0]
+    skills = job_skills(job)
+
+    question_set = find_question_set(description_hash, vector, skills)
+    if question_set is not None:
+        QuestionSet.objects.filter(id=question_set.id).update(times_reused=F("times_reused") + 1)
+        return question_set.questions
+
+    if skills:
+        questions = assemble_from_bank(job, skills, count)
+    else:
+        # Nothing to tag questions with; generate from the description alone
+        questions = generate_mcqs(job.description)[:count]
+
+    QuestionSet.objects.create(
+        description_hash=description_hash,
+        model_name=settings.EMBEDDING_MODEL_NAME,
+        embedding=vector.astype(np.float32).tobytes(),
+        skills=skills,
+        skills_key=skills_key(skills),
+        questions=questions,
+    )
+    return questions
+
+
+def assemble_from_bank(job, skills, count):
+    """
+    Pick banked questions per skill, generating only the shortfall.
+    """
+    quotas = split_quota(skills, count)
+    banked = BankQuestion.objects.filter(model_name=settings.EMBEDDING_MODEL_NAME)
+    picked = {
+        skill: list(banked.filter(skill=skill).order_by("times_used", "id")[:quota])
+        for skill, quota in quotas.items()
+    }
+
+    missing = {skill: quota - len(picked[skill]) for skill, quota in quotas.items() if len(picked[skill]) < quota}
+    if missing:
+        try:
+            generated = store_questions(generate_skill_mcqs(job.description, missing))
+        except LLMError as e:
+            if not any(picked.values()):
+                raise
+            logger.warning(f"Question generation failed, using banked questions only: {e}")
+            generated = []
+
+        spare = []
+        chosen = {question.question_hash for questions in picked.values() for question in questions}
+        for question in generated:
+            if question.question_hash in chosen:
+                continue
+            chosen.add(question.question_hash)
+            if question.skill in missing and missing[question.skill] > 0:
+                picked[question.skill].append(question)
+                missing[question.skill] -= 1
+            else:
+                spare.append(question)
+        # Questions the LLM tagged with another skill name still fill the gaps
+        for skill, shortfall in missing.items():
+            while shortfall > 0 and spare:
+                picked[skill].append(spare.pop(0))
+                shortfall -= 1
+
+    # Interleave skills so the test does not cluster questions by topic
+    ordered = []
+    for position in range(max(len(questions) for questions in picked.values())):
+        ordered.extend(questions[position] for questions in picked.values() if position < len(questions))
+
+    BankQuestion.objects.filter(id__in=[question.id for question in ordered]).update(
+        times_used=F("times_used") + 1
+    )
+    return [question.as_mcq() for question in ordered]
@@ -1,3 +1,161 @@
-from django.test import TestCase
+import hashlib
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from jobs.models import JobPost
+from notifications.models import EmailDelivery
+from notifications.outbox import RateLimiter
+from matching.tests import create_candidates, create_job, create_recruiter
+from .models import BankQuestion, QuestionSet, Test
+from .question_bank import build_test_questions
 
-# Create your tests here.
+
+def fake_unit_vectors(texts):
+    # Deterministic stand-in for the embedding model: one random unit vector per distinct text
+    rows = [np.random.default_rng(int(hashlib.md5(text.encode()).hexdigest()[:8], 16)).normal(size=8) for text in texts]
+    vectors = np.array(rows, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def fake_skill_mcqs(job_description, skill_counts):
+    return [
+        {"skill": skill, "question": f"{skill} question {number}?", "options": ["a", "b", "c", "d"], "answer": "a"}
+        for skill, count in skill_counts.items() for number in range(count)
+    ]
+
+
+@override_settings(EMBEDDING_MODEL_NAME="test-model", MCQ_QUESTIONS_PER_TEST=2)
+@mock.patch("tests.question_bank.unit_vectors", fake_unit_vectors)
+class QuestionBankTests(TestCase):
+    description = "Backend developer building APIs."
+
+    def build(self, key_skills, description=None):
+        job = JobPost(description=description or self.description, key_skills=key_skills)
+        with mock.patch("tests.question_bank.generate_skill_mcqs", side_effect=fake_skill_mcqs) as generate:
+            questions = build_test_questions(job)
+        return questions, generate.call_count
+
+    def test_same_description_and_skills_reuses_the_set(self):
+        first, _ = self.build(["Python", "Django"])
+        second, calls = self.build(["django", "Python"])
+        self.assertEqual(second, first)
+        self.assertEqual(calls, 0)
+        self.assertEqual(QuestionSet.objects.get().times_reused, 1)
+
+    def test_same_description_with_other_skills_is_not_reused(self):
+        self.build(["Python", "Django"])
+        questions, calls = self.build(["Java", "Spring Boot"])
+        self.assertEqual(calls, 1)
+        self.assertEqual(
+            {question["question"] for question in questions}, {"Java question 0?", "Spring Boot question 0?"}
+        )
+        self.assertEqual(QuestionSet.objects.count(), 2)
+
+    def test_bank_ignores_questions_of_other_embedding_models(self):
+        BankQuestion.objects.create(
+            skill="Python", question="Old model question?", options=["a", "b"], answer="a",
+            question_hash="old", model_name="old-model", embedding=b"",
+        )
+        questions, calls = self.build(["Python"], description="Python scripting role.")
+        self.assertEqual(calls, 1)
+        self.assertNotIn("Old model question?", [question["question"] for question in questions])
+
+
+class RankStudentsByJobViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        recruiter = create_recruiter("recruiter")
+        cls.job = create_job(recruiter)
+        candidates = create_candidates(first=1, tied=1, slower=1, lower=1, pending=1)
+        started = now() - timedelta(hours=1)
+        # (score, seconds taken): "first" and "tied" share rank 1
+        results = [(9, 60), (9, 60), (9, 120), (5, 30), (None, None)]
+        Test.objects.bulk_create(
+            Test(
+                candidate=candidate, recruiter=recruiter, job_post=cls.job, job_description="", questions=[],
+                score=score, is_completed=score is not None, started_at=started,
+                submitted_at=started + timedelta(seconds=seconds) if seconds else None,
+            )
+            for candidate, (score, seconds) in zip(candidates, results)
+        )
+        cls.url = reverse("rank_students_by_job", args=[cls.job.id])
+
+    def ranking(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [(row["rank"], row["candidate_name"]) for row in response.data["ranking"]], response.data["next_cursor"]
+
+    def test_ties_share_a_rank(self):
+        ranking, next_cursor = self.ranking()
+        self.assertEqual(ranking, [(1, "first"), (1, "tied"), (3, "slower"), (4, "lower")])
+        self.assertIsNone(next_cursor)
+
+    def test_cursor_round_trip(self):
+        pages, cursor = [], None
+        while True:
+            ranking, cursor = self.ranking(limit=1, **({"cursor": cursor} if cursor else {}))
+            pages.extend(ranking)
+            if cursor is None:
+                break
+        # Paging one row at a time, also between the two tied rows, neither repeats nor skips a test
+        self.assertEqual(pages, self.ranking()[0])
+
+    def test_top(self):
+        self.assertEqual(self.ranking(top=1)[0], [(1, "first"), (1, "tied")])
+        ranking, next_cursor = self.ranking(top=3, limit=2)
+        self.assertEqual(ranking, [(1, "first"), (1, "tied")])
+        self.assertEqual(self.ranking(top=3, limit=2, cursor=next_cursor), ([(3, "slower")], None))
+
+    def test_malformed_cursor(self):
+        for cursor in ("not-base64!", "bm90IGEgY3Vyc29y", "YTpi"):
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+        self.assertEqual(self.client.get(self.url, {"limit": 0}).status_code, 400)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend", EMAIL_OUTBOX_SYNC=True)
+@mock.patch("notifications.outbox.rate_limiter", RateLimiter(0))
+class SendTestLinksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mcqs = [{"skill": "Python", "question": "Python question?", "options": ["a", "b"], "answer": "a"}]
+        cls.job = create_job(create_recruiter("recruiter"), mcqs=mcqs)
+        cls.candidates = create_candidates(jane=1, john=2)
+        cls.url = reverse("send_test_links_bulk", args=[cls.job.id])
+
+    def send(self, candidate_ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.url, {"shortlisted_candidates": candidate_ids}, content_type="application/json"
+            )
+
+    def test_one_test_and_email_per_candidate(self):
+        jane, john = self.candidates
+        response = self.send([jane.id, john.id, str(jane.id)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["tests_created"], 2)
+
+        tests = {test.candidate_id: test for test in Test.objects.filter(job_post=self.job)}
+        self.assertEqual(set(tests), {jane.id, john.id})
+        self.assertEqual(tests[jane.id].questions, self.job.mcqs)
+        # One outbox batch, sent after the commit
+        deliveries = EmailDelivery.objects.filter(batch_id=response.data["email_batch_id"])
+        self.assertEqual(
+            {(delivery.to_email, delivery.reference, delivery.status) for delivery in deliveries},
+            {(candidate.email, str(tests[candidate.id].test_token), "sent") for candidate in self.candidates},
+        )
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn(f"/tests/{tests[jane.id].test_token}/", mail.outbox[0].body + mail.outbox[1].body)
+
+    def test_invalid_candidates(self):
+        self.assertEqual(self.send([]).status_code, 400)
+        self.assertEqual(self.send(["jane"]).status_code, 400)
+        response = self.send([self.candidates[0].id, 999])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data["candidate_ids"], [999])
+        self.assertFalse(Test.objects.exists())
+        self.assertFalse(EmailDelivery.objects.exists())
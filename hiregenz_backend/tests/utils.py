@@ -1,9 +1,32 @@
-import openai
 from django.conf import settings
+from helpers.instrumentation import span
+from helpers.structured import complete_structured
 
-# Use the API key from settings
-openai.api_key = settings.OPENAI_API_KEY
+# Shape of the generated questions; answers are validated (and repaired) against it
+MCQ_SCHEMA = {
+    "type": "array",
+    "minItems": 1,
+    "items": {
+        "type": "object",
+        "required": ["question", "options", "answer"],
+        "properties": {
+            "question": {"type": "string"},
+            "options": {"type": "array", "items": {"type": "string"}, "minItems": 2},
+            "answer": {"type": "string"},
+        },
+    },
+}
 
+
+def check_mcqs(mcqs):
+    """Every answer must be one of its question's options."""
+    return [
+        f"$[{position}].answer is not one of its options."
+        for position, mcq in enumerate(mcqs) if mcq["answer"] not in mcq["options"]
+    ]
+
+
+@span("generate_mcqs")
 def generate_mcqs(job_description):
     prompt = f"""
     Generate 5 multiple-choice questions based on the following job description:
@@ -17,8 +40,41 @@ def generate_mcqs(job_description):
         }}
     ]
     """
-    response = openai.ChatCompletion.create(
-        model="gpt-4o",
-        messages=[{"role": "system", "content": prompt}]
-    )
-    return eval(response['choices'][0]['message']['content'])  # Parse JSON response
+    return complete_structured(prompt, MCQ_SCHEMA, settings.LLM_MCQ_PROVIDER, settings.LLM_MCQ_MODEL, check=check_mcqs)
+
+
+# Same as MCQ_SCHEMA, with the skill each question tests
+SKILL_MCQ_SCHEMA = {
+    **MCQ_SCHEMA,
+    "items": {
+        **MCQ_SCHEMA["items"],
+        "required": ["skill", "question", "options", "answer"],
+        "properties": {**MCQ_SCHEMA["items"]["properties"], "skill": {"type": "string"}},
+    },
+}
+
+
+def generate_skill_mcqs(job_description, skill_counts):
+    """
+    Generate questions for specific skills only; `skill_counts` maps skill -> number of questions.
+    Each question is returned with the skill it tests.
+    """
+    requested = "\n".join(f"- {skill}: {count} question(s)" for skill, count in skill_counts.items())
+    prompt = f"""
+    Generate multiple-choice questions for a candidate applying to the job described below,
+    covering only these skills:
+    {requested}
+    Job description:
+    {job_description}
+    Each question should have 4 options with one correct answer. Provide the output in JSON format like this:
+    [
+        {{
+            "skill": "Python",
+            "question": "What is Python?",
+            "options": ["A programming language", "A snake", "A car", "A drink"],
+            "answer": "A programming language"
+        }}
+    ]
+    Use the skill names exactly as listed.
+    """
+    return complete_structured(prompt, SKILL_MCQ_SCHEMA, settings.LLM_MCQ_PROVIDER, settings.LLM_MCQ_MODEL, check=check_mcqs)
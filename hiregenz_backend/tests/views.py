@@ -1,15 +1,19 @@
-from django.core.mail import send_mail
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from django.utils.timezone import now
 from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.db.models import F, ExpressionWrapper, DurationField
+from django.db import transaction
+from django.db.models import F, Q, ExpressionWrapper, DurationField, Window
+from django.db.models.functions import Rank
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from .models import Test
 from jobs.models import JobPost
 from users.models import Candidate
+from notifications.outbox import queue_email, queue_emails
 
-from .utils import generate_mcqs
+from .question_bank import build_test_questions
 
 
 class SendTestLinksToShortlistedView(APIView):
@@ -29,43 +33,67 @@ class SendTestLinksToShortlistedView(APIView):
 
         # Check if MCQs are already generated for the job
         if not job.mcqs:  # Assuming you already added an `mcqs` field to JobPost for this purpose
-            job.mcqs = generate_mcqs(job.description)
+            # Reuses banked questions; only uncovered skills are sent to the LLM
+            job.mcqs = build_test_questions(job)
             job.save()
 
-        for candidate_id in shortlisted_candidates:
-            candidate = get_object_or_404(Candidate, id=candidate_id)
-
-            # Save test to the database using the stored MCQs in the `questions` column
-            test = Test.objects.create(
-                candidate=candidate,
-                recruiter=job.recruiter,
-                job_description=job.description,
-                questions=job.mcqs,  # Store MCQs in the `questions` column
+        # Fetch all shortlisted candidates in one query
+        try:
+            candidate_ids = list(dict.fromkeys(int(candidate_id) for candidate_id in shortlisted_candidates))
+        except (TypeError, ValueError):
+            return Response({"error": "Candidate ids must be integers."}, status=400)
+        candidates = Candidate.objects.in_bulk(candidate_ids)
+        missing = [candidate_id for candidate_id in candidate_ids if candidate_id not in candidates]
+        if missing:
+            return Response({"error": "Candidates not found.", "candidate_ids": missing}, status=404)
+
+        recruiter = job.recruiter
+        with transaction.atomic():
+            # Save tests to the database using the stored MCQs in the `questions` column
+            tests = Test.objects.bulk_create([
+                Test(
+                    candidate=candidates[candidate_id],
+                    recruiter=recruiter,
+                    job_post=job,
+                    job_description=job.description,
+                    questions=job.mcqs,  # Store MCQs in the `questions` column
+                )
+                for candidate_id in candidate_ids
+            ], batch_size=500)
+
+            # Emails are recorded with the tests and sent in the background over one SMTP connection
+            batch_id = queue_emails(
+                [self.test_link_email(job, recruiter, test) for test in tests if test.candidate.email],
+                category="test_link",
             )
 
-            # Generate test link using the test token
-            test_link = f"https://yourdomain.com/tests/{test.test_token}/"
-
-            # Send email to the candidate
-            send_mail(
-                subject="Your Resume is Shortlisted - Attempt the Test",
-                message=f"""
-                Dear {candidate.name},
+        return Response({
+            "message": "Tests generated and emails queued successfully.",
+            "tests_created": len(tests),
+            "email_batch_id": str(batch_id),
+        }, status=200)
 
-                Congratulations! Your resume has been shortlisted for the {job.title} position at {job.recruiter.company_name}.
+    def test_link_email(self, job, recruiter, test):
+        """Email inviting a candidate to their test."""
+        # Generate test link using the test token
+        test_link = f"https://yourdomain.com/tests/{test.test_token}/"
+        return {
+            "to_email": test.candidate.email,
+            "reference": str(test.test_token),
+            "subject": "Your Resume is Shortlisted - Attempt the Test",
+            "body": f"""
+                Dear {test.candidate.name},
+
+                Congratulations! Your resume has been shortlisted for the {job.title} position at {recruiter.company_name}.
                 To proceed, please attempt the test using the following link:
                 {test_link}
 
                 Note: Failing to complete the test may disqualify you from this opportunity.
 
                 Best regards,
-                {job.recruiter.company_name}
+                {recruiter.company_name}
                 """,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[candidate.email],
-            )
-
-        return Response({"message": "Tests generated and emails sent successfully."}, status=200)
+        }
     
 
 class RetrieveTestQuestionsView(APIView):
@@ -113,15 +141,17 @@ class SubmitTestAnswersView(APIView):
                 score += 1
 
         # Save the test results
-        test.candidate_answers = submitted_answers
-        test.score = score
-        test.is_completed = True
-        test.save()  # `submitted_at` is updated automatically in the model
-
-        # Send confirmation email
-        send_mail(
-            subject="Thank You for Submitting the Test",
-            message=f"""
+        with transaction.atomic():
+            test.candidate_answers = submitted_answers
+            test.score = score
+            test.is_completed = True
+            test.save()  # `submitted_at` is updated automatically in the model
+
+            # Queue confirmation email
+            queue_email(
+                test.candidate.email,
+                subject="Thank You for Submitting the Test",
+                body=f"""
             Dear {test.candidate.name},
 
             Thank you for completing the test for the {test.recruiter.company_name} position. If selected, we will get back to you soon.
@@ -129,9 +159,9 @@ class SubmitTestAnswersView(APIView):
             Thanks and Regards,
             HireGenzo Team
             """,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[test.candidate.email],
-        )
+                category="test_submitted",
+                reference=str(test.test_token),
+            )
 
         return Response({
             "message": "Test submitted successfully.",
@@ -144,43 +174,82 @@ class SubmitTestAnswersView(APIView):
 class RankStudentsByJobView(APIView):
     """
     API to rank candidates based on their test scores and time taken for a specific job.
+
+    Ranks are computed by the database (score descending, then time taken).
+    Results are paginated with a keyset cursor: `?limit=` sets the page size,
+    `?cursor=` continues after the previous page and `?top=` keeps only the
+    first N ranks.
     """
 
     def get(self, request, job_id, *args, **kwargs):
         # Validate that the Job Post exists
         job = get_object_or_404(JobPost, id=job_id)
 
-        # Fetch completed tests for the given Job Post
-        completed_tests = Test.objects.filter(
-            recruiter=job.recruiter,  # Ensure tests are tied to the recruiter
-            is_completed=True
-        ).annotate(
+        try:
+            limit = min(int(request.query_params.get('limit', settings.TEST_RANKING_PAGE_SIZE)),
+                        settings.TEST_RANKING_MAX_PAGE_SIZE)
+            top = int(request.query_params['top']) if 'top' in request.query_params else None
+            cursor = decode_rank_cursor(request.query_params.get('cursor'))
+        except ValueError:
+            return Response({"error": "Invalid limit, top or cursor."}, status=400)
+        if limit < 1:
+            return Response({"error": "Invalid limit, top or cursor."}, status=400)
+
+        # Completed tests of this job, ranked by score (descending) and time_taken (ascending)
+        ranked_tests = Test.objects.filter(job_post=job, is_completed=True).select_related('candidate').annotate(
             time_taken=ExpressionWrapper(
                 F('submitted_at') - F('started_at'),
                 output_field=DurationField()
             )
-        )
+        ).annotate(
+            rank=Window(
+                expression=Rank(),
+                order_by=[F('score').desc(nulls_last=True), F('time_taken').asc(nulls_last=True)],
+            )
+        ).order_by('rank', 'id')
 
-        # Sort tests by score (descending) and time_taken (ascending)
-        sorted_tests = sorted(
-            completed_tests,
-            key=lambda x: (-x.score, x.time_taken.total_seconds() if x.time_taken else float('inf'))
-        )
+        # Keyset pagination: continue after the last (rank, id) of the previous page
+        if cursor:
+            last_rank, last_id = cursor
+            ranked_tests = ranked_tests.filter(Q(rank__gt=last_rank) | Q(rank=last_rank, id__gt=last_id))
+        if top is not None:
+            ranked_tests = ranked_tests.filter(rank__lte=top)
+
+        # One row more than the page tells whether there is a next page
+        page = list(ranked_tests[:limit + 1])
+        next_cursor = encode_rank_cursor(page[limit - 1]) if len(page) > limit else None
+        page = page[:limit]
 
         # Prepare the ranking
         ranking = []
-        rank = 1
-        for test in sorted_tests:
+        for test in page:
             time_taken = test.time_taken.total_seconds() if test.time_taken else None
             ranking.append({
-                "rank": rank,
+                "rank": test.rank,
+                "candidate_id": test.candidate_id,
                 "candidate_name": test.candidate.name,
                 "score": test.score,
                 "time_taken": time_taken  # Time in seconds
             })
-            rank += 1
 
         return Response({
             "job_title": job.title,
-            "ranking": ranking
-        }, status=200)
\ No newline at end of file
+            "ranking": ranking,
+            "next_cursor": next_cursor,
+        }, status=200)
+
+
+def encode_rank_cursor(test):
+    """Opaque cursor pointing after `test` in the ranking."""
+    return urlsafe_b64encode(f"{test.rank}:{test.id}".encode()).decode()
+
+
+def decode_rank_cursor(cursor):
+    """(rank, id) of a cursor, or None; raises ValueError if it is malformed."""
+    if not cursor:
+        return None
+    try:
+        rank, test_id = urlsafe_b64decode(cursor.encode()).decode().split(":")
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+    return int(rank), int(test_id)
@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import Recruiter, Candidate, CandidatePreference
+from .models import Recruiter, Candidate, CandidatePreference, ResumeIngestionJob, ResumeDuplicate
 
 admin.site.register(Recruiter)
 admin.site.register(Candidate)
-admin.site.register(CandidatePreference)
\ No newline at end of file
+admin.site.register(CandidatePreference)
+admin.site.register(ResumeIngestionJob)
+admin.site.register(ResumeDuplicate)
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import re
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from .models import Candidate, ResumeDuplicate, ResumeMinHashBand
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5  # Words per shingle
+# Contact details are left out: the duplicates we look for are the same resume under another email
+CONTACT_PATTERN = re.compile(r"\S+@\S+|\+?\d[\d\s().-]{7,}\d")
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def permutations():
+    """
+    Coefficients of the RESUME_MINHASH_PERMUTATIONS hash functions (a*x + b) mod p.
+    Seeded, so signatures stored by any process are comparable. Both are below 2^32,
+    like the shingle hashes x, so a*x fits in uint64 (see `minhash`).
+    """
+    generator = np.random.RandomState(1)
+    count = settings.RESUME_MINHASH_PERMUTATIONS
+    a = generator.randint(1, MAX_HASH, size=count, dtype=np.uint64)
+    b = generator.randint(0, MAX_HASH, size=count, dtype=np.uint64)
+    return a, b
+
+
+def shingles(text):
+    """Overlapping word n-grams of the normalized text (case, punctuation, spacing and contact details ignored)."""
+    words = re.findall(r"\w+", CONTACT_PATTERN.sub(" ", text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """
+    MinHash signature of a resume text (uint32 array), or None if it has no words.
+    The share of equal positions between two signatures estimates the Jaccard
+    similarity of their shingle sets.
+    """
+    tokens = shingles(text)
+    if not tokens:
+        return None
+    values = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little") for token in tokens),
+        dtype=np.uint64, count=len(tokens),
+    )
+    a, b = permutations()
+    # Reduced before adding b: a*x < 2^64, but a*x + b could wrap around
+    hashed = ((np.outer(values, a) % MERSENNE_PRIME + b) % MERSENNE_PRIME) & MAX_HASH
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def load_signature(data):
+    return np.frombuffer(bytes(data), dtype=np.uint32) if data else None
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.mean(signature == other))
+
+
+def band_buckets(signature):
+    """
+    (band, bucket) pairs for locality-sensitive hashing: the signature is cut into
+    RESUME_MINHASH_BANDS bands, so near-duplicates very likely share a bucket in
+    at least one band while unrelated resumes almost never do.
+    """
+    rows = len(signature) // settings.RESUME_MINHASH_BANDS
+    return [
+        (band, hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).hexdigest())
+        for band in range(settings.RESUME_MINHASH_BANDS)
+    ]
+
+
+def find_near_duplicates(candidate, signature):
+    """
+    Other candidates whose resume is at least RESUME_DUPLICATE_SIMILARITY similar,
+    as (candidate, similarity) pairs. Only candidates sharing a band bucket are compared.
+    """
+    matches = Q()
+    for band, bucket in band_buckets(signature):
+        matches |= Q(band=band, bucket=bucket)
+    suspects = set(
+        ResumeMinHashBand.objects.filter(matches).exclude(candidate_id=candidate.id)
+        .values_list('candidate_id', flat=True)
+    )
+    if not suspects:
+        return []
+
+    duplicates = []
+    for other in Candidate.objects.filter(id__in=suspects).only('id', 'email', 'resume_minhash'):
+        other_signature = load_signature(other.resume_minhash)
+        if other_signature is None or len(other_signature) != len(signature):
+            continue
+        score = similarity(signature, other_signature)
+        if score >= settings.RESUME_DUPLICATE_SIMILARITY:
+            duplicates.append((other, score))
+    return duplicates
+
+
+def fingerprint_resume(candidate, resume_text):
+    """
+    Store the MinHash of a candidate's resume text and its LSH buckets, then flag
+    near-duplicates under other emails (ResumeDuplicate). Returns the duplicates found.
+    """
+    signature = minhash(resume_text)
+    candidate.resume_minhash = signature.tobytes() if signature is not None else None
+    with transaction.atomic():
+        ResumeMinHashBand.objects.filter(candidate=candidate).delete()
+        Candidate.objects.filter(id=candidate.id).update(resume_minhash=candidate.resume_minhash)
+        if signature is None:
+            return []
+        ResumeMinHashBand.objects.bulk_create(
+            ResumeMinHashBand(candidate=candidate, band=band, bucket=bucket)
+            for band, bucket in band_buckets(signature)
+        )
+
+    duplicates = find_near_duplicates(candidate, signature)
+    for other, score in duplicates:
+        ResumeDuplicate.objects.update_or_create(
+            candidate=candidate, duplicate_of=other, defaults={'similarity': score}
+        )
+        logger.warning(
+            f"Resume of {candidate.email} is {score:.0%} similar to the resume of {other.email}."
+        )
+    return duplicates
+
+
+def fingerprint_resume_safely(candidate, resume_text):
+    """Like fingerprint_resume, but never fails the caller (ingestion goes on without it)."""
+    try:
+        return fingerprint_resume(candidate, resume_text)
+    except Exception as e:
+        logger.warning(f"Could not fingerprint the resume of candidate {candidate.id}: {e}")
+        return []
@@ -0,0 +1,279 @@
+import logging
+import os
+import random
+import string
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.timezone import now
+from helpers.pdf import PDFExtractionError, extract_pdf_text
+from helpers.uploads import spool_file
+from helpers.workers import run_in_background
+from .dedup import fingerprint_resume_safely
+from .models import Candidate, ResumeIngestionJob
+from .storage import upload_resume
+from .utils import extract_resume_data
+from matching.embeddings import refresh_candidate_embeddings
+from matching.scores import refresh_candidate_matches_safely
+from notifications.outbox import queue_email
+
+logger = logging.getLogger(__name__)
+
+# Progress reported when each stage starts
+STAGE_PROGRESS = {
+    'parse': 10,
+    'extract': 40,
+    'upload': 60,
+    'notify': 85,
+    'done': 100,
+}
+
+MAX_ATTEMPTS = 3
+
+
+def enqueue_resume(uploaded_file):
+    """
+    Spool an uploaded resume to disk, record an ingestion job and hand it to the worker pool.
+    Uploads already spooled by HashingFileUploadHandler are adopted without another copy.
+    """
+    file_path, content_hash = spool_file(uploaded_file, settings.RESUME_SPOOL_DIR)
+    job = ResumeIngestionJob.objects.create(
+        file_path=file_path, original_name=uploaded_file.name, content_hash=content_hash
+    )
+    submit_job(job.id)
+    return job
+
+
+def submit_job(job_id):
+    """
+    Run a job now (RESUME_INGESTION_SYNC) or on the local worker pool.
+    """
+    if settings.RESUME_INGESTION_SYNC:
+        process_job(job_id)
+    else:
+        run_in_background('resume-ingestion', settings.RESUME_INGESTION_WORKERS, process_job, job_id)
+
+
+def claim_job(job_id):
+    """
+    Atomically move a queued job to running; returns the job, or None if another worker took it.
+    """
+    claimed = ResumeIngestionJob.objects.filter(id=job_id, status='queued').update(
+        status='running', updated_at=now()
+    )
+    if not claimed:
+        return None
+    job = ResumeIngestionJob.objects.get(id=job_id)
+    job.attempts += 1
+    job.save(update_fields=['attempts'])
+    return job
+
+
+def set_stage(job, stage):
+    job.stage = stage
+    job.progress = STAGE_PROGRESS[stage]
+    job.save(update_fields=['stage', 'progress', 'updated_at'])
+
+
+def process_job(job_id):
+    """
+    Run the ingestion pipeline for one job: parse, extract, store, notify.
+    A resume identical to a candidate's stored one only goes through the notify stage.
+    """
+    job = claim_job(job_id)
+    if job is None:
+        return
+
+    try:
+        candidate = find_unchanged_candidate(job.content_hash)
+        if candidate is not None:
+            # Same PDF as before: nothing to parse, store or re-embed, just send the OTP
+            message, is_new_or_requires_verification = "Resume unchanged.", True
+        else:
+            set_stage(job, 'parse')
+            resume_text = extract_resume_text(job.file_path)
+
+            set_stage(job, 'extract')
+            extracted_data = extract_resume_data(resume_text)
+            if not extracted_data.get("email") or extracted_data.get("email") == "Not Found":
+                raise ValueError("No valid email found in the resume.")
+
+            set_stage(job, 'upload')
+            with open(job.file_path, 'rb') as resume_file:
+                candidate, message, is_new_or_requires_verification = create_or_update_candidate(
+                    extracted_data, resume_file, resume_text, job.content_hash
+                )
+        job.candidate = candidate
+
+        set_stage(job, 'notify')
+        job.result = notify_candidate(candidate, message, is_new_or_requires_verification)
+
+        job.status = 'succeeded'
+        job.stage = 'done'
+        job.progress = STAGE_PROGRESS['done']
+        job.error = None
+        job.save()
+        remove_spooled_file(job.file_path)
+    except Exception as e:
+        logger.warning(f"Resume ingestion {job.id} failed: {e}")
+        job.status = 'failed'
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        # Failed jobs are never retried, so their spooled copy is not needed anymore
+        remove_spooled_file(job.file_path)
+
+
+def remove_spooled_file(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Put back jobs whose worker died mid-run (still 'running' after `older_than`).
+    Jobs that already used MAX_ATTEMPTS are marked failed instead, and their spooled file removed.
+    """
+    cutoff = now() - older_than
+    stale = ResumeIngestionJob.objects.filter(status='running', updated_at__lt=cutoff)
+    exhausted = stale.filter(attempts__gte=MAX_ATTEMPTS)
+    file_paths = list(exhausted.values_list('file_path', flat=True))
+    exhausted.update(status='failed', error='Worker stopped before the job finished.', updated_at=now())
+    for file_path in file_paths:
+        remove_spooled_file(file_path)
+    return stale.filter(attempts__lt=MAX_ATTEMPTS).update(status='queued', updated_at=now())
+
+
+def find_unchanged_candidate(content_hash):
+    """
+    The candidate whose stored resume has this SHA-256, if any.
+    """
+    if not content_hash:
+        return None
+    return Candidate.objects.filter(resume_hash=content_hash).first()
+
+
+def extract_resume_text(file, parallel=None):
+    """
+    Extract text content from a PDF resume file.
+    """
+    try:
+        # Extract text from the PDF content (size, page and time limits apply)
+        return extract_pdf_text(file, parallel=parallel)
+    except PDFExtractionError as e:
+        raise ValueError(f"Error extracting text from resume: {str(e)}")
+
+
+def create_or_update_candidate(extracted_data, resume_file, resume_text, resume_hash=None):
+    """Create or update a candidate record based on extracted resume data."""
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+
+    email = extracted_data.get("email")
+    candidate = Candidate.objects.filter(email=email).first()
+
+    # Generate a unique filename for the resume
+    filename = f"{email.replace('@', '_').replace('.', '_')}_resume.pdf"
+
+    # Upload resume to S3
+    resume_url = upload_resume(resume_file, filename)
+
+    if candidate:
+        if not candidate.is_verified:  # Candidate exists but is not verified
+            for field, value in extracted_data.items():
+                setattr(candidate, field, value)
+            candidate.skills = ", ".join(extracted_data.get("skills", []))
+            candidate.resume_file = resume_url
+            candidate.resume_text = resume_text
+            candidate.resume_hash = resume_hash
+            candidate.save()
+            # Re-encode only the fields whose text changed, then refresh match scores
+            refresh_candidate_embeddings(candidate)
+            refresh_candidate_matches_safely(candidate)
+            fingerprint_resume_safely(candidate, resume_text)
+            return candidate, "Candidate details updated successfully!", True
+        else:  # Candidate exists, already verified (send OTP for preferences update)
+            # Details are kept, but the stored file was replaced by this upload
+            candidate.resume_hash = resume_hash
+            candidate.save(update_fields=['resume_hash'])
+            return candidate, "Candidate details updated successfully!", True
+    else:
+        # Create a new user
+        user = User.objects.create_user(
+            username=email,  # Use email as the username
+            email=email,
+            password=''.join(random.choices(string.ascii_letters + string.digits, k=8)),  # Example: 8-character password
+            role='candidate'  # Set the role for the user
+        )
+
+        # Create a new candidate linked to the user
+        candidate = Candidate.objects.create(
+            user=user,
+            name=extracted_data.get("name"),
+            email=email,
+            phone=extracted_data.get("phone"),
+            skills=", ".join(extracted_data.get("skills", [])),
+            certifications=extracted_data.get("certifications"),
+            education=extracted_data.get("education"),
+            work_experience=extracted_data.get("work_experience"),
+            total_work_experience=extracted_data.get("total_experience"),
+            professional_summary=extracted_data.get("professional_summary"),
+            resume_text=resume_text,
+            resume_file=resume_url,
+            resume_hash=resume_hash,
+        )
+        refresh_candidate_embeddings(candidate)
+        refresh_candidate_matches_safely(candidate)
+        fingerprint_resume_safely(candidate, resume_text)
+        return candidate, "Candidate created successfully!", True
+
+
+def notify_candidate(candidate, message, is_new_or_requires_verification):
+    """
+    Send the verification/preferences OTP if needed and return the result shown to the client.
+    """
+    if is_new_or_requires_verification:
+        otp = generate_otp()
+        candidate.otp = otp
+        if not candidate.is_verified:
+            # Send OTP for email verification
+            with transaction.atomic():
+                candidate.is_verified = False
+                candidate.save()
+                send_otp_email(candidate.email, otp, candidate.name)
+            return {
+                "message": f"{message} OTP sent to {candidate.email} for verification.",
+                "data": {"email": candidate.email, "is_verified": "false"},
+            }
+
+        # Send OTP for preference updates
+        with transaction.atomic():
+            candidate.save()
+            send_otp_email(candidate.email, otp, candidate.name)
+        return {
+            "message": "OTP sent for updating preferences.",
+            "data": {"email": candidate.email, "is_verified": "true"},
+        }
+
+    # No OTP required (email already verified, no preference update needed)
+    return {
+        "message": f"{message} Candidate already verified and no further action is needed.",
+        "data": {"email": candidate.email, "is_verified": "true"},
+    }
+
+
+def generate_otp():
+    """Generate a 6-digit OTP."""
+    return ''.join(random.choices(string.digits, k=6))
+
+
+def send_otp_email(email, otp, name):
+    """Send an OTP email to the candidate with an HTML template."""
+    subject = "Verify Your Email - HireGenZ"
+
+    # Render the HTML template with context
+    html_content = render_to_string('verification_email.html', {'name': name, 'otp': otp})
+
+    # Recorded in the outbox; sent by the outbox worker once the OTP is saved
+    queue_email(email, subject, html_body=html_content, category="otp")
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from helpers.query_audit import audit_query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the project's hot-path queries and fail if one scans a large table sequentially "
+        "(run in CI against a database with production-like volumes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-rows", type=int, default=settings.QUERY_AUDIT_MIN_ROWS,
+                            help="Sequential scans of tables with fewer rows are ignored.")
+        parser.add_argument("--show-plans", action="store_true", help="Print every query plan.")
+
+    def handle(self, *args, **options):
+        failures = 0
+        for name, plan, problems in audit_query_plans(options["min_rows"]):
+            if problems:
+                failures += 1
+                scans = ", ".join(f"{table} ({rows} rows)" for table, rows in problems)
+                self.stdout.write(self.style.ERROR(f"FAIL {name}: sequential scan of {scans}"))
+            else:
+                self.stdout.write(f"ok   {name}")
+            if problems or options["show_plans"]:
+                self.stdout.write("\n".join(f"       {line}" for line in plan.splitlines()))
+
+        if failures:
+            raise CommandError(f"{failures} query plan(s) scan large tables sequentially.")
+        self.stdout.write(self.style.SUCCESS("All audited query plans use indexes."))
@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from helpers import pdf
+
+
+class Command(BaseCommand):
+    help = "Compare the PDF extraction engine (helpers/pdf.py) with plain pdfminer extract_text over a corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", help="Directory of sample PDFs (searched recursively).")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Pool size for the page-parallel run (default: PDF_WORKERS, 0 = skip it).")
+        parser.add_argument("--limit", type=int, default=None, help="Use at most N files.")
+
+    def handle(self, *args, **options):
+        from pdfminer.high_level import extract_text
+
+        paths = sorted(str(path) for path in Path(options["corpus"]).rglob("*") if path.suffix.lower() == ".pdf")
+        paths = paths[:options["limit"]] if options["limit"] else paths
+        if not paths:
+            raise CommandError(f"No PDF files in {options['corpus']}.")
+
+        readable = []
+        for path in paths:
+            try:
+                readable.append((path, min(pdf.count_pages(path), settings.PDF_MAX_PAGES)))
+            except Exception as e:
+                self.stdout.write(f"skipped {path}: {e}")
+        if not readable:
+            raise CommandError("None of the PDFs could be read.")
+        pages = sum(count for _, count in readable)
+        self.stdout.write(f"{len(readable)} PDFs, {pages} pages (first {settings.PDF_MAX_PAGES} of each)")
+
+        max_pages = settings.PDF_MAX_PAGES
+        runs = [
+            ("pdfminer extract_text", lambda path: extract_text(path, maxpages=max_pages)),
+            ("engine, sequential", lambda path: pdf.extract_pdf_text(path, parallel=False)),
+        ]
+        workers = settings.PDF_WORKERS if options["workers"] is None else options["workers"]
+        if workers:
+            settings.PDF_WORKERS = workers
+            pdf.get_pool()  # Start the workers outside the timed passes
+            runs.append((f"engine, {workers} workers", lambda path: pdf.extract_pdf_text(path, parallel=True)))
+
+        baseline = None
+        for name, extract in runs:
+            seconds, texts = self.time_it(extract, [path for path, _ in readable], options["repeat"])
+            baseline = baseline or (seconds, texts)
+            chars = sum(len(text) for text in texts)
+            self.stdout.write(
+                f"{name:<24} {seconds / len(readable) * 1000:8.1f} ms/PDF  {pages / seconds:7.1f} pages/s  "
+                f"{baseline[0] / seconds:5.2f}x  {chars} chars ({chars / max(1, sum(map(len, baseline[1]))):.0%})"
+            )
+        pdf.reset_pool()
+
+    def time_it(self, func, paths, repeat):
+        texts = [func(path) for path in paths]  # Warm-up pass, also used for the comparison
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for path in paths:
+                func(path)
+        return (time.perf_counter() - started) / repeat, texts
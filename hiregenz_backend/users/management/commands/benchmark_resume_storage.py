@@ -0,0 +1,77 @@
+import io
+import os
+import time
+import uuid
+import boto3
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from users.storage import BACKENDS, upload_resume_async
+
+
+class Command(BaseCommand):
+    help = "Measure per-upload latency of the resume storage: a new S3 client per upload vs the pooled service."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--uploads", type=int, default=30, help="Uploads per run.")
+        parser.add_argument("--size-kb", type=int, default=200, help="Size of each test file.")
+        parser.add_argument("--backend", default=None, help="Storage backend (default: RESUME_STORAGE_BACKEND).")
+
+    def handle(self, *args, **options):
+        backend = options["backend"] or settings.RESUME_STORAGE_BACKEND
+        settings.RESUME_STORAGE_BACKEND = backend
+        storage = BACKENDS[backend]()
+        payload = os.urandom(options["size_kb"] * 1024)
+        run_id = uuid.uuid4().hex[:8]
+        keys = []
+
+        def key(label, index):
+            keys.append(f"resumes/benchmark-{run_id}/{label}-{index}.pdf")
+            return keys[-1]
+
+        uploads = options["uploads"]
+        self.stdout.write(f"{backend} backend, {uploads} uploads of {options['size_kb']} KB")
+
+        if backend == "s3":
+            def new_client_upload(index):
+                # What every upload used to do
+                client = boto3.client(
+                    's3',
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.AWS_S3_REGION_NAME,
+                    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+                )
+                client.upload_fileobj(io.BytesIO(payload), settings.AWS_STORAGE_BUCKET_NAME, key("new-client", index))
+
+            self.report("new client per upload", self.time_each(new_client_upload, uploads))
+
+        self.report("pooled service", self.time_each(
+            lambda index: storage.save(io.BytesIO(payload), key("pooled", index)), uploads
+        ))
+
+        started = time.perf_counter()
+        futures = [upload_resume_async(io.BytesIO(payload), f"benchmark-{run_id}/async-{index}.pdf")
+                   for index in range(uploads)]
+        for future in futures:
+            future.result()
+        keys.extend(f"resumes/benchmark-{run_id}/async-{index}.pdf" for index in range(uploads))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{'async, ' + str(settings.RESUME_STORAGE_WORKERS) + ' threads':<24} "
+                          f"{elapsed / uploads * 1000:8.1f} ms/upload (wall clock, {uploads / elapsed:.1f} uploads/s)")
+
+        for name in keys:
+            storage.delete(name)
+
+    def time_each(self, upload, count):
+        upload(-1)  # Warm-up (imports, first connection for the pooled client)
+        timings = []
+        for index in range(count):
+            started = time.perf_counter()
+            upload(index)
+            timings.append(time.perf_counter() - started)
+        return sorted(timings)
+
+    def report(self, name, timings):
+        mean = sum(timings) / len(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(f"{name:<24} {mean * 1000:8.1f} ms/upload (p95 {p95 * 1000:.1f} ms)")
@@ -0,0 +1,88 @@
+import random
+import re
+import time
+from django.core.management.base import BaseCommand
+from users.models import Candidate
+from users.skills import BREAK_CHARACTERS, SKILL_KEYWORDS, SKILL_MATCHER
+
+# List separators used in the synthetic skill sections
+SEPARATORS = (", ", "; ", " | ", "\n\u2022 ")
+
+FILLER = (
+    "Responsible for designing and building scalable services with the team. "
+    "Worked closely with product managers to deliver features on time and mentored junior engineers. "
+    "Improved performance, reliability and observability across multiple projects. "
+)
+
+
+class Command(BaseCommand):
+    help = "Compare the compiled skill matcher with the previous spaCy token lookup."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-db", type=int, default=0, help="Use the resume text of up to N candidates.")
+        parser.add_argument("--synthetic", type=int, default=200, help="Number of synthetic resumes otherwise.")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        texts = self.corpus(options)
+        self.stdout.write(f"{len(texts)} resumes, {sum(len(text) for text in texts) / len(texts):.0f} chars on average")
+
+        import spacy
+        started = time.perf_counter()
+        nlp = spacy.load("en_core_web_sm")
+        self.stdout.write(f"spaCy load: {time.perf_counter() - started:.2f}s")
+        keyword_list = list(SKILL_KEYWORDS)
+
+        def legacy(text):
+            # Previous users.utils.extract_skills
+            return {token.text for token in nlp(text) if token.text in keyword_list}
+
+        legacy_time, legacy_results = self.time_it(legacy, texts, options["repeat"])
+        matcher_time, matcher_results = self.time_it(lambda text: set(SKILL_MATCHER.extract(text)), texts, options["repeat"])
+
+        self.stdout.write(f"spaCy + list lookup: {legacy_time * 1000:.2f} ms/resume")
+        self.stdout.write(f"compiled matcher:    {matcher_time * 1000:.3f} ms/resume "
+                          f"({legacy_time / matcher_time:.0f}x faster)")
+
+        legacy_found = sum(len(found) for found in legacy_results)
+        matcher_found = sum(len(found) for found in matcher_results)
+        missed = sum(len(old - new) for old, new in zip(legacy_results, matcher_results))
+        self.stdout.write(f"skills found: {legacy_found} before, {matcher_found} now "
+                          f"({missed} found before but not now)")
+
+        # Every skill should come from a single list entry; a name joined across separators is invented
+        split = re.compile("[" + re.escape(BREAK_CHARACTERS) + "]")
+        crossing = sum(
+            len(found - {skill for entry in split.split(text) for skill in SKILL_MATCHER.extract(entry)})
+            for text, found in zip(texts, matcher_results)
+        )
+        self.stdout.write(f"skills matched across list separators: {crossing}")
+
+    def corpus(self, options):
+        if options["from_db"]:
+            texts = list(
+                Candidate.objects.exclude(resume_text__isnull=True).exclude(resume_text="")
+                .values_list("resume_text", flat=True)[:options["from_db"]]
+            )
+            if texts:
+                return texts
+            self.stdout.write("No resume text in the database; using synthetic resumes.")
+
+        rng = random.Random(options["seed"])
+        texts = []
+        for _ in range(options["synthetic"]):
+            skills = rng.sample(SKILL_KEYWORDS, 15)
+            texts.append(
+                "John Smith\njohn@example.com\nSKILLS\n" + rng.choice(SEPARATORS).join(skills) + "\n"
+                "WORK EXPERIENCE\n" + FILLER * 10 + " ".join(rng.sample(SKILL_KEYWORDS, 5)) + "\n"
+            )
+        return texts
+
+    def time_it(self, func, texts, repeat):
+        results = [func(text) for text in texts]  # Warm-up pass, also used for the comparison
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                func(text)
+        return (time.perf_counter() - started) / (repeat * len(texts)), results
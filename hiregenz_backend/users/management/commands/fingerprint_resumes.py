@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from users.dedup import fingerprint_resume
+from users.models import Candidate, ResumeDuplicate
+
+
+class Command(BaseCommand):
+    help = "Compute resume MinHash signatures and flag near-duplicate resumes under different emails."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true",
+                            help="Recompute every signature (e.g. after changing RESUME_MINHASH_PERMUTATIONS).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Candidates loaded per query.")
+
+    def handle(self, *args, **options):
+        candidates = Candidate.objects.only("id", "email", "resume_text").order_by("id")
+        if not options["all"]:
+            candidates = candidates.filter(resume_minhash__isnull=True)
+
+        processed = flagged = 0
+        for candidate in candidates.iterator(chunk_size=options["batch_size"]):
+            flagged += len(fingerprint_resume(candidate, candidate.resume_text))
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fingerprinted {processed} resume(s), {flagged} new near-duplicate pair(s) "
+            f"({ResumeDuplicate.objects.count()} flagged in total)."
+        ))
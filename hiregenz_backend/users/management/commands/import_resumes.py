@@ -0,0 +1,236 @@
+import csv
+import hashlib
+import io
+import json
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from jobs.models import JobPost
+from users.dedup import fingerprint_resume_safely
+from users.models import Candidate
+from users.storage import upload_resume_async
+from matching.embeddings import load_candidate_embeddings
+from matching.index import index_candidates
+from matching.scores import refresh_job_matches_safely
+
+# Opened zip archives, one per worker process
+_archives = {}
+
+
+def init_worker():
+    """
+    Prepare a worker process: set up Django and build the skill matcher once.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    import users.utils  # noqa: F401  (builds the skill matcher at import time)
+
+
+def read_source(source):
+    """
+    Return the bytes of a resume, given (path, None) or (zip path, member name).
+    """
+    path, member = source
+    if member is None:
+        return Path(path).read_bytes()
+    archive = _archives.get(path)
+    if archive is None:
+        archive = _archives[path] = zipfile.ZipFile(path)
+    return archive.read(member)
+
+
+def parse_resume_source(source):
+    """
+    Worker task: extract the text and structured data of one resume.
+    Returns (source, extracted_data, resume_text, resume hash, error stage, error message).
+    """
+    from users.ingestion import extract_resume_text
+    from users.utils import extract_resume_data
+
+    stage = "read"
+    try:
+        content = read_source(source)
+        resume_hash = hashlib.sha256(content).hexdigest()
+        stage = "parse"
+        resume_text = extract_resume_text(io.BytesIO(content), parallel=False)  # Already one resume per process
+        stage = "extract"
+        extracted_data = extract_resume_data(resume_text)
+        if not extracted_data.get("email") or extracted_data.get("email") == "Not Found":
+            return source, None, None, None, stage, "No valid email found in the resume."
+        return source, extracted_data, resume_text, resume_hash, None, None
+    except Exception as e:
+        return source, None, None, None, stage, str(e)
+
+
+class Command(BaseCommand):
+    help = "Bulk import a directory or zip archive of PDF resumes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory (searched recursively) or .zip archive of PDF resumes.")
+        parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count).")
+        parser.add_argument("--batch-size", type=int, default=200, help="Resumes saved per transaction.")
+        parser.add_argument("--checkpoint", default=None,
+                            help="File recording imported resumes, used to resume after a crash "
+                                 "(default: <source>.checkpoint).")
+        parser.add_argument("--report", default=None,
+                            help="CSV file listing resumes that failed (default: <source>.errors.csv).")
+        parser.add_argument("--skip-upload", action="store_true", help="Do not copy resumes to storage.")
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if not source.exists():
+            raise CommandError(f"{source} does not exist.")
+        checkpoint_path = Path(options["checkpoint"] or f"{source}.checkpoint")
+        report_path = Path(options["report"] or f"{source}.errors.csv")
+
+        done = self.read_checkpoint(checkpoint_path)
+        sources = [item for item in self.list_sources(source) if self.source_key(item) not in done]
+        self.stdout.write(f"{len(sources)} resume(s) to import ({len(done)} already done).")
+        if not sources:
+            return
+
+        self.stats = {"imported": 0, "skipped": 0, "failed": 0}
+        started = time.perf_counter()
+        with open(report_path, "a", newline="") as report_file, open(checkpoint_path, "a") as checkpoint:
+            report = csv.writer(report_file)
+            if report_file.tell() == 0:
+                report.writerow(["file", "stage", "error"])
+
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=init_worker) as executor:
+                batch = []
+                for result in executor.map(parse_resume_source, sources, chunksize=4):
+                    batch.append(result)
+                    if len(batch) == options["batch_size"]:
+                        self.save_batch(batch, report, checkpoint, options)
+                        batch = []
+                        self.report_progress(started, len(sources))
+                if batch:
+                    self.save_batch(batch, report, checkpoint, options)
+
+        # Scores of every active job now include the new candidates
+        for job in JobPost.objects.filter(is_active=True):
+            refresh_job_matches_safely(job)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.stats['imported']}, skipped {self.stats['skipped']}, failed {self.stats['failed']} "
+            f"in {elapsed:.1f}s ({len(sources) / elapsed:.1f} resumes/sec)."
+        ))
+        if self.stats["failed"]:
+            self.stdout.write(f"Errors written to {report_path}.")
+
+    def list_sources(self, source):
+        if source.is_dir():
+            return sorted((str(path), None) for path in source.rglob("*") if path.suffix.lower() == ".pdf")
+        if zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                return sorted(
+                    (str(source), name) for name in archive.namelist() if name.lower().endswith(".pdf")
+                )
+        raise CommandError(f"{source} is neither a directory nor a zip archive.")
+
+    def source_key(self, source):
+        path, member = source
+        return f"{path}:{member}" if member else path
+
+    def read_checkpoint(self, checkpoint_path):
+        if not checkpoint_path.exists():
+            return set()
+        with open(checkpoint_path) as checkpoint:
+            return {json.loads(line) for line in checkpoint if line.strip()}
+
+    def report_progress(self, started, total):
+        processed = sum(self.stats.values())
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{processed}/{total} processed ({processed / elapsed:.1f} resumes/sec)")
+
+    def save_batch(self, batch, report, checkpoint, options):
+        """
+        Create the users and candidates of a batch in one transaction, then embed them together.
+        """
+        parsed = {}
+        for source, extracted_data, resume_text, resume_hash, stage, error in batch:
+            if error:
+                report.writerow([self.source_key(source), stage, error])
+                self.stats["failed"] += 1
+            elif extracted_data["email"] in parsed:
+                self.stats["skipped"] += 1  # Same email twice in one batch
+            else:
+                parsed[extracted_data["email"]] = (source, extracted_data, resume_text, resume_hash)
+
+        User = get_user_model()
+        existing = set(Candidate.objects.filter(email__in=parsed).values_list("email", flat=True))
+        existing |= set(User.objects.filter(username__in=parsed).values_list("username", flat=True))
+        self.stats["skipped"] += len(existing)
+        new = [item for email, item in parsed.items() if email not in existing]
+
+        resume_urls = {}
+        retry = set()  # Sources left out of the checkpoint, so the next run picks them up again
+        if new and not options["skip_upload"]:
+            resume_urls = self.upload_batch(new, report)
+            # A candidate without their stored resume is not imported; the upload is retried next run
+            retry = {self.source_key(item[0]) for item in new if item[1]["email"] not in resume_urls}
+            self.stats["failed"] += len(retry)
+            new = [item for item in new if item[1]["email"] in resume_urls]
+
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                # Candidates sign in with OTPs, so an unusable password is enough (and avoids hashing)
+                User(username=data["email"], email=data["email"], role="candidate", password=make_password(None))
+                for _, data, _, _ in new
+            ])
+            candidates = Candidate.objects.bulk_create([
+                Candidate(
+                    user=user,
+                    name=data.get("name"),
+                    email=data["email"],
+                    phone=data.get("phone"),
+                    skills=", ".join(data.get("skills", [])),
+                    certifications=data.get("certifications"),
+                    education=data.get("education"),
+                    work_experience=data.get("work_experience"),
+                    total_work_experience=data.get("total_experience"),
+                    professional_summary=data.get("professional_summary"),
+                    resume_text=resume_text,
+                    resume_file=resume_urls.get(data["email"]),
+                    resume_hash=resume_hash if data["email"] in resume_urls else None,
+                )
+                for user, (_, data, resume_text, resume_hash) in zip(users, new)
+            ])
+
+        # bulk_create skips post_save signals, so embed and index the batch explicitly
+        load_candidate_embeddings(candidates)
+        index_candidates(candidates)
+        for candidate in candidates:
+            fingerprint_resume_safely(candidate, candidate.resume_text)
+        self.stats["imported"] += len(candidates)
+
+        for source, *_ in batch:
+            if self.source_key(source) not in retry:
+                checkpoint.write(json.dumps(self.source_key(source)) + "\n")
+        checkpoint.flush()
+
+    def upload_batch(self, items, report):
+        """
+        Copy the resumes of a batch to storage concurrently; returns {email: url}.
+        """
+        futures = []
+        for item in items:
+            source, data = item[:2]
+            filename = f"{data['email'].replace('@', '_').replace('.', '_')}_resume.pdf"
+            futures.append((item, upload_resume_async(io.BytesIO(read_source(source)), filename)))
+
+        urls = {}
+        for item, future in futures:
+            try:
+                urls[item[1]["email"]] = future.result()
+            except Exception as e:
+                report.writerow([self.source_key(item[0]), "upload", str(e)])
+        return urls
@@ -0,0 +1,33 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from users.models import ResumeIngestionJob
+from users.ingestion import process_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued resume ingestion jobs (e.g. jobs left behind by a restarted web worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls with --loop.")
+        parser.add_argument("--stale-minutes", type=int, default=15,
+                            help="Requeue jobs stuck in 'running' for longer than this.")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_jobs(timedelta(minutes=options["stale_minutes"]))
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+            job_ids = list(
+                ResumeIngestionJob.objects.filter(status='queued').order_by('created_at').values_list('id', flat=True)
+            )
+            for job_id in job_ids:
+                process_job(job_id)
+            if job_ids:
+                self.stdout.write(self.style.SUCCESS(f"Processed {len(job_ids)} job(s)."))
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
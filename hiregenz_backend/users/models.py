@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.utils.timezone import now, timedelta
 from django.contrib.auth.models import AbstractUser
@@ -53,16 +54,50 @@ class Candidate(models.Model):
     certifications = models.TextField(null=True, blank=True)
     education = models.TextField(null=True, blank=True)
     work_experience = models.TextField(null=True, blank=True)
-    total_work_experience = models.FloatField(null=True, blank=True, help_text="Total work experience in years, stored as a floating-point value.")
+    total_work_experience = models.FloatField(null=True, blank=True, db_index=True, help_text="Total work experience in years, stored as a floating-point value.")
     professional_summary = models.TextField(null=True, blank=True)
     resume_file = models.CharField(max_length=512, null=True, blank=True)  # URL of the resume stored in S3
     otp = models.CharField(max_length=6, null=True, blank=True)  # OTP for verification
     is_verified = models.BooleanField(default=False)  # Verification status
+    resume_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)  # SHA-256 of the stored resume PDF
+    resume_minhash = models.BinaryField(null=True, blank=True)  # MinHash signature of resume_text (users/dedup.py)
 
     def __str__(self):
         return self.name or "Unnamed Candidate"
 
 
+class ResumeMinHashBand(models.Model):
+    """
+    One LSH band of a candidate's resume MinHash; candidates sharing a bucket are near-duplicate suspects.
+    """
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='minhash_bands')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.CharField(max_length=16)  # Hash of the band's signature rows
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='resume_minhash_bucket_idx'),
+        ]
+
+
+class ResumeDuplicate(models.Model):
+    """
+    A resume nearly identical to another candidate's (same resume under a different email).
+    """
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='duplicates')
+    duplicate_of = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField()  # Estimated Jaccard similarity of the resume texts
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'duplicate_of'], name='unique_resume_duplicate'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate} ~ {self.duplicate_of} ({self.similarity:.0%})"
+
+
 class CandidatePreference(models.Model):
     EMPLOYMENT_TYPE_CHOICES = [
         ('FULL_TIME', 'Full Time'),
@@ -85,5 +120,56 @@ class CandidatePreference(models.Model):
     job_type = models.CharField(max_length=50, choices=JOB_TYPE_CHOICES, null=True, blank=True)
     employment_type = models.CharField(max_length=50, choices=EMPLOYMENT_TYPE_CHOICES, null=True, blank=True)  # Full-time, Part-time
 
+    class Meta:
+        indexes = [
+            # Salary pre-filter of matching (matching/retrieval.py)
+            models.Index(fields=['expected_salary_min'], name='preference_salary_min_idx'),
+            models.Index(fields=['expected_salary_max'], name='preference_salary_max_idx'),
+            # The PostgreSQL-only GIN index on preferred_locations is created by users/signals.py
+        ]
+
     def __str__(self):
         return f"Preferences for {self.candidate.name or 'Unnamed Candidate'}"
+
+
+class ResumeIngestionJob(models.Model):
+    """
+    A resume upload waiting for (or going through) the background ingestion pipeline.
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    STAGE_CHOICES = (
+        ('queued', 'Queued'),
+        ('parse', 'Extracting text'),
+        ('extract', 'Extracting resume data'),
+        ('upload', 'Storing resume'),
+        ('notify', 'Sending OTP'),
+        ('done', 'Done'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)  # Percentage, 0-100
+    file_path = models.CharField(max_length=512)  # Spooled copy of the uploaded PDF
+    original_name = models.CharField(max_length=255, null=True, blank=True)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)  # SHA-256 of the PDF, computed while spooling
+    candidate = models.ForeignKey(Candidate, on_delete=models.SET_NULL, null=True, blank=True, related_name='ingestion_jobs')
+    result = models.JSONField(null=True, blank=True)  # Message/data returned to the client when finished
+    error = models.TextField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='ingestion_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Resume ingestion {self.id} ({self.status})"
@@ -1,4 +1,5 @@
-from django.db.models.signals import post_delete
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from .models import Candidate, Recruiter
 
@@ -13,3 +14,43 @@ def delete_user_on_candidate_delete(sender, instance, **kwargs):
 def delete_user_on_recruiter_delete(sender, instance, **kwargs):
     if instance.user:
         instance.user.delete()
+
+
+@receiver(post_save, sender=Candidate)
+def index_candidate_on_save(sender, instance, created, update_fields=None, **kwargs):
+    # Only new candidates and skill changes touch the index; OTP and verification saves skip it
+    if update_fields is not None and 'skills' not in update_fields:
+        return
+    # Imported here so the embedding model is not loaded when the app registry starts
+    from matching.embeddings import skills_changed
+    from matching.index import index_candidate_safely, submit_index_update
+    # Encoding and the index write run after the commit, off the request; a failure does not fail the save
+    if created or skills_changed(instance):
+        submit_index_update(index_candidate_safely, instance.id)
+
+
+@receiver(post_delete, sender=Candidate)
+def remove_candidate_from_index_on_delete(sender, instance, **kwargs):
+    from matching.index import remove_candidate_safely, submit_index_update
+    submit_index_update(remove_candidate_safely, instance.id)
+
+
+@receiver(post_migrate)
+def create_preference_locations_index(sender, using, **kwargs):
+    """
+    GIN index serving the `preferred_locations @> '["<location>"]'` lookups of the
+    matching pre-filter (matching/retrieval.py). PostgreSQL only, so it is created
+    here rather than declared in the model: the model state (and its migrations)
+    stays the same on every database.
+    """
+    if sender.name != 'users':
+        return
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    from .models import CandidatePreference
+    table = connection.ops.quote_name(CandidatePreference._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS preference_locations_gin ON {table} USING gin ("preferred_locations")'
+        )
@@ -0,0 +1,213 @@
+import re
+
+SKILL_KEYWORDS = [
+    # Programming Languages
+    "Python", "Java", "C++", "C", "C#", "JavaScript", "TypeScript", "Ruby", "PHP", "Go", "Swift", 
+    "Kotlin", "R", "Scala", "Perl", "MATLAB", "Shell Scripting", "Dart", "Rust", "Lua", "Haskell", 
+    "COBOL", "Fortran", "VBScript", "Assembly Language", "Erlang", "Elixir", "F#", "Julia", "Solidity",
+
+    # Frontend Frameworks
+    "React", "Angular", "Vue.js", "Next.js", "Nuxt.js", "Svelte", "Ember.js", "Gatsby", 
+    "Backbone.js", "Alpine.js", "Meteor", "Stencil", "Preact", "LitElement",
+
+    # Backend Frameworks
+    "Node.js", "Express.js", "NestJS", "Fastify", "Spring Boot", "Hibernate", "Django", "Flask", 
+    "Bottle", "Tornado", "Pyramid", "CherryPy", "Ruby on Rails", "Laravel", "Symfony", "CodeIgniter", 
+    "CakePHP", "ASP.NET Core", "ASP.NET MVC", "Koa.js", "Struts", "JHipster", "Micronaut", "Dropwizard", 
+    "Gin", "Beego", "Echo", "Fiber (Go)", "Phoenix (Elixir)",
+
+    # Mobile Development Frameworks
+    "React Native", "Flutter", "Ionic", "Cordova", "Xamarin", "NativeScript", "SwiftUI", 
+    "Jetpack Compose", "Apache Flex",
+
+    # Data Science & Machine Learning Frameworks
+    "TensorFlow", "PyTorch", "Scikit-learn", "Keras", "Theano", "MXNet", "Caffe", "Pandas", 
+    "NumPy", "Matplotlib", "Seaborn", "Plotly", "Dask", "H2O.ai", "MLlib", "XGBoost", "LightGBM", 
+    "CatBoost", "Statsmodels", "Dash", "Streamlit", "Hugging Face Transformers", "OpenCV", "NLTK", "Spacy",
+
+    # Data Engineering & Big Data Frameworks
+    "Apache Spark", "Hadoop", "Flink", "Kafka", "Hive", "Storm", "Airflow", "Dask", "Presto", 
+    "Apache Beam", "AWS Glue", "Azure Data Factory", "Snowflake", "BigQuery", "ClickHouse",
+
+    # DevOps Frameworks & Tools
+    "Docker", "Kubernetes", "Terraform", "Ansible", "Puppet", "Chef", "Vagrant", "Prometheus", 
+    "Grafana", "Jenkins", "CircleCI", "Travis CI", "Bamboo", "TeamCity", "Spinnaker", "Helm", "Consul", 
+    "Vault", "Istio", "Linkerd", "Elastic Stack (ELK)",
+
+    # Database Frameworks
+    "SQLAlchemy", "Hibernate ORM", "Mongoose", "Django ORM", "Sequelize", "Prisma", "ActiveRecord", 
+    "TypeORM", "Knex.js", "Alembic",
+
+    # API Development Frameworks
+    "FastAPI", "Flask-RESTful", "GraphQL", "Apollo", "Relay", "gRPC", "Swagger", "Postman", 
+    "JSON Server", "Hapi.js", "LoopBack", "Feathers.js", "Restify",
+
+    # Security Frameworks
+    "OWASP", "Spring Security", "JWT (JSON Web Tokens)", "OAuth2", "Keycloak", "Passport.js", 
+    "SAML", "OpenID Connect (OIDC)", "IAM (Identity and Access Management)", "Zero Trust Framework",
+
+    # ERP & CRM Frameworks
+    "SAP", "Salesforce", "Zoho CRM", "Odoo", "Microsoft Dynamics 365", "Oracle ERP", "NetSuite", 
+    "HubSpot CRM", "Workday", "Tally", "QuickBooks", "JD Edwards", "Deltek", "PeopleSoft", 
+    "Epicor", "Sage Intacct", "Infor",
+
+    # Testing Frameworks
+    "Selenium", "JUnit", "TestNG", "Cypress", "Playwright", "Puppeteer", "Mocha", "Chai", "Jest", 
+    "Enzyme", "Karma", "Protractor", "Appium", "Robot Framework", "Postman", "Pytest", "Unittest", 
+    "Allure", "Cucumber", "SpecFlow", "Gauge", "xUnit",
+
+    # UI/UX Design Frameworks
+    "Material-UI", "Ant Design", "Tailwind CSS", "Bootstrap", "Foundation", "Chakra UI", 
+    "Vuetify", "Bulma", "Quasar", "Metro 4", "PrimeNG", "PrimeReact", "Carbon Design System", 
+    "Figma", "Adobe XD", "Sketch",
+
+    # Cloud Frameworks & Services
+    "AWS", "Azure", "Google Cloud Platform (GCP)", "OpenStack", "Cloud Foundry", "Heroku", 
+    "DigitalOcean", "Firebase", "Kong", "Zuul", "Knative", "Serverless Framework", "AWS Lambda", 
+    "Azure Functions", "Google Cloud Functions",
+
+    # Blockchain Frameworks
+    "Ethereum", "Hyperledger", "Solidity", "Truffle", "Ganache", "Web3.js", "Ethers.js", 
+    "IPFS", "Chaincode", "Corda", "Polygon", "Polkadot", "Solana", "EOS.IO", "Stellar",
+
+    # General Frameworks & Miscellaneous
+    "Scrum", "Agile", "Kanban", "Six Sigma", "ITIL", "COBIT", "Lean", "PRINCE2", "SAFe (Scaled Agile)", 
+    "DevSecOps", "ISO 27001", "GDPR Compliance", "SOX Compliance", "TOGAF", "Zachman Framework", 
+    "Balanced Scorecard", "PESTLE Analysis", "SWOT Analysis", "Business Model Canvas", 
+    "Value Stream Mapping", "Kaizen", "RPA Frameworks (Blue Prism, UiPath, Automation Anywhere)", 
+    "Unity", "Unreal Engine", "Godot"
+]
+
+# Other spellings of skills in SKILL_KEYWORDS; matches are reported under the canonical name
+SKILL_ALIASES = {
+    "JavaScript": ["JS", "ECMAScript"],
+    "TypeScript": ["TS"],
+    "Go": ["Golang"],
+    "C#": ["C Sharp"],
+    "React": ["ReactJS", "React.js"],
+    "React Native": ["ReactNative"],
+    "Angular": ["AngularJS", "Angular.js"],
+    "Vue.js": ["Vue", "VueJS"],
+    "Next.js": ["NextJS"],
+    "Nuxt.js": ["NuxtJS"],
+    "Node.js": ["NodeJS", "Node"],
+    "Express.js": ["ExpressJS", "Express"],
+    "Spring Boot": ["SpringBoot"],
+    "Ruby on Rails": ["Rails", "RoR"],
+    "ASP.NET Core": [".NET Core"],
+    "Scikit-learn": ["sklearn", "scikit learn"],
+    "Hugging Face Transformers": ["HuggingFace", "Hugging Face"],
+    "Apache Spark": ["Spark", "PySpark"],
+    "Kafka": ["Apache Kafka"],
+    "Airflow": ["Apache Airflow"],
+    "Kubernetes": ["K8s"],
+    "Elastic Stack (ELK)": ["ELK Stack"],
+    "Google Cloud Platform (GCP)": ["Google Cloud"],
+    "AWS": ["Amazon Web Services"],
+    "Azure": ["Microsoft Azure"],
+    "Tailwind CSS": ["Tailwind", "TailwindCSS"],
+    "Material-UI": ["MUI", "Material UI"],
+    "Microsoft Dynamics 365": ["Dynamics 365"],
+}
+
+# Skills that are also ordinary words (or single letters); these only match with
+# the exact capitalization, as the original token comparison did
+CASE_SENSITIVE_SKILLS = {
+    "C", "R", "Go", "Swift", "Rust", "Dart", "Ruby", "Lua", "Julia", "Assembly Language",
+    "React", "Angular", "Svelte", "Meteor", "Stencil", "Gatsby", "Ember.js",
+    "Express", "Bottle", "Tornado", "Pyramid", "Struts", "Gin", "Echo", "Fiber (Go)", "Phoenix (Elixir)",
+    "Flutter", "Ionic", "Cordova", "Apache Flex", "Caffe", "Pandas", "Dash", "Flink", "Hive", "Storm",
+    "Presto", "Snowflake", "Puppet", "Chef", "Bamboo", "Helm", "Consul", "Vault", "Prisma",
+    "Apollo", "Relay", "Swagger", "Postman", "Tally", "Infor", "Epicor", "Mocha", "Chai", "Jest",
+    "Enzyme", "Karma", "Protractor", "Allure", "Cucumber", "Gauge", "Foundation", "Bulma", "Quasar",
+    "Sketch", "Kong", "Zuul", "Polygon", "Stellar", "Corda", "Lean", "Unity", "Spark", "Rails",
+    "Node", "Vue", "TS", "JS", "MUI", "Tailwind", "Google Cloud", "Hugging Face",
+}
+
+# Characters separating list entries ("React, Node.js; AWS", bullets, new lines)
+BREAK_CHARACTERS = ",;|\n\r\u2022\u00b7\u25aa\u25cf\u25e6"
+
+# Words of a skill name: alphanumeric runs (keeping a "++"/"#" suffix, as in C++ or C#, and
+# "&" inside a word, so "R&D" is not the skill R), the punctuation that can appear inside
+# names (Node.js, Scikit-learn, CI/CD) and list separators, which end a multi-word match
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+(?:&[A-Za-z0-9]+)*[+#]*|[.\-/&]|[" + BREAK_CHARACTERS + "]")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text)
+
+
+def is_break(token):
+    return token in BREAK_CHARACTERS
+
+
+def name_variants(name):
+    """
+    The keyword itself plus the parts of a parenthesised name,
+    e.g. "Elastic Stack (ELK)" -> "Elastic Stack (ELK)", "Elastic Stack", "ELK".
+    """
+    variants = [name]
+    match = re.match(r"^(.*?)\s*\((.*)\)$", name)
+    if match:
+        outer, inner = match.groups()
+        variants.append(outer)
+        variants.extend(part.strip() for part in inner.split(",") if len(part.strip()) > 2)
+    return variants
+
+
+class SkillMatcher:
+    """
+    Token trie over normalized skill names and aliases.
+
+    `extract` walks the text once, following the trie from each token, so
+    multi-word skills ("Spring Boot", "React Native") are found along with the
+    skills they start with ("React"), and the work grows linearly with the text
+    (times the longest name, a few tokens). A walk stops at list separators, so
+    "React, Native apps" does not read as React Native.
+    """
+
+    def __init__(self, skills, aliases=None, case_sensitive=()):
+        self.root = {}
+        for skill in skills:
+            for variant in name_variants(skill):
+                self.add(variant, skill, variant in case_sensitive or skill in case_sensitive)
+        for skill, names in (aliases or {}).items():
+            for name in names:
+                self.add(name, skill, name in case_sensitive)
+
+    def add(self, name, skill, case_sensitive):
+        tokens = tokenize(name)
+        if not tokens or any(is_break(token) for token in tokens):
+            # Names with a separator inside can never match; their parts are added by name_variants
+            return
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token.lower(), {})
+        # A terminal may hold several entries (e.g. "Elixir" and the inner part of "Phoenix (Elixir)");
+        # the first one added wins
+        node.setdefault(None, []).append((skill, tuple(tokens) if case_sensitive else None))
+
+    def extract(self, text):
+        """
+        Return the canonical names of all skills found in `text`, in order of appearance.
+        """
+        if not text:
+            return []
+        tokens = tokenize(text)
+        lowered = [token.lower() for token in tokens]
+        found = {}
+        for position in range(len(tokens)):
+            node = self.root
+            end = position
+            while end < len(tokens) and lowered[end] in node:
+                node = node[lowered[end]]
+                end += 1
+                for skill, surface in node.get(None, ()):
+                    if surface is None or surface == tuple(tokens[position:end]):
+                        found.setdefault(skill, None)
+                        break
+        return list(found)
+
+
+# Compiled once per process
+SKILL_MATCHER = SkillMatcher(SKILL_KEYWORDS, SKILL_ALIASES, CASE_SENSITIVE_SKILLS)
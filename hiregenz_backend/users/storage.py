@@ -0,0 +1,141 @@
+import shutil
+import boto3
+from pathlib import Path
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from django.conf import settings
+from helpers.instrumentation import span
+from helpers.model_registry import load_once
+from helpers.workers import run_in_background
+
+
+def transfer_config():
+    """
+    Multipart settings for uploads: files over RESUME_UPLOAD_CHUNK_SIZE are sent
+    in parts of that size, RESUME_UPLOAD_CONCURRENCY at a time, so only a few
+    parts are in memory whatever the file size.
+    """
+    return TransferConfig(
+        multipart_threshold=settings.RESUME_UPLOAD_CHUNK_SIZE,
+        multipart_chunksize=settings.RESUME_UPLOAD_CHUNK_SIZE,
+        max_concurrency=settings.RESUME_UPLOAD_CONCURRENCY,
+    )
+
+
+class S3ResumeStorage:
+    """
+    Resumes in the AWS_STORAGE_BUCKET_NAME bucket, through one client per process.
+
+    The client is thread-safe and keeps a pool of up to
+    RESUME_STORAGE_MAX_CONNECTIONS connections, so uploads after the first
+    skip credential resolution and the TLS handshake.
+    """
+    name = "s3"
+
+    def __init__(self):
+        self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+        self.client = boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_S3_REGION_NAME,
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+            config=Config(
+                max_pool_connections=settings.RESUME_STORAGE_MAX_CONNECTIONS,
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
+        )
+        self.config = transfer_config()
+
+    def save(self, file_obj, key):
+        self.client.upload_fileobj(file_obj, self.bucket, key, Config=self.config)
+        return self.url(key)
+
+    def url(self, key):
+        if settings.AWS_S3_ENDPOINT_URL:
+            return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+class LocalResumeStorage:
+    """
+    Resumes in RESUME_LOCAL_STORAGE_DIR, for tests and offline development.
+    """
+    name = "local"
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.RESUME_LOCAL_STORAGE_DIR)
+
+    def save(self, file_obj, key):
+        target = self.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, 'wb') as destination:
+            shutil.copyfileobj(file_obj, destination, settings.RESUME_UPLOAD_CHUNK_SIZE)
+        return self.url(key)
+
+    def url(self, key):
+        return (self.root / key).resolve().as_uri()
+
+    def delete(self, key):
+        (self.root / key).unlink(missing_ok=True)
+
+
+class DjangoResumeStorage:
+    """
+    Resumes in Django's default storage (STORAGES["default"]).
+    """
+    name = "default"
+
+    def __init__(self):
+        from django.core.files.storage import default_storage
+
+        self.storage = default_storage
+
+    def save(self, file_obj, key):
+        from django.core.files import File
+
+        if self.storage.exists(key):
+            self.storage.delete(key)  # Keep the key stable (a resume is replaced, not renamed)
+        return self.url(self.storage.save(key, File(file_obj)))
+
+    def url(self, key):
+        return self.storage.url(key)
+
+    def delete(self, key):
+        self.storage.delete(key)
+
+
+BACKENDS = {
+    "s3": S3ResumeStorage,
+    "local": LocalResumeStorage,
+    "default": DjangoResumeStorage,
+}
+
+
+def get_resume_storage():
+    """
+    The RESUME_STORAGE_BACKEND storage, created once per process.
+    """
+    backend = settings.RESUME_STORAGE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown resume storage backend '{backend}'.")
+    return load_once(("resume-storage", backend), BACKENDS[backend])
+
+
+def upload_resume(file_obj, filename):
+    """
+    Store a resume file and return its URL.
+    """
+    with span("storage_upload"):
+        return get_resume_storage().save(file_obj, f"resumes/{filename}")
+
+
+def upload_resume_async(file_obj, filename):
+    """
+    Store a resume on the storage thread pool (RESUME_STORAGE_WORKERS); returns a
+    Future of its URL. `file_obj` must stay open until the future is done.
+    """
+    return run_in_background('resume-storage', settings.RESUME_STORAGE_WORKERS, upload_resume, file_obj, filename)
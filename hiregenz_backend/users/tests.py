@@ -1,3 +1,397 @@
-from django.test import TestCase
+import hashlib
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from helpers.pdf import PDFExtractionError, extract_pdf_text, reset_pool
+from helpers.model_registry import _models
+from helpers.uploads import SpooledUpload, spool_file, spool_uploads
+from .dedup import MAX_HASH, MERSENNE_PRIME, band_buckets, minhash, permutations, shingles, similarity
+from .ingestion import MAX_ATTEMPTS, process_job, requeue_stale_jobs
+from jobs.models import JobPost
+from matching.embeddings import hash_phrases
+from matching.models import CandidateEmbedding, Match
+from matching.scores import refresh_candidate_matches_safely
+from matching.utils import candidate_phrases
+from .models import Candidate, Recruiter, ResumeIngestionJob, User
+from .skills import SKILL_MATCHER
+from .storage import LocalResumeStorage, get_resume_storage, upload_resume, upload_resume_async
 
-# Create your tests here.
+
+@override_settings(MATCH_REFRESH_SYNC=True)
+@mock.patch('matching.index.index_candidate')
+class CandidateIndexSignalTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username="jane@example.com", role="candidate")
+        self.candidate = Candidate(user=user, name="Jane", email="jane@example.com", skills="python, django")
+
+    def store_skills_embedding(self):
+        CandidateEmbedding.objects.create(
+            candidate=self.candidate, field="skills", model_name=settings.EMBEDDING_MODEL_NAME,
+            text_hash=hash_phrases(candidate_phrases(self.candidate)["skills"]), dimensions=0, vectors=b"",
+        )
+
+    def test_new_candidate_is_indexed(self, index_candidate):
+        self.candidate.save()
+        index_candidate.assert_called_once_with(self.candidate)
+
+    def test_saves_without_skill_changes_skip_the_index(self, index_candidate):
+        self.candidate.save()
+        self.store_skills_embedding()
+        index_candidate.reset_mock()
+
+        self.candidate.otp = "123456"
+        self.candidate.save(update_fields=["otp"])
+        self.candidate.is_verified = True
+        self.candidate.save()
+        index_candidate.assert_not_called()
+
+    def test_skill_change_reindexes(self, index_candidate):
+        self.candidate.save()
+        self.store_skills_embedding()
+        index_candidate.reset_mock()
+
+        self.candidate.skills = "python, django, kubernetes"
+        self.candidate.save()
+        index_candidate.assert_called_once_with(self.candidate)
+
+    def test_index_failure_does_not_fail_the_save(self, index_candidate):
+        index_candidate.side_effect = OSError("index locked")
+        self.candidate.save()
+        self.assertTrue(Candidate.objects.filter(pk=self.candidate.pk).exists())
+
+    @override_settings(MATCH_REFRESH_SYNC=False)
+    @mock.patch('matching.index.run_in_background')
+    def test_indexing_waits_for_the_commit(self, run_in_background, index_candidate):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.candidate.save()
+            run_in_background.assert_not_called()
+        for callback in callbacks:
+            callback()
+        run_in_background.assert_called_once()
+        update, candidate_id = run_in_background.call_args.args[2:]
+        update(candidate_id)
+        index_candidate.assert_called_once_with(self.candidate)
+
+
+@mock.patch('matching.index.submit_index_update')
+class PreferenceRescoringTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username="jane@example.com", role="candidate")
+        # bulk_create: no post_save indexing (the class patch does not cover setUp)
+        self.candidate, = Candidate.objects.bulk_create([
+            Candidate(user=user, name="Jane", email="jane@example.com", otp="123456", is_verified=True)
+        ])
+        recruiter_user = User.objects.create(username="recruiter", role="recruiter")
+        recruiter = Recruiter.objects.create(
+            user=recruiter_user, name="R", email="r@acme.com", company_name="Acme", website_url="https://acme.com"
+        )
+        job = JobPost.objects.create(
+            recruiter=recruiter, title="Backend developer", description="Python", experience=0,
+            min_ctc=0, max_ctc=0, education="B.Tech", key_skills=["python"], job_type="WFH",
+            employment_type="Full-time", industry_type="IT", role="Developer", candidates_needed=1,
+        )
+        self.match = Match.objects.create(candidate=self.candidate, job_post=job, match_score=0.5)
+
+    @mock.patch('matching.scores.run_in_background')
+    def test_preferences_are_rescored_in_the_background(self, run_in_background, submit_index_update):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('verify-email'),
+                {"email": "jane@example.com", "otp": "123456", "preferences": {"preferred_locations": ["Pune"]}},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        run_in_background.assert_called_once()
+        self.assertIs(run_in_background.call_args.args[2], refresh_candidate_matches_safely)
+        # The old score stays visible, flagged stale until the worker replaces it
+        self.match.refresh_from_db()
+        self.assertTrue(self.match.is_stale)
+
+
+class SkillMatcherTests(SimpleTestCase):
+    def test_multi_word_skills(self):
+        self.assertEqual(
+            SKILL_MATCHER.extract("React Native, Spring Boot and Amazon Web Services"),
+            ["React", "React Native", "Spring Boot", "AWS"],
+        )
+
+    def test_list_separators_end_a_match(self):
+        for text in ("React, Native apps; Spring, Boot", "React\nNative | Spring \u2022 Boot"):
+            with self.subTest(text):
+                self.assertEqual(SKILL_MATCHER.extract(text), ["React"])
+        self.assertEqual(SKILL_MATCHER.extract("Amazon, Web Services; Google | Cloud"), [])
+
+    def test_ampersand_inside_a_word(self):
+        self.assertEqual(SKILL_MATCHER.extract("R&D lead"), [])
+        self.assertEqual(SKILL_MATCHER.extract("R&D lead, R programming"), ["R"])
+
+    def test_symbols_and_aliases(self):
+        self.assertEqual(SKILL_MATCHER.extract("C++, C#, Node.js, K8s"), ["C++", "C#", "Node.js", "Kubernetes"])
+
+
+class MinHashTests(SimpleTestCase):
+    resume = (
+        "Jane Doe jane@example.com +1 (555) 123-4567 Backend engineer with six years of experience building "
+        "payment APIs in Python and Django, running PostgreSQL and Redis on AWS, mentoring junior developers "
+        "and leading the migration of a monolith to event driven services processing millions of orders a day"
+    )
+
+    def test_signature_matches_exact_arithmetic(self):
+        a, b = permutations()
+        expected = [
+            min((int(x) * int(a_i) + int(b_i)) % MERSENNE_PRIME & MAX_HASH for x in (
+                int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little")
+                for token in shingles(self.resume)
+            ))
+            for a_i, b_i in zip(a, b)
+        ]
+        self.assertEqual(minhash(self.resume).tolist(), expected)
+
+    def test_same_resume_under_other_contact_details(self):
+        other = self.resume.replace("jane@example.com", "j.doe@mail.example.org").replace(
+            "+1 (555) 123-4567", "+44 20 7946 0958"
+        )
+        score = similarity(minhash(self.resume), minhash(other))
+        self.assertGreaterEqual(score, settings.RESUME_DUPLICATE_SIMILARITY)
+        self.assertTrue(set(band_buckets(minhash(self.resume))) & set(band_buckets(minhash(other))))
+
+    def test_unrelated_resumes_share_no_bands(self):
+        other = (
+            "John Smith john@example.com Registered nurse with ten years in intensive care units, trained in "
+            "patient triage, wound care and medication administration, coordinating night shifts across three "
+            "hospital wards and teaching first aid courses to volunteers in the local community centre"
+        )
+        self.assertLess(similarity(minhash(self.resume), minhash(other)), 0.1)
+        self.assertFalse(set(band_buckets(minhash(self.resume))) & set(band_buckets(minhash(other))))
+
+    def test_empty_text(self):
+        self.assertIsNone(minhash(" jane@example.com "))
+
+
+def pdf_bytes(*pages):
+    """
+    A minimal PDF with one line of Helvetica text per page.
+    """
+    kids = " ".join(f"{5 + 2 * number} 0 R" for number in range(len(pages)))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for number, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 50 750 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * number} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+class PDFExtractionTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "resume.pdf"
+        self.path.write_bytes(pdf_bytes("First page", "Second page", "Third page"))
+
+    def test_path_and_file_object(self):
+        for source in (self.path, BytesIO(self.path.read_bytes())):
+            with self.subTest(type(source).__name__):
+                text = extract_pdf_text(source, parallel=False)
+                self.assertIn("First page", text)
+                self.assertIn("Third page", text)
+
+    def test_max_pages(self):
+        text = extract_pdf_text(self.path, max_pages=2, parallel=False)
+        self.assertIn("Second page", text)
+        self.assertNotIn("Third page", text)
+
+    def test_max_bytes(self):
+        with self.assertRaisesMessage(PDFExtractionError, "too large"):
+            extract_pdf_text(self.path, max_bytes=100, parallel=False)
+
+    def test_corrupt_file(self):
+        with self.assertRaisesMessage(PDFExtractionError, "Could not read the PDF"):
+            extract_pdf_text(BytesIO(b"%PDF-1.4 truncated"), parallel=False)
+
+    def test_timeout_between_pages(self):
+        with self.assertRaisesMessage(PDFExtractionError, "timed out"):
+            extract_pdf_text(self.path, timeout=1e-9, parallel=False)
+
+    @override_settings(PDF_WORKERS=1)
+    def test_pool(self):
+        self.addCleanup(reset_pool)
+        # Short documents go to the pool as well, so the timeout can stop a worker mid-page
+        self.assertIn("Third page", extract_pdf_text(self.path, parallel=True))
+        with self.assertRaisesMessage(PDFExtractionError, "timed out"):
+            extract_pdf_text(self.path, timeout=1e-9, parallel=True)
+
+
+class UploadSpoolingTests(SimpleTestCase):
+    # Several upload handler chunks (64 KB each)
+    content = bytes(range(256)) * 1000
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def upload(self):
+        request = RequestFactory().post("/", {"resume": SimpleUploadedFile("resume.pdf", self.content)})
+        spool_uploads(request, self.directory)
+        return request.FILES["resume"]
+
+    def test_spooled_upload_is_hashed_on_the_way(self):
+        upload = self.upload()
+        self.assertIsInstance(upload, SpooledUpload)
+        self.assertEqual(upload.sha256, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(Path(upload.temporary_file_path()).parent, self.directory)
+        self.assertEqual(upload.read(), self.content)
+        upload.close()
+        self.assertFalse(Path(upload.temporary_file_path()).exists())
+
+    def test_spool_file_adopts_spooled_uploads(self):
+        upload = self.upload()
+        path, sha256 = spool_file(upload, self.directory / "spool")
+        upload.close()  # End of the request: the detached file stays
+        self.assertEqual(path, upload.temporary_file_path())
+        self.assertEqual(Path(path).read_bytes(), self.content)
+        self.assertEqual(sha256, hashlib.sha256(self.content).hexdigest())
+
+    def test_spool_file_copies_other_uploads(self):
+        path, sha256 = spool_file(SimpleUploadedFile("resume.pdf", self.content), self.directory / "spool")
+        self.assertEqual(Path(path).parent, self.directory / "spool")
+        self.assertEqual(Path(path).read_bytes(), self.content)
+        self.assertEqual(sha256, hashlib.sha256(self.content).hexdigest())
+
+
+@mock.patch.dict(_models, clear=True)
+class ResumeStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+
+    def test_local_storage(self):
+        storage = LocalResumeStorage(self.root)
+        url = storage.save(BytesIO(b"%PDF-1.4 resume"), "resumes/jane.pdf")
+        self.assertEqual(url, (self.root / "resumes" / "jane.pdf").resolve().as_uri())
+        self.assertEqual((self.root / "resumes" / "jane.pdf").read_bytes(), b"%PDF-1.4 resume")
+        storage.delete("resumes/jane.pdf")
+        self.assertFalse((self.root / "resumes" / "jane.pdf").exists())
+
+    def test_storage_is_created_once_per_backend(self):
+        with override_settings(RESUME_STORAGE_BACKEND="local", RESUME_LOCAL_STORAGE_DIR=self.root):
+            storage = get_resume_storage()
+            self.assertIsInstance(storage, LocalResumeStorage)
+            self.assertIs(get_resume_storage(), storage)
+            self.assertEqual(upload_resume(BytesIO(b"resume"), "jane.pdf"), storage.url("resumes/jane.pdf"))
+            self.assertEqual(upload_resume_async(BytesIO(b"resume"), "john.pdf").result(timeout=5),
+                             storage.url("resumes/john.pdf"))
+        with override_settings(RESUME_STORAGE_BACKEND="ftp"), self.assertRaises(ValueError):
+            get_resume_storage()
+
+    @override_settings(RESUME_STORAGE_BACKEND="s3", AWS_STORAGE_BUCKET_NAME="resumes-bucket",
+                       AWS_S3_ENDPOINT_URL="http://minio:9000/", RESUME_STORAGE_MAX_CONNECTIONS=7)
+    def test_s3_client_is_shared(self):
+        with mock.patch("users.storage.boto3.client") as client:
+            url = upload_resume(BytesIO(b"resume"), "jane.pdf")
+            upload_resume(BytesIO(b"resume"), "john.pdf")
+        client.assert_called_once()
+        self.assertEqual(client.call_args.kwargs["config"].max_pool_connections, 7)
+        self.assertEqual(client.return_value.upload_fileobj.call_count, 2)
+        self.assertEqual(client.return_value.upload_fileobj.call_args.args[1:], ("resumes-bucket", "resumes/john.pdf"))
+        self.assertEqual(url, "http://minio:9000/resumes-bucket/resumes/jane.pdf")
+
+
+@override_settings(MATCH_REFRESH_SYNC=True)
+class ProcessJobTests(TestCase):
+    resume_data = {"name": "Jane", "email": "jane@example.com", "phone": "123", "skills": ["Python"]}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spooled = Path(directory.name) / "upload.pdf"
+        self.spooled.write_bytes(b"%PDF-1.4 resume")
+        self.job = ResumeIngestionJob.objects.create(
+            file_path=str(self.spooled), original_name="resume.pdf", content_hash="a" * 64
+        )
+        patches = {
+            name: mock.patch(f"users.ingestion.{name}")
+            for name in ("extract_resume_text", "extract_resume_data", "upload_resume", "send_otp_email",
+                         "refresh_candidate_embeddings", "refresh_candidate_matches_safely",
+                         "fingerprint_resume_safely")
+        }
+        patches["index"] = mock.patch("matching.index.index_candidate")
+        self.mocks = {name: patch.start() for name, patch in patches.items()}
+        for patch in patches.values():
+            self.addCleanup(patch.stop)
+        self.mocks["extract_resume_text"].return_value = "Jane\njane@example.com\nSKILLS\nPython"
+        self.mocks["extract_resume_data"].return_value = dict(self.resume_data)
+        self.mocks["upload_resume"].return_value = "https://storage.example.com/jane_resume.pdf"
+
+    def test_new_resume(self):
+        process_job(self.job.id)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.stage, self.job.progress), ("succeeded", "done", 100))
+        self.assertEqual(self.job.candidate.email, "jane@example.com")
+        self.assertEqual(self.job.candidate.resume_hash, "a" * 64)
+        self.assertIn("OTP sent to jane@example.com", self.job.result["message"])
+        self.mocks["send_otp_email"].assert_called_once()
+        self.assertFalse(self.spooled.exists())
+
+    def test_failure_removes_the_spooled_file(self):
+        self.mocks["extract_resume_data"].return_value = {"email": "Not Found"}
+        process_job(self.job.id)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "failed")
+        self.assertEqual(self.job.error, "No valid email found in the resume.")
+        self.assertFalse(self.spooled.exists())
+
+    def test_unchanged_resume_skips_parsing(self):
+        user = User.objects.create(username="jane@example.com", role="candidate")
+        candidate = Candidate.objects.create(user=user, name="Jane", email="jane@example.com", resume_hash="a" * 64)
+        process_job(self.job.id)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "succeeded")
+        self.assertEqual(self.job.candidate, candidate)
+        self.assertIn("Resume unchanged.", self.job.result["message"])
+        self.mocks["extract_resume_text"].assert_not_called()
+        self.mocks["upload_resume"].assert_not_called()
+
+    def test_claimed_jobs_are_not_run_twice(self):
+        ResumeIngestionJob.objects.filter(id=self.job.id).update(status="running")
+        process_job(self.job.id)
+        self.mocks["extract_resume_text"].assert_not_called()
+
+    def test_stale_jobs(self):
+        ResumeIngestionJob.objects.filter(id=self.job.id).update(status="running", attempts=MAX_ATTEMPTS)
+        ResumeIngestionJob.objects.update(updated_at="2020-01-01T00:00:00Z")
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=15)), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "failed")
+        self.assertFalse(self.spooled.exists())
+
+    def test_status_endpoint(self):
+        process_job(self.job.id)
+        response = self.client.get(reverse("upload-resume-status", args=[self.job.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["job_id"], str(self.job.id))
+        self.assertEqual((response.data["status"], response.data["stage"], response.data["progress"]),
+                         ("succeeded", "done", 100))
+        self.assertEqual(response.data["result"]["data"]["email"], "jane@example.com")
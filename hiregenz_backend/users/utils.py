@@ -1,88 +1,8 @@
 import re
-import spacy
 from datetime import datetime
 from rest_framework_simplejwt.tokens import RefreshToken
-
-# Preload SpaCy model
-nlp = spacy.load("en_core_web_sm")
-
-SKILL_KEYWORDS = [
-    # Programming Languages
-    "Python", "Java", "C++", "C", "C#", "JavaScript", "TypeScript", "Ruby", "PHP", "Go", "Swift", 
-    "Kotlin", "R", "Scala", "Perl", "MATLAB", "Shell Scripting", "Dart", "Rust", "Lua", "Haskell", 
-    "COBOL", "Fortran", "VBScript", "Assembly Language", "Erlang", "Elixir", "F#", "Julia", "Solidity",
-
-    # Frontend Frameworks
-    "React", "Angular", "Vue.js", "Next.js", "Nuxt.js", "Svelte", "Ember.js", "Gatsby", 
-    "Backbone.js", "Alpine.js", "Meteor", "Stencil", "Preact", "LitElement",
-
-    # Backend Frameworks
-    "Node.js", "Express.js", "NestJS", "Fastify", "Spring Boot", "Hibernate", "Django", "Flask", 
-    "Bottle", "Tornado", "Pyramid", "CherryPy", "Ruby on Rails", "Laravel", "Symfony", "CodeIgniter", 
-    "CakePHP", "ASP.NET Core", "ASP.NET MVC", "Koa.js", "Struts", "JHipster", "Micronaut", "Dropwizard", 
-    "Gin", "Beego", "Echo", "Fiber (Go)", "Phoenix (Elixir)",
-
-    # Mobile Development Frameworks
-    "React Native", "Flutter", "Ionic", "Cordova", "Xamarin", "NativeScript", "SwiftUI", 
-    "Jetpack Compose", "Apache Flex",
-
-    # Data Science & Machine Learning Frameworks
-    "TensorFlow", "PyTorch", "Scikit-learn", "Keras", "Theano", "MXNet", "Caffe", "Pandas", 
-    "NumPy", "Matplotlib", "Seaborn", "Plotly", "Dask", "H2O.ai", "MLlib", "XGBoost", "LightGBM", 
-    "CatBoost", "Statsmodels", "Dash", "Streamlit", "Hugging Face Transformers", "OpenCV", "NLTK", "Spacy",
-
-    # Data Engineering & Big Data Frameworks
-    "Apache Spark", "Hadoop", "Flink", "Kafka", "Hive", "Storm", "Airflow", "Dask", "Presto", 
-    "Apache Beam", "AWS Glue", "Azure Data Factory", "Snowflake", "BigQuery", "ClickHouse",
-
-    # DevOps Frameworks & Tools
-    "Docker", "Kubernetes", "Terraform", "Ansible", "Puppet", "Chef", "Vagrant", "Prometheus", 
-    "Grafana", "Jenkins", "CircleCI", "Travis CI", "Bamboo", "TeamCity", "Spinnaker", "Helm", "Consul", 
-    "Vault", "Istio", "Linkerd", "Elastic Stack (ELK)",
-
-    # Database Frameworks
-    "SQLAlchemy", "Hibernate ORM", "Mongoose", "Django ORM", "Sequelize", "Prisma", "ActiveRecord", 
-    "TypeORM", "Knex.js", "Alembic",
-
-    # API Development Frameworks
-    "FastAPI", "Flask-RESTful", "GraphQL", "Apollo", "Relay", "gRPC", "Swagger", "Postman", 
-    "JSON Server", "Hapi.js", "LoopBack", "Feathers.js", "Restify",
-
-    # Security Frameworks
-    "OWASP", "Spring Security", "JWT (JSON Web Tokens)", "OAuth2", "Keycloak", "Passport.js", 
-    "SAML", "OpenID Connect (OIDC)", "IAM (Identity and Access Management)", "Zero Trust Framework",
-
-    # ERP & CRM Frameworks
-    "SAP", "Salesforce", "Zoho CRM", "Odoo", "Microsoft Dynamics 365", "Oracle ERP", "NetSuite", 
-    "HubSpot CRM", "Workday", "Tally", "QuickBooks", "JD Edwards", "Deltek", "PeopleSoft", 
-    "Epicor", "Sage Intacct", "Infor",
-
-    # Testing Frameworks
-    "Selenium", "JUnit", "TestNG", "Cypress", "Playwright", "Puppeteer", "Mocha", "Chai", "Jest", 
-    "Enzyme", "Karma", "Protractor", "Appium", "Robot Framework", "Postman", "Pytest", "Unittest", 
-    "Allure", "Cucumber", "SpecFlow", "Gauge", "xUnit",
-
-    # UI/UX Design Frameworks
-    "Material-UI", "Ant Design", "Tailwind CSS", "Bootstrap", "Foundation", "Chakra UI", 
-    "Vuetify", "Bulma", "Quasar", "Metro 4", "PrimeNG", "PrimeReact", "Carbon Design System", 
-    "Figma", "Adobe XD", "Sketch",
-
-    # Cloud Frameworks & Services
-    "AWS", "Azure", "Google Cloud Platform (GCP)", "OpenStack", "Cloud Foundry", "Heroku", 
-    "DigitalOcean", "Firebase", "Kong", "Zuul", "Knative", "Serverless Framework", "AWS Lambda", 
-    "Azure Functions", "Google Cloud Functions",
-
-    # Blockchain Frameworks
-    "Ethereum", "Hyperledger", "Solidity", "Truffle", "Ganache", "Web3.js", "Ethers.js", 
-    "IPFS", "Chaincode", "Corda", "Polygon", "Polkadot", "Solana", "EOS.IO", "Stellar",
-
-    # General Frameworks & Miscellaneous
-    "Scrum", "Agile", "Kanban", "Six Sigma", "ITIL", "COBIT", "Lean", "PRINCE2", "SAFe (Scaled Agile)", 
-    "DevSecOps", "ISO 27001", "GDPR Compliance", "SOX Compliance", "TOGAF", "Zachman Framework", 
-    "Balanced Scorecard", "PESTLE Analysis", "SWOT Analysis", "Business Model Canvas", 
-    "Value Stream Mapping", "Kaizen", "RPA Frameworks (Blue Prism, UiPath, Automation Anywhere)", 
-    "Unity", "Unreal Engine", "Godot"
-]
+from helpers.instrumentation import span
+from .skills import SKILL_KEYWORDS, SKILL_MATCHER  # noqa: F401  (SKILL_KEYWORDS re-exported)
 
 
 def extract_email(text):
@@ -111,10 +31,8 @@ def extract_name(text):
 
 
 def extract_skills(text):
-    """Extract skills using predefined keywords."""
-    doc = nlp(text)
-    skills = {token.text for token in doc if token.text in SKILL_KEYWORDS}
-    return list(skills)
+    """Extract skills using predefined keywords (and their aliases) in a single pass."""
+    return SKILL_MATCHER.extract(text)
 
 
 def extract_section(text, heading):
@@ -184,6 +102,7 @@ def calculate_total_experience(work_experience_text):
         return "0.0"
 
 
+@span("extract_resume_data")
 def extract_resume_data(text):
     """Extract structured data from resume text with robust error handling."""
     try:
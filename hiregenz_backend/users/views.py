@@ -1,196 +1,73 @@
-import random
-import string
-import boto3
-from io import BytesIO
-from pdfminer.high_level import extract_text
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
-from django.core.mail import send_mail
 from rest_framework import status
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
-from .models import Recruiter, Candidate, CandidatePreference
+from django.template.loader import render_to_string
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from .models import Recruiter, Candidate, CandidatePreference, ResumeIngestionJob
 from .serializers import RecruiterSerializer, OTPVerificationSerializer, RecruiterOTPLoginSerializer
-from .utils import extract_resume_data, TokenUtility  # Utility for parsing resumes
+from .utils import TokenUtility
+from .ingestion import enqueue_resume
+from helpers.uploads import spool_uploads
+from matching.scores import submit_candidate_refresh
+from notifications.outbox import queue_email
 
 
 class ResumeUploadView(APIView):
-    """Handles the uploading and parsing of resumes, sending OTP for email verification or preference updates."""
+    """Accepts a resume upload and queues it for background parsing, storage and OTP sending."""
 
     def post(self, request):
+        # Stream the upload once, straight into the ingestion spool, hashing it on the way
+        spool_uploads(request, settings.RESUME_SPOOL_DIR)
         try:
             # Validate and retrieve the resume file
             resume_file = self.get_uploaded_file(request)
-            resume_text = self.extract_resume_text(resume_file)
-            # print(resume_text)
-            # Parse resume data
-            extracted_data = extract_resume_data(resume_text)
-            print("Extractted Data", extracted_data)
-            email = extracted_data.get("email")
-            if not email:
-                return Response({"error": "No valid email found in the resume."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Create or update candidate
-            candidate, message, is_new_or_requires_verification = self.create_or_update_candidate(
-                extracted_data, resume_file, resume_text
-            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Check if OTP is required
-            if is_new_or_requires_verification:
-                if not candidate.is_verified:
-                    # Send OTP for email verification
-                    otp = self.generate_otp()
-                    candidate.otp = otp
-                    candidate.is_verified = False
-                    candidate.save()
-                    self.send_otp_email(candidate.email, otp, candidate.name)
-
-                    return Response(
-                        {
-                            "message": f"{message} OTP sent to {candidate.email} for verification.",
-                            "data": {"email": candidate.email, "is_verified": "false"},
-                        },
-                        status=status.HTTP_201_CREATED,
-                    )
-                else:
-                    # Send OTP for preference updates
-                    otp = self.generate_otp()
-                    candidate.otp = otp
-                    candidate.save()
-                    self.send_otp_email(candidate.email, otp, candidate.name)
-
-                    return Response(
-                        {
-                            "message": "OTP sent for updating preferences.",
-                            "data": {"email": candidate.email, "is_verified": "true"},
-                        },
-                        status=status.HTTP_200_OK,
-                    )
-
-            # No OTP required (email already verified, no preference update needed)
-            return Response(
-                {
-                    "message": f"{message} Candidate already verified and no further action is needed.",
-                    "data": {"email": candidate.email, "is_verified": "true"},
-                },
-                status=status.HTTP_200_OK,
-            )
+        try:
+            job = enqueue_resume(resume_file)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        return Response(
+            {
+                "message": "Resume received and queued for processing.",
+                "data": {
+                    "job_id": str(job.id),
+                    "status_url": reverse("upload-resume-status", args=[job.id]),
+                },
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
     def get_uploaded_file(self, request):
         """Fetch the uploaded resume file."""
         resume_file = request.FILES.get("resume")
         if not resume_file:
             raise ValueError("No resume file provided.")
         return resume_file
-    
-    def extract_resume_text(self, file):
-        """
-        Extract text content from a PDF resume file.
-        """
-        try:
-            # Convert the InMemoryUploadedFile to a file-like object (BytesIO)
-            file_content = BytesIO(file.read())
-            
-            # Extract text from the PDF content
-            content = extract_text(file_content)
-            
-            return content
-        except Exception as e:
-            raise ValueError(f"Error extracting text from resume: {str(e)}")
-
-    def upload_to_s3(self, file_obj, filename):
-        """Upload the resume file to AWS S3 and return the public URL."""
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME
-        )
-        bucket_name = settings.AWS_STORAGE_BUCKET_NAME
-        s3_path = f"resumes/{filename}"
-
-        # Upload the file to the specified S3 path
-        s3.upload_fileobj(file_obj, bucket_name, s3_path)
-
-        # Construct the URL for the uploaded file
-        url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_path}"
-        return url
-
-    def create_or_update_candidate(self, extracted_data, resume_file, resume_text):
-        """Create or update a candidate record based on extracted resume data."""
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
 
-        email = extracted_data.get("email")
-        candidate = Candidate.objects.filter(email=email).first()
-
-        # Generate a unique filename for the resume
-        filename = f"{email.replace('@', '_').replace('.', '_')}_resume.pdf"
-
-        # Upload resume to S3
-        resume_url = self.upload_to_s3(resume_file, filename)
 
-        if candidate:
-            if not candidate.is_verified:  # Candidate exists but is not verified
-                for field, value in extracted_data.items():
-                    setattr(candidate, field, value)
-                candidate.resume_file = resume_url
-                candidate.resume_text = resume_text
-                candidate.save()
-                return candidate, "Candidate details updated successfully!", True
-            else:  # Candidate exists, already verified (send OTP for preferences update)
-                return candidate, "Candidate details updated successfully!", True
-        else:
-            # Create a new user
-            user = User.objects.create_user(
-                username=email,  # Use email as the username
-                email=email,
-                password=''.join(random.choices(string.ascii_letters + string.digits, k=8)),  # Example: 8-character password
-                role='candidate'  # Set the role for the user
-            )
+class ResumeUploadStatusView(APIView):
+    """Reports the progress of a queued resume upload."""
 
-            # Create a new candidate linked to the user
-            candidate = Candidate.objects.create(
-                user=user,
-                name=extracted_data.get("name"),
-                email=email,
-                phone=extracted_data.get("phone"),
-                skills=", ".join(extracted_data.get("skills", [])),
-                certifications=extracted_data.get("certifications"),
-                education=extracted_data.get("education"),
-                work_experience=extracted_data.get("work_experience"),
-                total_work_experience=extracted_data.get("total_experience"),
-                professional_summary=extracted_data.get("professional_summary"),
-                resume_text=resume_text,
-                resume_file=resume_url,
-            )
-            return candidate, "Candidate created successfully!", True
-
-    def generate_otp(self):
-        """Generate a 6-digit OTP."""
-        return ''.join(random.choices(string.digits, k=6))
-
-    def send_otp_email(self, email, otp, name):
-        """Send an OTP email to the candidate with an HTML template."""
-        subject = "Verify Your Email - HireGenZ"
-        from_email = settings.DEFAULT_FROM_EMAIL
-        to_email = [email]
-
-        # Render the HTML template with context
-        html_content = render_to_string('verification_email.html', {'name': name, 'otp': otp})
-
-        # Create the email
-        email_message = EmailMultiAlternatives(subject, "", from_email, to_email)
-        email_message.attach_alternative(html_content, "text/html")
-
-        try:
-            email_message.send()
-        except Exception as e:
-            print(f"Error sending OTP email: {e}")
+    def get(self, request, job_id):
+        job = get_object_or_404(ResumeIngestionJob, id=job_id)
+        return Response(
+            {
+                "job_id": str(job.id),
+                "status": job.status,
+                "stage": job.stage,
+                "progress": job.progress,
+                "result": job.result,  # Same message/data the upload used to return, once succeeded
+                "error": job.error,
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class VerifyEmailView(APIView):
@@ -216,16 +93,17 @@ class VerifyEmailView(APIView):
         # OTP matches
         if not candidate.is_verified:
             # First-time email verification
-            candidate.is_verified = True
-            candidate.otp = None  # Clear OTP after verification
-            candidate.save()
+            with transaction.atomic():
+                candidate.is_verified = True
+                candidate.otp = None  # Clear OTP after verification
+                candidate.save()
+
+                # Send a welcome email after successful first-time verification
+                self.send_welcome_email(candidate.email, candidate.name)
 
             # Handle candidate preferences if provided
             self.update_preferences(candidate, preferences_data)
 
-            # Send a welcome email after successful first-time verification
-            self.send_welcome_email(candidate.email, candidate.name)
-
             return Response(
                 {"message": "Email verified successfully and preferences updated."},
                 status=status.HTTP_200_OK,
@@ -252,10 +130,8 @@ class VerifyEmailView(APIView):
             "You can now explore the features of HireGenZ.\n\n"
             "Thank you for joining us!"
         )
-        try:
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
-        except Exception as e:
-            print(f"Error sending welcome email: {e}")
+        # Sent by the outbox worker after the verification commits
+        queue_email(email, subject, message, category="welcome")
 
     def update_preferences(self, candidate, preferences_data):
         """Update or create preferences for the candidate."""
@@ -281,6 +157,9 @@ class VerifyEmailView(APIView):
             },
         )
 
+        # Salary and location scores depend on the preferences; rescored off the request
+        submit_candidate_refresh(candidate)
+
 
 class RecruiterRegistrationView(APIView):
     """
@@ -289,15 +168,16 @@ class RecruiterRegistrationView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = RecruiterSerializer(data=request.data)
         if serializer.is_valid():
-            recruiter = serializer.save()
-            recruiter.generate_otp()  # Generate OTP
-            # Send OTP to the recruiter's email
-            send_mail(
-                subject="Verify Your Email",
-                message=f"Your OTP is {recruiter.otp}. It is valid for 10 minutes.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[recruiter.email],
-            )
+            with transaction.atomic():
+                recruiter = serializer.save()
+                recruiter.generate_otp()  # Generate OTP
+                # Send OTP to the recruiter's email
+                queue_email(
+                    recruiter.email,
+                    subject="Verify Your Email",
+                    body=f"Your OTP is {recruiter.otp}. It is valid for 10 minutes.",
+                    category="otp",
+                )
             return Response({"message": "Recruiter registered successfully. OTP sent to email."}, status=HTTP_200_OK)
         return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
 
@@ -342,13 +222,14 @@ class SendOTPForLoginView(APIView):
             return Response({"error": "Recruiter not found."}, status=HTTP_400_BAD_REQUEST)
 
         # **Generate and send OTP, regardless of email verification status**
-        recruiter.generate_otp()
-        send_mail(
-            subject="Your OTP for Login",
-            message=f"Your OTP for login is {recruiter.otp}. It is valid for 10 minutes.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-        )
+        with transaction.atomic():
+            recruiter.generate_otp()
+            queue_email(
+                email,
+                subject="Your OTP for Login",
+                body=f"Your OTP for login is {recruiter.otp}. It is valid for 10 minutes.",
+                category="otp",
+            )
 
         return Response({"message": "OTP sent to your email."}, status=HTTP_200_OK)
 
@@ -361,21 +242,12 @@ class RecruiterOTPLoginView(APIView):
     def send_welcome_email(self, recruiter):
         """Send a welcome email to the recruiter."""
         subject = "Welcome to HireGenZo!"
-        from_email = settings.DEFAULT_FROM_EMAIL
-        to_email = [recruiter.email]
 
         # Render the HTML template with context
         html_content = render_to_string('welcome_recuiters.html', {'name': recruiter.name})
 
-        # Create the email
-        email_message = EmailMultiAlternatives(subject, "", from_email, to_email)
-        email_message.attach_alternative(html_content, "text/html")
-
-        try:
-            # Send the email
-            email_message.send()
-        except Exception as e:
-            print(f"Error sending welcome email: {e}")
+        # Queue the email; the outbox worker sends it
+        queue_email(recruiter.email, subject, html_body=html_content, category="welcome")
 
     def post(self, request, *args, **kwargs):
         serializer = RecruiterOTPLoginSerializer(data=request.data)
@@ -384,9 +256,10 @@ class RecruiterOTPLoginView(APIView):
 
             # Check if the recruiter is being verified for the first time
             if not recruiter.is_verified:
-                self.send_welcome_email(recruiter)
-                recruiter.is_verified = True  # Mark the welcome email as sent
-                recruiter.save()
+                with transaction.atomic():
+                    self.send_welcome_email(recruiter)
+                    recruiter.is_verified = True  # Mark the welcome email as sent
+                    recruiter.save()
 
             # Generate JWT tokens using TokenUtility
             tokens = TokenUtility.get_tokens_for_user(recruiter.user)